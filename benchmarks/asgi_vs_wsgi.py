@@ -0,0 +1,253 @@
+"""
+Пропускная способность WSGI и ASGI при множестве медленных клиентов.
+
+    python -m benchmarks.asgi_vs_wsgi benchmarks/scenarios/news.json \\
+        --clients 200 --threads 8 --read-delay 0.1
+
+Из сценария wsgi_replay берутся только GET-запросы. Медленный клиент
+читает ответ порциями по --chunk-size байт и на каждую порцию тратит
+--read-delay секунд.
+
+WSGI запускается как сервер с --threads рабочими потоками: поток занят
+запросом, пока клиент не дочитает ответ. ASGI вызывается прямо через
+application(scope, receive, send) в цикле событий. Медленное чтение
+ответа там — ожидание внутри send, а работа представлений идёт в пуле
+из --threads потоков (ASYNC_VIEW_THREADS). Каждый режим выполняется в
+своём процессе с одним и тем же планом запросов.
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from pathlib import Path
+
+from benchmarks.common import setup_django, summarize, write_report
+from benchmarks.wsgi_replay import (
+    WSGI_MODULES, build_plan, load_data, make_environ, warmup_plan,
+)
+
+ASGI_MODULES = {
+    'ya_news': 'yanews.asgi',
+    'ya_note': 'yanote.asgi',
+}
+
+
+def client_delay(size, args):
+    """Сколько медленный клиент читает size байт ответа."""
+    return math.ceil(size / args.chunk_size) * args.read_delay
+
+
+def client_parts(plan, clients):
+    return [plan[index::clients] for index in range(clients)]
+
+
+def wsgi_request(application, request, args):
+    status = []
+
+    def start_response(line, headers, exc_info=None):
+        status.append(int(line.split()[0]))
+
+    environ = make_environ(request, multiprocess=False)
+    environ['wsgi.multithread'] = True
+    response = application(environ, start_response)
+    try:
+        for chunk in response:
+            # Сервер пишет ответ клиенту, занимая рабочий поток.
+            time.sleep(client_delay(len(chunk), args))
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    return status[0]
+
+
+def run_wsgi(application, plan, args):
+    """Клиенты в потоках, сервер — пул из args.threads потоков."""
+    results = []
+    lock = threading.Lock()
+
+    def client(part, server):
+        for request in part:
+            started = time.perf_counter()
+            status = server.submit(
+                wsgi_request, application, request, args
+            ).result()
+            with lock:
+                results.append((status, time.perf_counter() - started))
+
+    with ThreadPoolExecutor(args.threads) as server:
+        threads = [
+            threading.Thread(target=client, args=(part, server))
+            for part in client_parts(plan, args.clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return results
+
+
+def make_scope(request):
+    headers = [(b'host', b'localhost')]
+    if request['cookie']:
+        headers.append((b'cookie', request['cookie'].encode()))
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': request['method'],
+        'scheme': 'http',
+        'path': request['path'],
+        'raw_path': request['path'].encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': headers,
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+
+
+async def asgi_request(application, request, args):
+    status = []
+    body_sent = asyncio.Event()
+
+    async def receive():
+        if not body_sent.is_set():
+            body_sent.set()
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Клиент не отключается, пока не дочитает ответ.
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif message['type'] == 'http.response.body':
+            # Медленный клиент задерживает только эту сопрограмму.
+            await asyncio.sleep(
+                client_delay(len(message.get('body', b'')), args)
+            )
+
+    await application(make_scope(request), receive, send)
+    return status[0]
+
+
+def run_asgi(application, plan, args):
+    results = []
+
+    async def client(part):
+        for request in part:
+            started = time.perf_counter()
+            status = await asgi_request(application, request, args)
+            results.append((status, time.perf_counter() - started))
+
+    async def main():
+        await asyncio.gather(
+            *(client(part) for part in client_parts(plan, args.clients))
+        )
+
+    asyncio.run(main())
+    return results
+
+
+def run_mode(mode, project, plan, args):
+    """Прогон одного режима в отдельном процессе."""
+    if mode == 'asgi':
+        os.environ['DJANGO_ASYNC_VIEWS'] = '1'
+    setup_django(project, args.database, migrate=False)
+    from django.conf import settings
+
+    settings.DEBUG = False
+    settings.ASYNC_VIEW_THREADS = args.threads
+    if mode == 'asgi':
+        application = import_module(ASGI_MODULES[project]).application
+        run = run_asgi
+    else:
+        application = import_module(WSGI_MODULES[project]).application
+        run = run_wsgi
+    run(application, warmup_plan(plan, args.warmup), args)
+    started = time.perf_counter()
+    results = run(application, plan, args)
+    duration = time.perf_counter() - started
+    return {
+        'rps': len(results) / duration,
+        'duration_s': duration,
+        'errors': sum(1 for status, _ in results if status >= 400),
+        'latency': summarize([seconds for _, seconds in results]),
+    }
+
+
+def run(args, scenario):
+    from django.core.management import call_command
+    from django.db import connections
+
+    project = scenario['project']
+    if not any(load_data(project).values()):
+        dataset = scenario['dataset']
+        call_command(
+            dataset['command'], stdout=io.StringIO(), **dataset['options']
+        )
+    reads = {
+        **scenario,
+        'mix': [
+            entry for entry in scenario['mix']
+            if entry.get('method', 'GET') == 'GET'
+        ],
+    }
+    plan = build_plan(reads, args.requests, args.seed, args.users)
+    connections.close_all()
+    context = multiprocessing.get_context('spawn')
+    report = {
+        'scenario': str(args.scenario),
+        'requests': len(plan),
+        'clients': args.clients,
+        'threads': args.threads,
+        'read_delay_s': args.read_delay,
+        'chunk_size': args.chunk_size,
+    }
+    for mode in ('wsgi', 'asgi'):
+        with context.Pool(1) as pool:
+            report[mode] = pool.apply(run_mode, (mode, project, plan, args))
+    report['asgi_speedup'] = report['asgi']['rps'] / report['wsgi']['rps']
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('scenario', type=Path)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument(
+        '--threads', type=int, default=8,
+        help='Потоки WSGI-сервера и пула асинхронных представлений.',
+    )
+    parser.add_argument(
+        '--read-delay', type=float, default=0.1,
+        help='Секунды, за которые клиент читает одну порцию ответа.',
+    )
+    parser.add_argument('--chunk-size', type=int, default=16 * 1024)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database', type=Path)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    scenario = json.loads(args.scenario.read_text(encoding='utf-8'))
+    with tempfile.TemporaryDirectory() as directory:
+        if args.database is None:
+            args.database = Path(directory) / 'asgi.sqlite3'
+        setup_django(scenario['project'], args.database)
+        write_report(run(args, scenario), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Общие помощники для бенчмарков проектов ya_news и ya_note."""
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SETTINGS = {
+    'ya_news': 'yanews.settings',
+    'ya_note': 'yanote.settings',
+}
+
+
+def setup_django(project, database=None, migrate=True):
+    """
+    Настраиваем Django для проекта project.
+
+    database — путь к отдельному файлу SQLite, чтобы бенчмарк не трогал
+    рабочую базу проекта.
+    """
+    sys.path.insert(0, str(BASE_DIR / project))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', SETTINGS[project])
+    import django
+    from django.conf import settings
+
+    if database is not None:
+        # Все подключения проекта, в том числе для чтения, — один файл.
+        for alias in settings.DATABASES.values():
+            alias['NAME'] = str(database)
+    django.setup()
+    if migrate:
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = max(0, round(percent / 100 * len(ordered) + 0.5) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def summarize(timings):
+    """Сводка по длительностям в секундах, результат в миллисекундах."""
+    return {
+        'count': len(timings),
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'p50_ms': percentile(timings, 50) * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+        'p99_ms': percentile(timings, 99) * 1000,
+    }
+
+
+def measure(func, repeat):
+    """Запускаем func repeat раз и возвращаем длительности в секундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def write_report(report, output=None):
+    """Печатаем отчёт в JSON или сохраняем его в файл."""
+    data = json.dumps(report, ensure_ascii=False, indent=2, default=str)
+    if output is None:
+        print(data)
+    else:
+        Path(output).write_text(data + '\n', encoding='utf-8')
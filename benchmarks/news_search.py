@@ -0,0 +1,86 @@
+"""
+Сравнение поиска по индексу FTS5 и LIKE-просмотра таблицы новостей.
+
+    python -m benchmarks.news_search --news 1000000 --database /tmp/news.db
+
+Если в базе меньше новостей, чем --news, недостающие создаются. Слова
+из словаря встречаются почти в каждой новости, а метка «тегN» — в одной
+новости из десяти тысяч: так видно, как ведут себя частые и редкие слова.
+"""
+import argparse
+import random
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import measure, setup_django, summarize, write_report
+
+VOCABULARY = (
+    'новости', 'погода', 'спорт', 'матч', 'команда', 'рецепт', 'пирог',
+    'город', 'выборы', 'экономика', 'рынок', 'курс', 'студенты', 'робот',
+    'приложение', 'Python', 'разработка', 'выставка', 'театр', 'премьера',
+    'фестиваль', 'музыка', 'кино', 'наука', 'космос', 'ракета', 'запуск',
+)
+
+
+def fill_news(total, batch_size=10000, seed=0):
+    from news.models import News
+
+    rng = random.Random(seed)
+    missing = total - News.objects.count()
+    while missing > 0:
+        size = min(batch_size, missing)
+        News.objects.bulk_create(
+            News(
+                title=' '.join(rng.choices(VOCABULARY, k=4)).capitalize(),
+                text=' '.join(
+                    (*rng.choices(VOCABULARY, k=40),
+                     f'тег{rng.randrange(10000)}')
+                ),
+            )
+            for _ in range(size)
+        )
+        missing -= size
+
+
+def run(args):
+    from django.db.models import Q
+
+    from news.models import News
+    from news.search import search_news
+
+    fill_news(args.news)
+    report = {'news': News.objects.count(), 'queries': {}}
+    for word in args.words:
+        def fts():
+            return search_news(word, limit=20)
+
+        def like():
+            return list(News.objects.filter(
+                Q(title__icontains=word) | Q(text__icontains=word)
+            )[:20])
+
+        report['queries'][word] = {
+            'fts5': summarize(measure(fts, args.repeat)),
+            'like': summarize(measure(like, args.repeat)),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--news', type=int, default=1000000)
+    parser.add_argument('--database', type=Path)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument(
+        '--words', nargs='+', default=['ракета', 'тег4242', 'редкоеслово']
+    )
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        database = args.database or Path(directory) / 'news.sqlite3'
+        setup_django('ya_news', database)
+        write_report(run(args), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Подсказки заголовков: список в памяти против title__istartswith.
+
+    python -m benchmarks.note_autocomplete --notes 1000000 \\
+        --database /tmp/notes.db
+
+У пользователя bench-search создаются --notes заметок (как в
+note_search). Отчёт содержит время построения и размер списка
+заголовков в памяти и задержку подсказки по каждому префиксу из
+--prefixes для списка и для запроса к базе.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import measure, setup_django, summarize, write_report
+from benchmarks.note_search import fill_notes
+
+
+def run(args):
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+
+    from notes.autocomplete import TitleIndexes
+    from notes.models import Note
+
+    author, _ = get_user_model().objects.get_or_create(
+        username='bench-search'
+    )
+    fill_notes(author, args.notes)
+    indexes = TitleIndexes()
+    started = time.perf_counter()
+    index = indexes.index(author.pk)
+    report = {
+        'author_notes': len(index.entries),
+        'build_ms': (time.perf_counter() - started) * 1000,
+        'index_mb': index.size / 1024 / 1024,
+        'prefixes': {},
+    }
+    limit = settings.NOTES_AUTOCOMPLETE_RESULTS
+    for prefix in args.prefixes:
+        def memory():
+            return indexes.complete(author.pk, prefix)
+
+        def database():
+            return list(Note.objects.filter(
+                author=author, title__istartswith=prefix
+            ).values_list('title', 'slug')[:limit])
+
+        report['prefixes'][prefix] = {
+            'memory': summarize(measure(memory, args.repeat)),
+            'istartswith': summarize(measure(database, args.repeat)),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--notes', type=int, default=1000000)
+    parser.add_argument('--database', type=Path)
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument(
+        '--prefixes', nargs='+', default=['з', 'заметка', 'релиз от', 'я'],
+    )
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        database = args.database or Path(directory) / 'notes.sqlite3'
+        setup_django('ya_note', database)
+        write_report(run(args), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Размер базы и задержки с сжатием больших текстов заметок и без него.
+
+    python -m benchmarks.note_compression --notes 2000 --size 64
+
+Для каждого режима в отдельном процессе создаётся новая база, в неё
+записываются --notes заметок с текстом около --size КБ, похожим на
+журнал программы. Режимы:
+
+- plain — NOTES_TEXT_COMPRESSION_THRESHOLD = None, тексты как есть;
+- compressed — порог по умолчанию из настроек проекта.
+
+Отчёт содержит размер файла базы, задержку создания заметки и задержки
+чтения: заметки с текстом (как NoteDetail), заметки без обращения к
+тексту (как NoteDelete при POST) и страницы списка без текста.
+"""
+import argparse
+import multiprocessing
+import random
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import measure, setup_django, summarize, write_report
+
+LEVELS = ('DEBUG', 'INFO', 'INFO', 'INFO', 'WARNING', 'ERROR')
+MESSAGES = (
+    'запрос обработан', 'подключение к базе открыто', 'кеш устарел',
+    'повтор запроса', 'пользователь вошёл', 'задача поставлена в очередь',
+)
+
+
+def log_text(rng, size):
+    lines, length = [], 0
+    while length < size:
+        line = (
+            f'2024-01-{rng.randint(1, 28):02} '
+            f'{rng.randint(0, 23):02}:{rng.randint(0, 59):02}:'
+            f'{rng.randint(0, 59):02} {rng.choice(LEVELS)} '
+            f'{rng.choice(MESSAGES)} id={rng.randrange(10 ** 6)} '
+            f'за {rng.randint(1, 999)} мс'
+        )
+        lines.append(line)
+        length += len(line.encode()) + 1
+    return '\n'.join(lines)
+
+
+def run_mode(mode, database, args):
+    setup_django('ya_note', database)
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+
+    from notes.models import Note
+
+    if mode == 'plain':
+        settings.NOTES_TEXT_COMPRESSION_THRESHOLD = None
+    rng = random.Random(args.seed)
+    author = get_user_model().objects.create(username='bench-compression')
+    texts = [log_text(rng, args.size * 1024) for _ in range(args.notes)]
+    timings = []
+    for index, text in enumerate(texts):
+        timings.extend(measure(
+            lambda: Note.objects.create(
+                author=author, title=f'Журнал {index}', text=text,
+                slug=f'log-{index}',
+            ),
+            1,
+        ))
+    ids = list(Note.objects.values_list('id', flat=True))
+
+    def detail():
+        return len(Note.objects.get(pk=rng.choice(ids)).text)
+
+    def row():
+        return Note.objects.get(pk=rng.choice(ids)).pk
+
+    def page():
+        return list(Note.objects.filter(author=author).only(
+            'id', 'slug', 'title'
+        )[:settings.NOTES_COUNT_ON_PAGE])
+
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+    return {
+        'threshold': settings.NOTES_TEXT_COMPRESSION_THRESHOLD,
+        'database_mb': Path(database).stat().st_size / 1024 / 1024,
+        'create': summarize(timings),
+        'read_detail': summarize(measure(detail, args.repeat)),
+        'read_row': summarize(measure(row, args.repeat)),
+        'read_list_page': summarize(measure(page, args.repeat)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--notes', type=int, default=2000)
+    parser.add_argument(
+        '--size', type=int, default=64, help='Размер текста в КБ.',
+    )
+    parser.add_argument('--repeat', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    context = multiprocessing.get_context('spawn')
+    report = {'notes': args.notes, 'size_kb': args.size}
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ('plain', 'compressed'):
+            database = Path(directory) / f'{mode}.sqlite3'
+            with context.Pool(1) as pool:
+                report[mode] = pool.apply(run_mode, (mode, database, args))
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
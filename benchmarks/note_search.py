@@ -0,0 +1,114 @@
+"""
+Поиск по заметкам одного пользователя: FTS5 против LIKE.
+
+    python -m benchmarks.note_search --notes 1000000 --database /tmp/notes.db
+
+У пользователя bench-search создаются --notes заметок, у остальных
+--other-notes заметок через generate_notes_data. Слова из словаря
+встречаются почти в каждой заметке, а метка «тегN» — в одной заметке
+из десяти тысяч: так видно, как ведут себя частые и редкие слова.
+Время поиска по FTS5 растёт с числом найденных заметок автора, которые
+нужно ранжировать, а не с размером таблицы.
+"""
+import argparse
+import io
+import random
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import measure, setup_django, summarize, write_report
+
+
+def fill_notes(author, total, batch_size=10000, seed=0):
+    from django.db import transaction
+
+    from notes.management.commands.generate_notes_data import WORDS
+    from notes.models import Note
+    from yacommon.generators import next_pk
+
+    rng = random.Random(seed)
+    missing = total - Note.objects.filter(author=author).count()
+    while missing > 0:
+        size = min(batch_size, missing)
+        first = next_pk(Note)
+        with transaction.atomic():
+            Note.objects.bulk_create(
+                Note(
+                    pk=pk,
+                    author=author,
+                    title=' '.join(rng.choices(WORDS, k=3)).capitalize(),
+                    text=' '.join(
+                        (*rng.choices(WORDS, k=40),
+                         f'тег{rng.randrange(10000)}')
+                    ),
+                    slug=f'bench-{pk}',
+                )
+                for pk in range(first, first + size)
+            )
+        missing -= size
+
+
+def run(args):
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db.models import Q
+
+    from notes.models import Note
+    from notes.search import search_notes
+
+    author, _ = get_user_model().objects.get_or_create(
+        username='bench-search'
+    )
+    others = Note.objects.exclude(author=author).count()
+    if others < args.other_notes:
+        call_command(
+            'generate_notes_data', users=args.users,
+            notes=args.other_notes - others, stdout=io.StringIO(),
+        )
+    fill_notes(author, args.notes)
+    report = {
+        'author_notes': Note.objects.filter(author=author).count(),
+        'all_notes': Note.objects.count(),
+        'queries': {},
+    }
+    for word in args.words:
+        def fts():
+            return search_notes(author, word)
+
+        def like():
+            return list(Note.objects.filter(
+                Q(title__icontains=word) | Q(text__icontains=word),
+                author=author,
+            ).only('id', 'slug', 'title')[:20])
+
+        report['queries'][word] = {
+            'fts5': summarize(measure(fts, args.repeat)),
+            'like': summarize(measure(like, args.repeat)),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--notes', type=int, default=1000000)
+    parser.add_argument('--other-notes', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--database', type=Path)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument(
+        '--words', nargs='+',
+        default=['тег4242', 'тег42', 'релиз отпуск', 'редкоеслово'],
+    )
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        database = args.database or Path(directory) / 'notes.sqlite3'
+        setup_django('ya_note', database)
+        write_report(run(args), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Параллельное создание заметок с одинаковым заголовком.
+
+    python -m benchmarks.note_slugs --notes 5000 --processes 4 --threads 4
+
+Каждый поток каждого процесса создаёт свою долю --notes заметок с
+заголовком --title без адреса, так что адрес подбирает notes/slugs.py.
+Отчёт содержит число созданных заметок и ошибок, заметки в секунду,
+задержку создания и число повторных подборов адреса после конфликта.
+"""
+import argparse
+import itertools
+import multiprocessing
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from benchmarks.common import setup_django, summarize, write_report
+
+
+def create_notes(author_id, title, count):
+    """Создаём count заметок, результат — задержки и ошибки по типам."""
+    from django.db import connections
+
+    from notes.models import Note
+
+    timings, errors = [], Counter()
+    try:
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                Note.objects.create(author_id=author_id, title=title, text='')
+            except Exception as error:
+                errors[type(error).__name__] += 1
+                continue
+            timings.append(time.perf_counter() - started)
+    finally:
+        connections.close_all()
+    return timings, errors
+
+
+def count_allocations():
+    """Считаем вызовы подбора адреса: сверх числа заметок — повторы."""
+    from notes import slugs
+
+    allocate = slugs.allocate_slug
+    calls = itertools.count()
+
+    def counted(*args, **kwargs):
+        next(calls)
+        return allocate(*args, **kwargs)
+
+    slugs.allocate_slug = counted
+    return calls
+
+
+def process_worker(database, author_id, title, counts):
+    """Потоки одного процесса, по потоку на элемент counts."""
+    setup_django('ya_note', database, migrate=False)
+    calls = count_allocations()
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda count=count: results.append(
+                create_notes(author_id, title, count)
+            )
+        )
+        for count in counts
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return (
+        [seconds for timings, _ in results for seconds in timings],
+        sum((errors for _, errors in results), Counter()),
+        next(calls),
+    )
+
+
+def shares(total, parts):
+    return [total // parts + (index < total % parts) for index in range(parts)]
+
+
+def run(args):
+    from django.contrib.auth import get_user_model
+    from django.db import connections
+
+    from notes.models import Note
+
+    author = get_user_model().objects.create(username='bench-slugs')
+    connections.close_all()
+    counts = shares(args.notes, args.processes * args.threads)
+    context = multiprocessing.get_context('spawn')
+    started = time.perf_counter()
+    with context.Pool(args.processes) as pool:
+        chunks = pool.starmap(process_worker, [
+            (
+                args.database, author.pk, args.title,
+                counts[index::args.processes],
+            )
+            for index in range(args.processes)
+        ])
+    duration = time.perf_counter() - started
+    timings = [seconds for chunk, _, _ in chunks for seconds in chunk]
+    created = Note.objects.filter(author=author).count()
+    allocations = sum(calls for _, _, calls in chunks)
+    return {
+        'notes': args.notes,
+        'processes': args.processes,
+        'threads': args.threads,
+        'created': created,
+        'unique_slugs': Note.objects.filter(
+            author=author
+        ).values('slug').distinct().count(),
+        'errors': dict(sum((errors for _, errors, _ in chunks), Counter())),
+        'retries': allocations - created,
+        'notes_per_s': created / duration,
+        'latency': summarize(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--notes', type=int, default=5000)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--title', default='Заметка')
+    parser.add_argument('--database', type=Path)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        if args.database is None:
+            args.database = Path(directory) / 'slugs.sqlite3'
+        setup_django('ya_note', args.database)
+        write_report(run(args), args.output)
+
+
+if __name__ == '__main__':
+    main()
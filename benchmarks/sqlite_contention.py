@@ -0,0 +1,154 @@
+"""
+Конкуренция читателей и писателей SQLite в обычном и боевом режимах.
+
+    python -m benchmarks.sqlite_contention benchmarks/scenarios/news.json \\
+        --readers 8 --writers 2 --duration 10
+
+План запросов строится по сценарию wsgi_replay. GET-запросы выполняют
+потоки-читатели, POST-запросы — потоки-писатели, одновременно и в
+течение --duration секунд. Каждый режим получает свою копию базы и
+запускается в отдельном процессе:
+
+- rollback — настройки по умолчанию: журнал отката, подключение на
+  запрос, читатели ждут, пока писатель фиксирует транзакцию;
+- production — DJANGO_SQLITE_PRODUCTION=1: WAL, PRAGMA подключений,
+  постоянные подключения и отдельное подключение для чтения.
+
+Отчёт содержит запросы в секунду, перцентили задержки и число ошибок
+(ответов 5xx, в том числе «database is locked») для чтения и записи.
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from importlib import import_module
+from pathlib import Path
+
+from benchmarks.common import setup_django, summarize, write_report
+from benchmarks.wsgi_replay import (
+    WSGI_MODULES, build_plan, load_data, replay,
+)
+
+MODES = {
+    'rollback': {},
+    'production': {'DJANGO_SQLITE_PRODUCTION': '1'},
+}
+
+
+def worker(application, requests, deadline, results):
+    while time.perf_counter() < deadline:
+        try:
+            request = requests.get_nowait()
+        except queue.Empty:
+            return
+        results.extend(replay(application, [request]))
+
+
+def run_mode(mode, project, database, plan, args):
+    """Читатели и писатели одновременно, в отдельном процессе."""
+    os.environ.update(MODES[mode])
+    setup_django(project, database, migrate=False)
+    from django.conf import settings
+
+    settings.DEBUG = False
+    application = import_module(WSGI_MODULES[project]).application
+    reads, writes = queue.Queue(), queue.Queue()
+    for request in plan:
+        (reads if request['method'] == 'GET' else writes).put(request)
+    read_results, write_results = [], []
+    started = time.perf_counter()
+    deadline = started + args.duration
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(application, reads, deadline, read_results),
+        )
+        for _ in range(args.readers)
+    ] + [
+        threading.Thread(
+            target=worker,
+            args=(application, writes, deadline, write_results),
+        )
+        for _ in range(args.writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+    return {
+        kind: {
+            'rps': len(results) / duration,
+            'errors': sum(1 for _, status, _ in results if status >= 500),
+            'latency': summarize([seconds for _, _, seconds in results]),
+        }
+        for kind, results in (
+            ('reads', read_results), ('writes', write_results),
+        )
+        if results
+    }
+
+
+def run(args, scenario, directory):
+    from django.core.management import call_command
+    from django.db import connections
+
+    project = scenario['project']
+    if not any(load_data(project).values()):
+        dataset = scenario['dataset']
+        call_command(
+            dataset['command'], stdout=io.StringIO(), **dataset['options']
+        )
+    plan = build_plan(scenario, args.requests, args.seed, args.users)
+    connections.close_all()
+    context = multiprocessing.get_context('spawn')
+    report = {
+        'scenario': str(args.scenario),
+        'readers': args.readers,
+        'writers': args.writers,
+        'duration_s': args.duration,
+    }
+    for mode in MODES:
+        database = Path(directory) / f'{mode}.sqlite3'
+        shutil.copyfile(args.database, database)
+        with context.Pool(1) as pool:
+            report[mode] = pool.apply(
+                run_mode, (mode, project, database, plan, args)
+            )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('scenario', type=Path)
+    parser.add_argument(
+        '--requests', type=int, default=20000,
+        help='Размер плана: запросов должно хватить на всё время прогона.',
+    )
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database', type=Path)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    scenario = json.loads(args.scenario.read_text(encoding='utf-8'))
+    with tempfile.TemporaryDirectory() as directory:
+        if args.database is None:
+            args.database = Path(directory) / 'contention.sqlite3'
+        setup_django(scenario['project'], args.database)
+        write_report(run(args, scenario, directory), args.output)
+
+
+if __name__ == '__main__':
+    main()
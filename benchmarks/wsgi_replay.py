@@ -0,0 +1,336 @@
+"""
+Нагрузочный прогон WSGI-приложения проекта внутри процесса.
+
+    python -m benchmarks.wsgi_replay benchmarks/scenarios/news.json
+    python -m benchmarks.wsgi_replay benchmarks/scenarios/notes.json \\
+        --processes 4 --database /tmp/notes.db
+
+Сценарий — JSON-файл: проект, число запросов, команда для наполнения
+пустой базы и смесь запросов с весами. В путях и данных формы
+подставляются {news} — id случайной новости, {note} — slug случайной
+заметки пользователя запроса, {uid} — уникальный номер запроса.
+Запросы с "user": true выполняются от имени случайного пользователя
+из пула авторизованных.
+
+Запросы передаются прямо в application(environ, start_response), без
+HTTP-сервера, поэтому в замер попадает только работа Django. С
+--processes N план делится между N процессами, каждый со своим
+подключением к базе. Отчёт содержит запросы в секунду и перцентили
+задержки по имени URL.
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from importlib import import_module
+from pathlib import Path
+from urllib.parse import urlencode
+
+from benchmarks.common import percentile, setup_django, write_report
+
+WSGI_MODULES = {
+    'ya_news': 'yanews.wsgi',
+    'ya_note': 'yanote.wsgi',
+}
+
+
+class Placeholders(dict):
+    """Значения подстановок, вычисляемые при первом обращении."""
+
+    def __init__(self, rng, data, user_id, uid):
+        super().__init__(uid=uid)
+        self.rng = rng
+        self.data = data
+        self.user_id = user_id
+
+    def __missing__(self, key):
+        if key == 'news':
+            value = self.rng.choice(self.data['news'])
+        elif key == 'note':
+            value = self.rng.choice(self.data['notes'][self.user_id])
+        else:
+            raise KeyError(key)
+        self[key] = value
+        return value
+
+
+def load_data(project):
+    """Id объектов, на которые ссылаются подстановки сценария."""
+    if project == 'ya_news':
+        from news.models import News
+
+        return {'news': list(News.objects.values_list('pk', flat=True))}
+    from notes.models import Note
+
+    notes = defaultdict(list)
+    for author_id, slug in Note.objects.values_list('author_id', 'slug'):
+        notes[author_id].append(slug)
+    return {'notes': dict(notes)}
+
+
+def candidate_users(project, data):
+    from django.contrib.auth import get_user_model
+
+    if project == 'ya_note':
+        return sorted(data['notes'])
+    return list(get_user_model().objects.values_list('pk', flat=True))
+
+
+def login_cookies(user_ids):
+    """Cookie сессии и CSRF для каждого пользователя пула."""
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.middleware.csrf import _get_new_csrf_token
+    from django.test import Client
+
+    cookies = {}
+    for user in get_user_model().objects.filter(pk__in=user_ids):
+        client = Client()
+        client.force_login(user)
+        session = client.cookies[settings.SESSION_COOKIE_NAME].value
+        token = _get_new_csrf_token()
+        cookies[user.pk] = (
+            f'{settings.SESSION_COOKIE_NAME}={session}; '
+            f'{settings.CSRF_COOKIE_NAME}={token}',
+            token,
+        )
+    return cookies
+
+
+def url_name(path):
+    from django.urls import resolve
+
+    return resolve(path).view_name
+
+
+def build_plan(scenario, total, seed, pool_size):
+    """
+    Список запросов прогона, одинаковый при одинаковом seed.
+
+    Всё, что зависит от базы, вычисляется здесь, до замера.
+    """
+    project = scenario['project']
+    rng = random.Random(seed)
+    data = load_data(project)
+    users = candidate_users(project, data)
+    pool = rng.sample(users, min(pool_size, len(users)))
+    cookies = login_cookies(pool)
+    mix = scenario['mix']
+    weights = [entry.get('weight', 1) for entry in mix]
+    plan = []
+    for uid, entry in enumerate(rng.choices(mix, weights, k=total)):
+        user_id, cookie, token = None, '', None
+        if entry.get('user'):
+            user_id = rng.choice(pool)
+            cookie, token = cookies[user_id]
+        values = Placeholders(rng, data, user_id, uid)
+        path = entry['path'].format_map(values)
+        form = {
+            key: value.format_map(values)
+            for key, value in entry.get('data', {}).items()
+        }
+        if token is not None and form:
+            form['csrfmiddlewaretoken'] = token
+        plan.append({
+            'name': entry.get('name') or url_name(path),
+            'method': entry.get('method', 'GET'),
+            'path': path,
+            'body': urlencode(form).encode(),
+            'cookie': cookie,
+        })
+    return plan
+
+
+def make_environ(request, multiprocess):
+    return {
+        'REQUEST_METHOD': request['method'],
+        'PATH_INFO': request['path'],
+        'QUERY_STRING': '',
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_HOST': 'localhost',
+        'HTTP_COOKIE': request['cookie'],
+        'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+        'CONTENT_LENGTH': str(len(request['body'])),
+        'wsgi.input': io.BytesIO(request['body']),
+        'wsgi.errors': sys.stderr,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': multiprocess,
+        'wsgi.run_once': False,
+    }
+
+
+def replay(application, plan, multiprocess=False):
+    """Выполняем запросы плана, результат — (имя, статус, секунды)."""
+    results = []
+    for request in plan:
+        status = []
+
+        def start_response(line, headers, exc_info=None):
+            status.append(int(line.split()[0]))
+
+        started = time.perf_counter()
+        response = application(
+            make_environ(request, multiprocess), start_response
+        )
+        try:
+            for _ in response:
+                pass
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+        results.append(
+            (request['name'], status[0], time.perf_counter() - started)
+        )
+    return results
+
+
+def warmup_plan(plan, count):
+    """Прогрев только GET-запросами: POST из плана нельзя повторять."""
+    return [request for request in plan if request['method'] == 'GET'][
+        :count
+    ]
+
+
+def get_application(project, debug):
+    from django.conf import settings
+
+    # В режиме DEBUG Django запоминает каждый SQL-запрос.
+    settings.DEBUG = debug
+    return import_module(WSGI_MODULES[project]).application
+
+
+def worker(project, database, debug, warmup, plan):
+    """
+    Прогон части плана в отдельном процессе.
+
+    Время возвращается по настенным часам, чтобы длительность
+    считалась без запуска процессов и прогрева.
+    """
+    setup_django(project, database, migrate=False)
+    application = get_application(project, debug)
+    replay(application, warmup_plan(plan, warmup), multiprocess=True)
+    started = time.time()
+    results = replay(application, plan, multiprocess=True)
+    return results, started, time.time()
+
+
+def run_processes(args, project, plan):
+    """Делим план между процессами и ждём, пока все закончат."""
+    from django.db import connections
+
+    connections.close_all()
+    parts = [plan[index::args.processes] for index in range(args.processes)]
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(args.processes) as pool:
+        chunks = pool.starmap(worker, [
+            (project, args.database, args.debug, args.warmup, part)
+            for part in parts
+        ])
+    duration = (
+        max(finished for _, _, finished in chunks)
+        - min(started for _, started, _ in chunks)
+    )
+    return [result for chunk, _, _ in chunks for result in chunk], duration
+
+
+def build_report(results, duration):
+    by_name = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    for name, status, seconds in results:
+        by_name[name].append(seconds)
+        statuses[name][str(status)] += 1
+    urls = {}
+    for name, timings in sorted(by_name.items()):
+        urls[name] = {
+            'count': len(timings),
+            'rps': len(timings) / duration,
+            'p50_ms': percentile(timings, 50) * 1000,
+            'p95_ms': percentile(timings, 95) * 1000,
+            'p99_ms': percentile(timings, 99) * 1000,
+            'statuses': dict(statuses[name]),
+        }
+    return {
+        'requests': len(results),
+        'duration_s': duration,
+        'rps': len(results) / duration,
+        'errors': sum(1 for _, status, _ in results if status >= 400),
+        'urls': urls,
+    }
+
+
+def run(args, scenario):
+    from django.core.management import call_command
+
+    project = scenario['project']
+    data = load_data(project)
+    if not any(data.values()):
+        dataset = scenario['dataset']
+        call_command(
+            dataset['command'], stdout=io.StringIO(), **dataset['options']
+        )
+    plan = build_plan(
+        scenario, args.requests or scenario['requests'], args.seed,
+        args.users,
+    )
+    if args.processes > 1:
+        results, duration = run_processes(args, project, plan)
+    else:
+        application = get_application(project, args.debug)
+        replay(application, warmup_plan(plan, args.warmup))
+        started = time.perf_counter()
+        results = replay(application, plan)
+        duration = time.perf_counter() - started
+    return {
+        'scenario': str(args.scenario),
+        'project': project,
+        'processes': args.processes,
+        'seed': args.seed,
+        **build_report(results, duration),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('scenario', type=Path)
+    parser.add_argument(
+        '--requests', type=int,
+        help='Число запросов, по умолчанию из сценария.',
+    )
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument(
+        '--users', type=int, default=20,
+        help='Размер пула авторизованных пользователей.',
+    )
+    parser.add_argument(
+        '--warmup', type=int, default=50,
+        help='Сколько запросов каждый процесс выполняет до замера.',
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database', type=Path)
+    parser.add_argument('--debug', action='store_true')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    scenario = json.loads(args.scenario.read_text(encoding='utf-8'))
+    with tempfile.TemporaryDirectory() as directory:
+        if args.database is None:
+            args.database = Path(directory) / 'replay.sqlite3'
+        setup_django(scenario['project'], args.database)
+        write_report(run(args, scenario), args.output)
+
+
+if __name__ == '__main__':
+    main()
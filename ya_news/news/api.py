@@ -0,0 +1,77 @@
+"""
+Представление новостей и комментариев в JSON для API и выгрузки.
+
+Списки API листаются курсором, как архив и комментарии на сайте:
+страница стоит одинаково, сколько бы страниц ни было перед ней.
+Выгрузка отдаёт все записи в формате NDJSON (объект JSON на строку)
+потоком: строки читаются из базы через iterator() порциями по
+EXPORT_CHUNK_SIZE и сразу уходят клиенту, целиком выгрузка в памяти
+не собирается. Генератор работает уже после возврата ответа из
+middleware; маршрутизацию чтения и учёт запросов middleware
+восстанавливают на время получения каждой порции.
+"""
+from django.core.serializers.json import DjangoJSONEncoder
+from django.urls import reverse
+
+from .models import Comment, News
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Поля новости в списке: полный текст отдаётся только в самой новости.
+NEWS_LIST_FIELDS = ('id', 'title', 'date', 'excerpt', 'comment_count')
+NEWS_FIELDS = (*NEWS_LIST_FIELDS, 'text', 'modified')
+COMMENT_FIELDS = ('id', 'news_id', 'author__username', 'text', 'created')
+EXPORTS = {
+    'news': (News, NEWS_FIELDS),
+    'comments': (Comment, COMMENT_FIELDS),
+}
+
+
+def news_to_dict(news, fields=NEWS_LIST_FIELDS):
+    data = {field: getattr(news, field) for field in fields}
+    data['url'] = reverse('news:api_detail', args=(news.pk,))
+    return data
+
+
+def comment_to_dict(comment):
+    return {
+        'id': comment.pk,
+        'news_id': comment.news_id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created,
+    }
+
+
+def page_to_dict(page, results, path):
+    return {
+        'results': results,
+        'next': page.next_cursor and f'{path}?after={page.next_cursor}',
+    }
+
+
+def _export_key(field):
+    return 'author' if field == 'author__username' else field
+
+
+def export_lines(name):
+    """
+    Строки NDJSON со всеми записями выгрузки name.
+
+    Строки одной порции склеиваются, чтобы не писать клиенту
+    по строке за раз.
+    """
+    model, fields = EXPORTS[name]
+    keys = [_export_key(field) for field in fields]
+    rows = model.objects.order_by('pk').values_list(*fields).iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    )
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    lines = []
+    for row in rows:
+        lines.append(encoder.encode(dict(zip(keys, row))))
+        if len(lines) == EXPORT_CHUNK_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
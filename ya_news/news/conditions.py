@@ -0,0 +1,99 @@
+"""
+Условные GET-запросы (ETag / Last-Modified) для страниц новостей.
+
+Версия страницы строится по полю News.modified, которое меняется при
+сохранении новости и при создании, изменении или удалении комментария.
+Для авторизованного пользователя страница содержит его имя, форму и
+ссылки на свои комментарии, поэтому в ETag добавляется пользователь и
+его CSRF-cookie, Last-Modified не отдаётся, а ответ помечается private.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .models import News
+
+
+def _user_key(request):
+    user = request.user
+    if not user.is_authenticated:
+        return 'anonymous'
+    return f'{user.pk}:{request.META.get("CSRF_COOKIE", "")}'
+
+
+def _make_etag(request, *parts):
+    data = repr((_user_key(request), *parts)).encode()
+    return hashlib.sha1(data).hexdigest()
+
+
+def _home_versions(request):
+    """Версии новостей главной страницы, один запрос на HTTP-запрос."""
+    if not hasattr(request, '_home_versions'):
+        request._home_versions = list(
+            News.objects.values_list('pk', 'modified')[
+                :settings.NEWS_COUNT_ON_HOME_PAGE
+            ]
+        )
+    return request._home_versions
+
+
+def _detail_version(request, pk):
+    if not hasattr(request, '_detail_version'):
+        request._detail_version = News.objects.filter(
+            pk=pk
+        ).values_list('modified', flat=True).first()
+    return request._detail_version
+
+
+def home_etag(request, *args, **kwargs):
+    return _make_etag(request, 'home', _home_versions(request))
+
+
+def home_last_modified(request, *args, **kwargs):
+    if request.user.is_authenticated:
+        return None
+    return max(
+        (modified for _, modified in _home_versions(request)),
+        default=None,
+    )
+
+
+def detail_etag(request, pk, *args, **kwargs):
+    modified = _detail_version(request, pk)
+    if modified is None:
+        return None
+    return _make_etag(request, 'detail', pk, modified)
+
+
+def detail_last_modified(request, pk, *args, **kwargs):
+    if request.user.is_authenticated:
+        return None
+    return _detail_version(request, pk)
+
+
+def conditional_page(etag_func, last_modified_func):
+    """
+    Отвечаем 304, если страница не изменилась с прошлого запроса.
+
+    Заголовки Cache-Control и Vary заставляют обратный прокси
+    перепроверять страницу и не отдавать чужую персональную версию.
+    """
+    def decorator(view_func):
+        conditional_view = condition(
+            etag_func=etag_func, last_modified_func=last_modified_func
+        )(view_func)
+
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            patch_vary_headers(response, ('Cookie',))
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(response, public=True, no_cache=True)
+            return response
+        return inner
+    return decorator
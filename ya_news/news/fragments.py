@@ -0,0 +1,41 @@
+"""
+Кеш отрисованных фрагментов новостей и комментариев.
+
+Ключ фрагмента включает версию объекта: News.modified для анонса на
+главной и Comment.updated для комментария. После сохранения объекта
+шаблон сам обращается к новому ключу, а ключ удалённого объекта
+удаляется из кеша сигналом.
+"""
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+
+TEASER_FRAGMENT = 'news_teaser'
+COMMENT_FRAGMENT = 'comment'
+
+
+def fragment_cache():
+    """Тот же кеш, который выбирает тег {% cache %}."""
+    try:
+        return caches['template_fragments']
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def teaser_key(news):
+    return make_template_fragment_key(
+        TEASER_FRAGMENT, [news.pk, news.modified]
+    )
+
+
+def comment_key(comment):
+    return make_template_fragment_key(
+        COMMENT_FRAGMENT, [comment.pk, comment.updated]
+    )
+
+
+def forget_teaser(news):
+    fragment_cache().delete(teaser_key(news))
+
+
+def forget_comment(comment):
+    fragment_cache().delete(comment_key(comment))
@@ -0,0 +1,123 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import Comment
+from .signals import comments_bulk_created
+
+DEFAULTS = {
+    'ENABLED': False,
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 0.05,
+    'TIMEOUT': 10,
+}
+
+
+def get_ingestion_settings():
+    return {**DEFAULTS, **getattr(settings, 'NEWS_COMMENT_INGESTION', {})}
+
+
+class CommentWriter:
+    """
+    Единственный поток, записывающий комментарии пачками.
+
+    Запросы кладут комментарии в очередь и ждут Future. Поток собирает
+    до batch_size комментариев (или сколько придёт за flush_interval
+    секунд) и сохраняет их одним bulk_create в одной транзакции, так что
+    SQLite не получает конкурирующих писателей.
+    """
+
+    def __init__(self, batch_size, flush_interval):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, comment):
+        """Ставим комментарий в очередь, Future завершится после COMMIT."""
+        future = Future()
+        self.queue.put((comment, future))
+        self._ensure_started()
+        return future
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='comment-writer', daemon=True
+                )
+                self._thread.start()
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                close_old_connections()
+                self.flush(batch)
+            except Exception as error:
+                # Поток должен пережить любую ошибку: иначе следующие
+                # запросы ждали бы свои Future до таймаута.
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+
+    def _insert(self, comments):
+        with transaction.atomic():
+            Comment.objects.bulk_create(comments)
+            comments_bulk_created.send(sender=Comment, comments=comments)
+
+    def flush(self, batch):
+        """
+        Сохраняем пачку комментариев.
+
+        Если пачка не записалась целиком (например, новость успели
+        удалить или упал получатель сигнала), сохраняем комментарии по
+        одному, чтобы ошибка досталась только своему запросу.
+        """
+        try:
+            self._insert([comment for comment, _ in batch])
+        except Exception:
+            for comment, future in batch:
+                try:
+                    self._insert([comment])
+                except Exception as error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(comment)
+        else:
+            for comment, future in batch:
+                future.set_result(comment)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_comment_writer():
+    """Писатель комментариев этого процесса."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            options = get_ingestion_settings()
+            _writer = CommentWriter(
+                options['BATCH_SIZE'], options['FLUSH_INTERVAL']
+            )
+        return _writer
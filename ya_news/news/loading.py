@@ -0,0 +1,232 @@
+"""Потоковое чтение фикстур и массовая вставка новостей и комментариев."""
+import json
+import re
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections, router, transaction
+
+from .models import Comment, News, make_excerpt
+from .signals import comments_bulk_created, news_bulk_created
+
+WHITESPACE = re.compile(r'\s*')
+# Строка целиком, скобка или начало строки без закрывающей кавычки.
+STRUCTURE = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{}]|"', re.DOTALL)
+# Число или литерал, за которым уже есть разделитель.
+SCALAR = re.compile(r'[^\s,\]}]*[\s,\]}]')
+
+MODELS = {
+    'news.news': News,
+    'news.comment': Comment,
+}
+BULK_SIGNALS = {
+    News: (news_bulk_created, 'news'),
+    Comment: (comments_bulk_created, 'comments'),
+}
+# Производные поля пересчитываются при загрузке, а не берутся из файла.
+DERIVED_FIELDS = {
+    News: {'comment_count', 'excerpt'},
+}
+
+
+class FixtureError(ValueError):
+    """Файл не соответствует формату фикстур."""
+
+
+class JsonArrayReader:
+    """
+    Читаем JSON-массив объектов по одному объекту.
+
+    В памяти держится только непрочитанный остаток очередного куска
+    файла, поэтому размер файла на расход памяти не влияет.
+    """
+
+    def __init__(self, file, chunk_size=1 << 16):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer, self.position, self.eof = '', 0, False
+
+    def _read_more(self, error_message):
+        if self.eof:
+            raise FixtureError(error_message)
+        chunk = self.file.read(self.chunk_size)
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position, self.eof = 0, not chunk
+
+    def _next_char(self):
+        """Следующий значащий символ, позиция остаётся на нём."""
+        while True:
+            self.position = WHITESPACE.match(
+                self.buffer, self.position
+            ).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            self._read_more('Файл оборвался до конца массива.')
+
+    def _is_complete(self):
+        """
+        Есть ли в буфере значение целиком, с закрывающей скобкой.
+
+        Если есть, а разобрать его не удалось, значит, ошибка в самом
+        файле и дочитывать его бессмысленно.
+        """
+        if self.buffer[self.position] not in '{["':
+            return SCALAR.match(self.buffer, self.position) is not None
+        depth = 0
+        for match in STRUCTURE.finditer(self.buffer, self.position):
+            token = match.group()
+            if token == '"':
+                return False
+            if token in '{[':
+                depth += 1
+            elif token in '}]':
+                depth -= 1
+            if depth <= 0:
+                return True
+        return False
+
+    def _decode(self):
+        while True:
+            try:
+                record, self.position = self.decoder.raw_decode(
+                    self.buffer, self.position
+                )
+                return record
+            except json.JSONDecodeError as error:
+                message = f'Неверный JSON: {error}.'
+                if self._is_complete():
+                    raise FixtureError(message)
+                self._read_more(message)
+
+    def __iter__(self):
+        if self._next_char() != '[':
+            raise FixtureError('Ожидался JSON-массив объектов.')
+        self.position += 1
+        if self._next_char() == ']':
+            return
+        while True:
+            self._next_char()
+            yield self._decode()
+            char = self._next_char()
+            self.position += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise FixtureError(f'Ожидалась запятая, получено {char!r}.')
+
+
+def iter_json_array(file, chunk_size=1 << 16):
+    return iter(JsonArrayReader(file, chunk_size))
+
+
+def iter_json_lines(file):
+    """Читаем JSON Lines: по объекту фикстуры в строке."""
+    for number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as error:
+            raise FixtureError(f'Строка {number}: {error}.')
+
+
+def build_object(record):
+    """Создаём несохранённый объект модели из записи фикстуры."""
+    try:
+        model = MODELS[record['model'].lower()]
+        fields = record['fields']
+    except (KeyError, TypeError, AttributeError):
+        raise FixtureError(f'Неизвестная запись: {record!r}.')
+    instance = model(pk=record.get('pk'))
+    derived = DERIVED_FIELDS.get(model, ())
+    for name, value in fields.items():
+        if name in derived:
+            continue
+        try:
+            field = model._meta.get_field(name)
+            if not field.is_relation:
+                value = field.to_python(value)
+        except (FieldDoesNotExist, ValidationError) as error:
+            raise FixtureError(f'Поле {name} в записи {record!r}: {error}')
+        setattr(instance, field.attname, value)
+    return instance
+
+
+def _fill_auto_fields(model, objects):
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False) or getattr(
+            field, 'auto_now_add', False
+        ):
+            for instance in objects:
+                if getattr(instance, field.attname) is None:
+                    field.pre_save(instance, add=True)
+
+
+def bulk_insert(model, objects):
+    """
+    Вставляем объекты пачками и сообщаем о них сигналом.
+
+    bulk_create всегда перезаписывает поля auto_now_add, и при импорте
+    потерялось бы исходное время комментариев. Поэтому вставка идёт
+    в режиме raw, а пустые auto_now-поля и анонсы новостей, которые
+    обычно заполняет обработчик pre_save, заполняются здесь.
+    Вызывать внутри транзакции.
+    """
+    if not objects:
+        return
+    using = router.db_for_write(model)
+    _fill_auto_fields(model, objects)
+    if model is News:
+        for news in objects:
+            news.excerpt = make_excerpt(news.text)
+    fields = model._meta.concrete_fields
+    with_pk = [instance for instance in objects if instance.pk is not None]
+    without_pk = [instance for instance in objects if instance.pk is None]
+    queryset = model._base_manager.using(using)
+    ops = connections[using].ops
+    for group, group_fields in (
+        (with_pk, fields),
+        (without_pk, [field for field in fields if not field.primary_key]),
+    ):
+        batch_size = max(ops.bulk_batch_size(group_fields, group), 1)
+        for start in range(0, len(group), batch_size):
+            queryset._insert(
+                group[start:start + batch_size],
+                fields=group_fields,
+                raw=True,
+                using=using,
+            )
+    signal, argument = BULK_SIGNALS[model]
+    signal.send(sender=model, **{argument: objects})
+
+
+def load_records(records, batch_size, progress=None):
+    """
+    Загружаем записи пачками, каждая пачка — отдельная транзакция.
+
+    Новости пачки вставляются раньше комментариев, поэтому комментарий
+    может ссылаться на новость из той же или из предыдущей пачки.
+    """
+    totals = {News: 0, Comment: 0}
+    batch = {News: [], Comment: []}
+
+    def flush():
+        with transaction.atomic():
+            for model, objects in batch.items():
+                bulk_insert(model, objects)
+                totals[model] += len(objects)
+                objects.clear()
+        if progress is not None:
+            progress(totals[News], totals[Comment])
+
+    pending = 0
+    for record in records:
+        instance = build_object(record)
+        batch[type(instance)].append(instance)
+        pending += 1
+        if pending >= batch_size:
+            flush()
+            pending = 0
+    if pending:
+        flush()
+    return totals[News], totals[Comment]
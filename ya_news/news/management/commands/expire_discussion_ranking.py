@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from news.ranking import expire_buckets
+
+
+class Command(BaseCommand):
+    help = (
+        'Вычитает из рейтинга обсуждаемых часы, выпавшие из окон. '
+        'Запускайте по расписанию, например раз в минуту.'
+    )
+
+    def handle(self, *args, **options):
+        expire_buckets()
+        self.stdout.write(self.style.SUCCESS('Рейтинг обновлён'))
@@ -0,0 +1,108 @@
+from datetime import date, datetime, time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from news.loading import bulk_insert
+from news.models import Comment, News
+from yacommon.generators import GenerateDataCommand, next_pk, zipf_cum_weights
+
+WORDS = (
+    'новость', 'город', 'погода', 'спорт', 'матч', 'команда', 'студенты',
+    'робот', 'приложение', 'разработка', 'выставка', 'театр', 'премьера',
+    'фестиваль', 'музыка', 'кино', 'наука', 'космос', 'ракета', 'запуск',
+    'рынок', 'экономика', 'курс', 'выборы', 'редакция', 'интервью',
+    'вчера', 'сегодня', 'завтра', 'очень', 'новый', 'главный', 'важный',
+)
+
+
+class Command(GenerateDataCommand):
+    help = (
+        'Создаёт воспроизводимый набор данных: пользователей, новости и '
+        'комментарии с распределением Ципфа по новостям.'
+    )
+    vocabulary = WORDS
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--news', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель распределения комментариев по новостям.',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней до --end-date распределяются даты.',
+        )
+        parser.add_argument(
+            '--end-date', type=date.fromisoformat, default=None,
+            help='Последний день данных, по умолчанию сегодня. '
+                 'С одинаковыми --seed и --end-date данные совпадают.',
+        )
+
+    def generate(self, user_ids, **options):
+        self.today = options['end_date'] or timezone.now().date()
+        self.end = datetime.combine(
+            self.today + timedelta(1), time(), timezone.utc
+        )
+        self.days = options['days']
+        news_dates = self.create_news(options['news'])
+        self.create_comments(
+            options['comments'], options['zipf'], user_ids, news_dates
+        )
+
+    def create_news(self, total):
+        """Создаём новости и возвращаем их даты по первичному ключу."""
+        first = next_pk(News)
+        dates = {}
+        for start, size in self.batches(total):
+            news = []
+            for pk in range(first + start, first + start + size):
+                day = self.today - timedelta(self.rng.randrange(self.days))
+                dates[pk] = day
+                news.append(News(
+                    pk=pk,
+                    title=self.words(4).capitalize()[:50],
+                    text=self.words(self.rng.randint(20, 120)),
+                    date=day,
+                ))
+            with transaction.atomic():
+                bulk_insert(News, news)
+            self.stdout.write(f'Новостей: {start + size} из {total}')
+        return dates
+
+    def create_comments(self, total, exponent, user_ids, news_dates):
+        """
+        Комментарии по новостям распределены по закону Ципфа.
+
+        Ранги популярности раздаются новостям в случайном порядке,
+        чтобы популярные новости не оказались подряд по id.
+        """
+        if not total or not news_dates or not user_ids:
+            return
+        news_ids = list(news_dates)
+        self.rng.shuffle(news_ids)
+        weights = zipf_cum_weights(len(news_ids), exponent)
+        for start, size in self.batches(total):
+            comments = []
+            for news_id in self.rng.choices(
+                news_ids, cum_weights=weights, k=size
+            ):
+                published = datetime.combine(
+                    news_dates[news_id], time(), timezone.utc
+                )
+                span = (self.end - published).total_seconds()
+                created = published + timedelta(
+                    seconds=self.rng.uniform(0, span)
+                )
+                comments.append(Comment(
+                    news_id=news_id,
+                    author_id=self.rng.choice(user_ids),
+                    text=self.words(self.rng.randint(3, 40)),
+                    created=created,
+                    updated=created,
+                ))
+            with transaction.atomic():
+                bulk_insert(Comment, comments)
+            self.stdout.write(f'Комментариев: {start + size} из {total}')
@@ -0,0 +1,62 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from news.loading import (
+    FixtureError, iter_json_array, iter_json_lines, load_records
+)
+
+LINE_FORMATS = ('.jsonl', '.ndjson')
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает новости и комментарии из фикстуры '
+        '(JSON-массив, как у loaddata) или из JSON Lines.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу или «-» для stdin.')
+        parser.add_argument(
+            '--format',
+            choices=('auto', 'json', 'jsonl'),
+            default='auto',
+            help='Формат файла, по умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Количество объектов в одной транзакции.',
+        )
+
+    def handle(self, *args, path, format, batch_size, **options):
+        if format == 'auto':
+            format = 'jsonl' if path.endswith(LINE_FORMATS) else 'json'
+        file = sys.stdin if path == '-' else open(path, encoding='utf-8')
+        try:
+            records = (
+                iter_json_lines(file) if format == 'jsonl'
+                else iter_json_array(file)
+            )
+            news, comments = load_records(
+                records, batch_size, progress=self.report_progress
+            )
+        except FixtureError as error:
+            raise CommandError(str(error))
+        except IntegrityError as error:
+            # Например, pk из файла уже занят: пачка откачена целиком,
+            # предыдущие пачки остаются в базе.
+            raise CommandError(f'Пачка не загружена: {error}.')
+        finally:
+            if file is not sys.stdin:
+                file.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено новостей: {news}, комментариев: {comments}'
+        ))
+
+    def report_progress(self, news, comments):
+        self.stdout.write(
+            f'Загружено новостей: {news}, комментариев: {comments}'
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from news.models import NewsDiscussion
+from news.ranking import rebuild_ranking
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит рейтинг обсуждаемых новостей заново по таблице '
+        'комментариев.'
+    )
+
+    def handle(self, *args, **options):
+        rebuild_ranking()
+        self.stdout.write(self.style.SUCCESS(
+            f'Новостей в рейтинге: {NewsDiscussion.objects.count()}'
+        ))
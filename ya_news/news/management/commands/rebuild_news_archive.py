@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from news.models import News, NewsMonth
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает количество новостей по месяцам для архива.'
+
+    def handle(self, *args, **options):
+        months = News.objects.order_by().annotate(
+            year=ExtractYear('date'), month=ExtractMonth('date')
+        ).values('year', 'month').annotate(count=Count('pk'))
+        with transaction.atomic():
+            NewsMonth.objects.all().delete()
+            created = NewsMonth.objects.bulk_create(
+                NewsMonth(**month) for month in months
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано месяцев: {len(created)}')
+        )
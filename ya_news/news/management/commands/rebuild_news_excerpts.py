@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from news.models import News, make_excerpt
+from news.pagecache import invalidate_news
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает анонсы всех новостей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last, updated = 0, 0
+        while True:
+            rows = list(
+                News.objects.filter(pk__gt=last).order_by('pk')
+                .values_list('pk', 'text', 'excerpt')[:batch_size]
+            )
+            if not rows:
+                break
+            last = rows[-1][0]
+            updated += self.update_batch(rows)
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано новостей: {updated}')
+        )
+
+    def update_batch(self, rows):
+        """
+        Сохраняем изменившиеся анонсы пачки в отдельной транзакции.
+
+        bulk_update не вызывает сигналов, поэтому modified (ключ кеша
+        анонсов) выставляется здесь, а главная страница сбрасывается
+        из кеша страниц после COMMIT.
+        """
+        now = timezone.now()
+        changed = []
+        for pk, text, old in rows:
+            excerpt = make_excerpt(text)
+            if excerpt != old:
+                changed.append(News(pk=pk, excerpt=excerpt, modified=now))
+        if changed:
+            with transaction.atomic():
+                News.objects.bulk_update(changed, ['excerpt', 'modified'])
+                invalidate_news([], home_changed=True)
+        return len(changed)
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:03
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def count_months(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    NewsMonth = apps.get_model('news', 'NewsMonth')
+    months = News.objects.order_by().annotate(
+        year=ExtractYear('date'), month=ExtractMonth('date')
+    ).values('year', 'month').annotate(count=Count('pk'))
+    NewsMonth.objects.bulk_create(NewsMonth(**month) for month in months)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_news_comment_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Год')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Месяц')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество новостей')),
+            ],
+            options={
+                'verbose_name': 'Месяц архива',
+                'verbose_name_plural': 'Месяцы архива',
+                'ordering': ('-year', '-month'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='newsmonth',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='unique_news_month'),
+        ),
+        migrations.RunPython(count_months, migrations.RunPython.noop),
+    ]
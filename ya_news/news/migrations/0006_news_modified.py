@@ -0,0 +1,18 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_badword'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Обновляется и при изменении комментариев к новости', verbose_name='Изменено'),
+            preserve_default=False,
+        ),
+    ]
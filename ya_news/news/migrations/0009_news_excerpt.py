@@ -0,0 +1,74 @@
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 500
+# Анонс и триггеры заморожены на момент миграции: news.models и
+# news.search могут меняться дальше.
+EXCERPT_WORDS = 15
+SEARCH_TRIGGERS_SQL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS news_news_fts_insert
+    AFTER INSERT ON news_news BEGIN
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_news_fts_delete
+    AFTER DELETE ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_news_fts_update
+    AFTER UPDATE OF title, text ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+)
+
+
+def fill_excerpts(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    batch = []
+    for pk, text in News.objects.values_list('pk', 'text').iterator():
+        excerpt = Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+        batch.append(News(pk=pk, excerpt=excerpt))
+        if len(batch) == BATCH_SIZE:
+            News.objects.bulk_update(batch, ['excerpt'])
+            batch = []
+    News.objects.bulk_update(batch, ['excerpt'])
+
+
+def restore_search_triggers(apps, schema_editor):
+    # SQLite пересоздаёт news_news при добавлении и удалении поля, а
+    # триггеры индекса поиска удаляются вместе со старой таблицей.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SEARCH_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_comment_updated'),
+    ]
+
+    operations = [
+        # При откате выполняется последней, уже после удаления поля.
+        migrations.RunPython(
+            migrations.RunPython.noop, restore_search_triggers
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, help_text='Первые слова текста, пересчитываются при сохранении', verbose_name='Анонс'),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
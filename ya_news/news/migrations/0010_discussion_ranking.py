@@ -0,0 +1,108 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:27
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+import django.db.models.deletion
+
+# Построение рейтинга заморожено на момент миграции: news.ranking может
+# меняться дальше. Окна — сутки и неделя, от короткого к длинному.
+WINDOWS = (('day', timedelta(days=1)), ('week', timedelta(days=7)))
+BATCH_SIZE = 500
+
+
+def build_ranking(apps, schema_editor):
+    Comment = apps.get_model('news', 'Comment')
+    Bucket = apps.get_model('news', 'NewsCommentBucket')
+    Discussion = apps.get_model('news', 'NewsDiscussion')
+    hour = timezone.now().astimezone(timezone.utc).replace(
+        minute=0, second=0, microsecond=0
+    )
+    limits = [hour - length + timedelta(hours=1) for _, length in WINDOWS]
+    rows = Comment.objects.filter(created__gte=limits[-1]).annotate(
+        bucket=TruncHour('created', tzinfo=timezone.utc)
+    ).order_by().values('news_id', 'bucket').annotate(total=Count('pk'))
+    Bucket.objects.bulk_create(
+        (
+            Bucket(
+                news_id=row['news_id'],
+                hour=row['bucket'],
+                count=row['total'],
+                expired=sum(row['bucket'] < cutoff for cutoff in limits),
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    for index, (window, _) in enumerate(WINDOWS):
+        Discussion.objects.bulk_create(
+            (
+                Discussion(
+                    news_id=row['news_id'], window=window,
+                    count=row['total'],
+                )
+                for row in Bucket.objects.filter(
+                    expired__lte=index
+                ).order_by().values('news_id').annotate(
+                    total=Sum('count')
+                ).iterator()
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0009_news_excerpt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsDiscussion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(choices=[('day', 'За сутки'), ('week', 'За неделю')], max_length=10, verbose_name='Окно')),
+                ('count', models.IntegerField(default=0, verbose_name='Комментариев')),
+                ('news', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='news.news')),
+            ],
+            options={
+                'verbose_name': 'Обсуждаемость новости',
+                'verbose_name_plural': 'Рейтинг обсуждаемых',
+            },
+        ),
+        migrations.CreateModel(
+            name='NewsCommentBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Час')),
+                ('count', models.IntegerField(default=0, verbose_name='Комментариев')),
+                ('expired', models.PositiveSmallIntegerField(default=0, verbose_name='Выпал из окон')),
+                ('news', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='news.news')),
+            ],
+            options={
+                'verbose_name': 'Комментарии за час',
+                'verbose_name_plural': 'Комментарии по часам',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='newsdiscussion',
+            index=models.Index(fields=['window', '-count', 'news'], name='discussion_window_count_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='newsdiscussion',
+            constraint=models.UniqueConstraint(fields=('news', 'window'), name='unique_news_discussion'),
+        ),
+        migrations.AddIndex(
+            model_name='newscommentbucket',
+            index=models.Index(fields=['expired', 'hour'], name='bucket_expired_hour_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='newscommentbucket',
+            constraint=models.UniqueConstraint(fields=('news', 'hour'), name='unique_news_comment_hour'),
+        ),
+        migrations.RunPython(build_ranking, migrations.RunPython.noop),
+    ]
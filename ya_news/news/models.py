@@ -1,22 +1,83 @@
 from datetime import datetime
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.utils.text import Truncator
+
+# Столько слов текста показывается в анонсе на главной.
+EXCERPT_WORDS = 15
+
+
+def make_excerpt(text):
+    """Анонс новости, как его строил фильтр truncatewords:15."""
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
+    modified = models.DateTimeField(
+        'Изменено',
+        auto_now=True,
+        help_text='Обновляется и при изменении комментариев к новости',
+    )
+    excerpt = models.TextField(
+        'Анонс',
+        blank=True,
+        editable=False,
+        help_text='Первые слова текста, пересчитываются при сохранении',
+    )
 
     class Meta:
         ordering = ('-date',)
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
+        indexes = [
+            models.Index(fields=('date', 'id'), name='news_date_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """
+        Сохраняем новость в одной транзакции со счётчиками архива.
+
+        Анонс пересчитывает обработчик pre_save, см. signals.py: он
+        вызывается и при загрузке фикстур, в обход save().
+        """
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class NewsMonth(models.Model):
+    """Количество новостей за месяц для навигации по архиву."""
+    year = models.PositiveSmallIntegerField('Год')
+    month = models.PositiveSmallIntegerField('Месяц')
+    count = models.IntegerField('Количество новостей', default=0)
+
+    class Meta:
+        ordering = ('-year', '-month')
+        verbose_name_plural = 'Месяцы архива'
+        verbose_name = 'Месяц архива'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('year', 'month'), name='unique_news_month'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.month:02}.{self.year}'
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -29,9 +90,95 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    # Версия комментария для кеша отрисованных фрагментов.
+    updated = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ('created',)
+        indexes = [
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:50]
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняем комментарий в одной транзакции с обновлением счётчиков.
+
+        Счётчик комментариев новости обновляется в обработчике post_save.
+        """
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class BadWord(models.Model):
+    """Запрещённое в комментариях слово."""
+    word = models.CharField('Слово', max_length=100, unique=True)
+
+    class Meta:
+        ordering = ('word',)
+        verbose_name_plural = 'Запрещённые слова'
+        verbose_name = 'Запрещённое слово'
+
+    def __str__(self):
+        return self.word
+
+
+class NewsCommentBucket(models.Model):
+    """
+    Число комментариев к новости за один час.
+
+    expired — из скольких окон рейтинга, начиная с самого короткого,
+    час уже выпал; его комментарии учтены только в остальных окнах.
+    """
+    news = models.ForeignKey(News, on_delete=models.CASCADE)
+    hour = models.DateTimeField('Час')
+    count = models.IntegerField('Комментариев', default=0)
+    expired = models.PositiveSmallIntegerField('Выпал из окон', default=0)
+
+    class Meta:
+        verbose_name_plural = 'Комментарии по часам'
+        verbose_name = 'Комментарии за час'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('news', 'hour'), name='unique_news_comment_hour'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('expired', 'hour'), name='bucket_expired_hour_idx'
+            ),
+        ]
+
+
+class NewsDiscussion(models.Model):
+    """Число комментариев к новости за окно рейтинга обсуждаемых."""
+    DAY = 'day'
+    WEEK = 'week'
+    WINDOWS = (
+        (DAY, 'За сутки'),
+        (WEEK, 'За неделю'),
+    )
+
+    news = models.ForeignKey(News, on_delete=models.CASCADE)
+    window = models.CharField('Окно', max_length=10, choices=WINDOWS)
+    count = models.IntegerField('Комментариев', default=0)
+
+    class Meta:
+        verbose_name_plural = 'Рейтинг обсуждаемых'
+        verbose_name = 'Обсуждаемость новости'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('news', 'window'), name='unique_news_discussion'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('window', '-count', 'news'),
+                name='discussion_window_count_idx',
+            ),
+        ]
@@ -0,0 +1,297 @@
+"""
+Кеш целых страниц новостей для анонимных читателей.
+
+Запись страницы хранит тело, сжатое gzip, заголовки ответа, id новостей
+на странице и поколение страницы. Поколение — счётчик в кеше, который
+сигналы увеличивают после COMMIT, когда меняется новость или комментарий
+этой страницы. Запись с устаревшим поколением не удаляется: пока один
+запрос под блокировкой перерисовывает страницу, остальные
+получают устаревшую копию. Если копии нет, они ждут новую запись не
+дольше WAIT секунд.
+
+Поколения сбрасывает тот процесс, который записал изменение, поэтому
+кеш CACHE должен быть общим для всех процессов сервера. На кеше в
+памяти процесса (LocMemCache) страницы не кешируются: другие процессы
+не узнали бы о сбросе и отдавали бы устаревшие страницы до TIMEOUT.
+"""
+import gzip
+import hashlib
+import os
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE': 'default',
+    'TIMEOUT': 60 * 60,
+    'LOCK_TIMEOUT': 10,
+    'WAIT': 2,
+    'POLL_INTERVAL': 0.05,
+}
+# Заголовки, которые сохраняются вместе с телом страницы.
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control')
+CONDITIONAL_HEADERS = ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+HOME = 'home'
+# Кеши, которые не видны другим процессам.
+LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def get_page_cache_settings():
+    return {**DEFAULTS, **getattr(settings, 'NEWS_PAGE_CACHE', {})}
+
+
+def get_page_cache(options=None):
+    """Кеш страниц или None, если он не общий для процессов."""
+    options = options or get_page_cache_settings()
+    cache = caches[options['CACHE']]
+    if isinstance(cache, LOCAL_BACKENDS):
+        return None
+    return cache
+
+
+@checks.register(checks.Tags.caches)
+def check_page_cache(app_configs, **kwargs):
+    options = get_page_cache_settings()
+    if not options['ENABLED'] or get_page_cache(options) is not None:
+        return []
+    return [checks.Warning(
+        f'Кеш {options["CACHE"]!r} виден только своему процессу, '
+        'поэтому кеш страниц новостей не работает.',
+        hint='Укажите в NEWS_PAGE_CACHE["CACHE"] общий кеш: файловый, '
+             'Memcached или Redis.',
+        id='news.W001',
+    )]
+
+
+def page_name(pk=None):
+    return HOME if pk is None else f'detail:{pk}'
+
+
+def _entry_key(name):
+    return f'news:page:{name}'
+
+
+def _generation_key(name):
+    return f'news:page:{name}:generation'
+
+
+def _lock_key(name):
+    return f'news:page:{name}:lock'
+
+
+def _lock_path(options, name):
+    location = settings.CACHES[options['CACHE']]['LOCATION']
+    digest = hashlib.md5(_lock_key(name).encode()).hexdigest()
+    return os.path.join(location, f'{digest}.lock')
+
+
+def _create_lock_file(path):
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return False
+    return True
+
+
+def _acquire_lock(cache, name, options):
+    """
+    Захватываем блокировку перерисовки страницы name.
+
+    FileBasedCache.add сначала проверяет ключ, а потом пишет файл, и два
+    процесса могут захватить блокировку одновременно. Для него блокировка —
+    отдельный файл, созданный с O_EXCL. Файл старше LOCK_TIMEOUT оставлен
+    упавшим процессом и забирается.
+    """
+    if not isinstance(cache, FileBasedCache):
+        return cache.add(_lock_key(name), True, options['LOCK_TIMEOUT'])
+    path = _lock_path(options, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if _create_lock_file(path):
+        return True
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except FileNotFoundError:
+        return _create_lock_file(path)
+    if age < options['LOCK_TIMEOUT']:
+        return False
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    return _create_lock_file(path)
+
+
+def _release_lock(cache, name, options):
+    if not isinstance(cache, FileBasedCache):
+        cache.delete(_lock_key(name))
+        return
+    try:
+        os.remove(_lock_path(options, name))
+    except FileNotFoundError:
+        pass
+
+
+def _new_generation():
+    # Новое значение не совпадёт с поколением старых записей, даже
+    # если счётчик был вытеснен из кеша.
+    return time.time_ns()
+
+
+def current_generation(cache, name):
+    generation = cache.get(_generation_key(name))
+    if generation is None:
+        cache.add(_generation_key(name), _new_generation(), None)
+        generation = cache.get(_generation_key(name))
+    return generation
+
+
+def bump_generation(cache, name):
+    # Новое значение, а не incr: у общих кешей вроде файлового incr —
+    # это чтение и запись, и два процесса записали бы одно поколение.
+    cache.set(_generation_key(name), _new_generation(), None)
+
+
+def invalidate_news(news_ids, home_changed=False):
+    """
+    Помечаем устаревшими страницы, на которых показаны новости news_ids.
+
+    Главная устаревает, если изменился её состав (home_changed) или
+    одна из новостей на ней есть. Вызывается после COMMIT, чтобы
+    страница не перерисовалась по данным, которых ещё не видно другим
+    соединениям.
+    """
+    cache = get_page_cache()
+    if cache is None:
+        return
+    news_ids = set(news_ids)
+
+    def invalidate():
+        for news_id in news_ids:
+            bump_generation(cache, page_name(news_id))
+        if not home_changed:
+            home = cache.get(_entry_key(HOME))
+            if home is None or news_ids.isdisjoint(home['news_ids']):
+                return
+        bump_generation(cache, HOME)
+
+    transaction.on_commit(invalidate)
+
+
+def _news_ids(response):
+    context = getattr(response, 'context_data', None) or {}
+    if 'news' in context:
+        return [context['news'].pk]
+    return [news.pk for news in context.get('object_list', ())]
+
+
+def _accepts_gzip(request):
+    return 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+
+
+def _make_entry(response, generation):
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+    return {
+        'generation': generation,
+        'body': gzip.compress(response.content),
+        'headers': {
+            header: response[header]
+            for header in STORED_HEADERS if response.has_header(header)
+        },
+        'news_ids': _news_ids(response),
+    }
+
+
+def _is_cacheable(response):
+    return response.status_code == 200 and not response.cookies
+
+
+def _response_from_entry(request, entry):
+    headers = entry['headers']
+    last_modified = headers.get('Last-Modified')
+    conditional = get_conditional_response(
+        request,
+        etag=headers.get('ETag'),
+        last_modified=last_modified and parse_http_date_safe(last_modified),
+    )
+    if conditional is not None:
+        response = conditional
+    elif _accepts_gzip(request):
+        response = HttpResponse(entry['body'])
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(entry['body']))
+    for header, value in headers.items():
+        if header != 'Content-Type' or response.status_code == 200:
+            response[header] = value
+    patch_vary_headers(response, ('Cookie', 'Accept-Encoding'))
+    return response
+
+
+def _wait_for_entry(cache, name, generation, options):
+    deadline = time.monotonic() + options['WAIT']
+    while time.monotonic() < deadline:
+        time.sleep(options['POLL_INTERVAL'])
+        entry = cache.get(_entry_key(name))
+        if entry is not None and entry['generation'] == generation:
+            return entry
+    return None
+
+
+def cache_anonymous_page(view_func):
+    """
+    Отдаём анонимному читателю страницу из кеша.
+
+    Страницу перерисовывает только запрос, захвативший блокировку;
+    остальные получают устаревшую копию или ждут новую.
+    """
+    @wraps(view_func)
+    def inner(request, *args, **kwargs):
+        options = get_page_cache_settings()
+        cache = get_page_cache(options) if options['ENABLED'] else None
+        if (
+            cache is None or request.method != 'GET'
+            or request.GET or request.user.is_authenticated
+        ):
+            return view_func(request, *args, **kwargs)
+        name = page_name(kwargs.get('pk'))
+        generation = current_generation(cache, name)
+        entry = cache.get(_entry_key(name))
+        if entry is not None and entry['generation'] == generation:
+            return _response_from_entry(request, entry)
+        if not _acquire_lock(cache, name, options):
+            if entry is None:
+                entry = _wait_for_entry(cache, name, generation, options)
+            if entry is not None:
+                return _response_from_entry(request, entry)
+            return view_func(request, *args, **kwargs)
+        try:
+            # Запрос с If-None-Match может получить 304 без тела, поэтому
+            # страница для кеша рисуется без условных заголовков.
+            conditional_headers = {
+                header: request.META.pop(header)
+                for header in CONDITIONAL_HEADERS if header in request.META
+            }
+            try:
+                response = view_func(request, *args, **kwargs)
+            finally:
+                request.META.update(conditional_headers)
+            if not _is_cacheable(response):
+                return response
+            entry = _make_entry(response, generation)
+            cache.set(_entry_key(name), entry, options['TIMEOUT'])
+        finally:
+            _release_lock(cache, name, options)
+        return _response_from_entry(request, entry)
+    return inner
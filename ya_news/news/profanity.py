@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from django.conf import settings
+
+from .models import BadWord
+
+# Латинские буквы и цифры, похожие на кириллические.
+HOMOGLYPHS = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у', 'ё': 'е',
+    '0': 'о', '3': 'з', '4': 'ч', '6': 'б', '@': 'а',
+})
+
+
+def normalize(text):
+    """
+    Приводим текст к виду, в котором сравниваются слова.
+
+    Нижний регистр, латинские двойники заменены кириллицей, знаки
+    препинания внутри слов выброшены, повторы букв схлопнуты:
+    «Р.е.д.и.и.и.с.к.а» и «pедиска» превращаются в «редиска».
+    """
+    result = []
+    previous = None
+    for char in text.lower().translate(HOMOGLYPHS):
+        if not (char.isalnum() or char.isspace()) or char == previous:
+            continue
+        result.append(char)
+        previous = char
+    return ''.join(result)
+
+
+class WordMatcher:
+    """
+    Автомат Ахо — Корасик для поиска сразу всех слов списка.
+
+    Строится один раз, поиск проходит текст за один проход
+    независимо от количества слов.
+    """
+
+    def __init__(self, words):
+        self.transitions = [{}]
+        self.fail = [0]
+        self.output = [None]
+        for word in words:
+            self._add(word)
+        self._link()
+
+    def _add(self, word):
+        state = 0
+        for char in word:
+            if char not in self.transitions[state]:
+                self.transitions.append({})
+                self.fail.append(0)
+                self.output.append(None)
+                self.transitions[state][char] = len(self.transitions) - 1
+            state = self.transitions[state][char]
+        if word:
+            self.output[state] = word
+
+    def _link(self):
+        """Строим переходы по неудаче обходом в ширину."""
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.transitions[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.transitions[fallback].get(char, 0)
+                if self.fail[child] == child:
+                    self.fail[child] = 0
+                if self.output[child] is None:
+                    self.output[child] = self.output[self.fail[child]]
+
+    def find(self, text):
+        """Первое найденное в тексте слово или None."""
+        state = 0
+        for char in text:
+            while state and char not in self.transitions[state]:
+                state = self.fail[state]
+            state = self.transitions[state].get(char, 0)
+            if self.output[state] is not None:
+                return self.output[state]
+        return None
+
+
+class BadWords:
+    """
+    Список запрещённых слов с автоматом, собранным один раз на процесс.
+
+    Слова берутся из базового списка, из файла NEWS_BAD_WORDS_FILE
+    (по слову в строке) и из таблицы BadWord. Файл перечитывается при
+    изменении, таблица — после изменения в этом процессе или раз в
+    NEWS_BAD_WORDS_RELOAD_INTERVAL секунд.
+    """
+
+    def __init__(self, words=()):
+        self.words = tuple(words)
+        self._lock = threading.Lock()
+        self._matcher = None
+        self._file_mtime = None
+        self._loaded_at = 0
+
+    def invalidate(self):
+        """Пересобрать автомат при следующей проверке."""
+        self._matcher = None
+
+    def _file_state(self):
+        path = getattr(settings, 'NEWS_BAD_WORDS_FILE', None)
+        if not path:
+            return None, None
+        path = Path(path)
+        try:
+            return path, path.stat().st_mtime
+        except FileNotFoundError:
+            return None, None
+
+    def _is_stale(self, mtime):
+        interval = getattr(settings, 'NEWS_BAD_WORDS_RELOAD_INTERVAL', 60)
+        return (
+            mtime != self._file_mtime
+            or time.monotonic() - self._loaded_at > interval
+        )
+
+    def _load_words(self, path):
+        words = list(self.words)
+        if path is not None:
+            with open(path, encoding='utf-8') as file:
+                words.extend(
+                    line.strip() for line in file
+                    if line.strip() and not line.startswith('#')
+                )
+        words.extend(BadWord.objects.values_list('word', flat=True))
+        return {normalize(word) for word in words} - {''}
+
+    def matcher(self):
+        path, mtime = self._file_state()
+        matcher = self._matcher
+        if matcher is None or self._is_stale(mtime):
+            with self._lock:
+                matcher = self._matcher
+                if matcher is None or self._is_stale(mtime):
+                    matcher = WordMatcher(self._load_words(path))
+                    self._matcher = matcher
+                    self._file_mtime = mtime
+                    self._loaded_at = time.monotonic()
+        return matcher
+
+    def find(self, text):
+        """Первое запрещённое слово в тексте или None."""
+        return self.matcher().find(normalize(text))
@@ -1,12 +1,34 @@
 from datetime import timedelta
 
 import pytest
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils import timezone
 
 from news.models import Comment, News
 
 
+@pytest.fixture(autouse=True)
+# Повторяющиеся SELECT в тестах считаем ошибкой.
+def raise_on_nplusone(settings):
+    settings.NPLUSONE_MODE = 'raise'
+    settings.NPLUSONE_THRESHOLD = 2
+
+
+@pytest.fixture(autouse=True)
+# Кеш страниц сбрасывается после COMMIT, которого в тестах нет,
+# поэтому он включается только в своих тестах.
+def disable_page_cache(settings):
+    settings.NEWS_PAGE_CACHE = {'ENABLED': False}
+
+
+@pytest.fixture(autouse=True)
+# Кеш фрагментов не должен переживать тест.
+def clear_cache():
+    yield
+    cache.clear()
+
+
 # Константы текста для новости, комментария, формы комментария.
 TEXT_COMMENT = 'Новый текст комментария'
 TITLE_NEW = 'Тестовая новость'
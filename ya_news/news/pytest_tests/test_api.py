@@ -0,0 +1,110 @@
+import json
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from news import api
+from news.models import Comment, News
+
+
+@pytest.fixture
+def news_list(settings):
+    settings.NEWS_API_PAGE_SIZE = 2
+    today = timezone.now().date()
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст', date=today)
+        for index in range(5)
+    )
+    return list(News.objects.order_by('-date', '-id'))
+
+
+def read_all_pages(client, url):
+    results = []
+    while url:
+        data = client.get(url).json()
+        results.extend(data['results'])
+        url = data['next']
+    return results
+
+
+@pytest.mark.django_db
+def test_api_list_pages(client, news_list):
+    """Тест: курсор проходит все новости без пропусков и повторов."""
+    results = read_all_pages(client, reverse('news:api_list'))
+    assert [item['id'] for item in results] == [
+        news.pk for news in news_list
+    ]
+    assert 'text' not in results[0]
+    assert results[0]['url'] == reverse(
+        'news:api_detail', args=(news_list[0].pk,)
+    )
+
+
+@pytest.mark.django_db
+def test_api_detail(client, new):
+    """Тест: новость отдаётся с полным текстом."""
+    data = client.get(reverse('news:api_detail', args=(new.pk,))).json()
+    assert data['title'] == new.title
+    assert data['text'] == new.text
+
+
+@pytest.mark.django_db
+def test_api_comments_pages(settings, client, author, new):
+    """Тест: комментарии листаются курсором в порядке создания."""
+    settings.COMMENTS_COUNT_ON_PAGE = 2
+    now = timezone.now()
+    for index in range(3):
+        comment = Comment.objects.create(
+            news=new, author=author, text=f'Текст {index}'
+        )
+        Comment.objects.filter(pk=comment.pk).update(
+            created=now + timedelta(minutes=index)
+        )
+    results = read_all_pages(
+        client, reverse('news:api_comments', args=(new.pk,))
+    )
+    assert [item['text'] for item in results] == [
+        'Текст 0', 'Текст 1', 'Текст 2'
+    ]
+    assert results[0]['author'] == author.username
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ('news:api_detail', 'news:api_comments'))
+def test_api_missing_news(client, name):
+    response = client.get(reverse(name, args=(1,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ('news', 'comments'))
+def test_api_export_streams_ndjson(
+        monkeypatch, client, comment, news_list, name
+):
+    """Тест: выгрузка идёт потоком порциями и содержит все записи."""
+    monkeypatch.setattr(api, 'EXPORT_CHUNK_SIZE', 2)
+    response = client.get(reverse('news:api_export', args=(name,)))
+    assert response.status_code == HTTPStatus.OK
+    assert response.streaming
+    chunks = [chunk.decode() for chunk in response.streaming_content]
+    records = [
+        json.loads(line) for chunk in chunks for line in chunk.splitlines()
+    ]
+    model = News if name == 'news' else Comment
+    assert [record['id'] for record in records] == list(
+        model.objects.order_by('pk').values_list('pk', flat=True)
+    )
+    assert all(len(chunk.splitlines()) <= 2 for chunk in chunks)
+    if name == 'comments':
+        assert records[0]['author'] == comment.author.username
+    # Запросы генератора учтены, хотя он работал после middleware.
+    assert response.query_stats.count > 0
+
+
+@pytest.mark.django_db
+def test_api_unknown_export(client):
+    response = client.get(reverse('news:api_export', args=('users',)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,95 @@
+import asyncio
+import importlib
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import clear_url_caches, resolve
+
+from yacommon import concurrency
+from yacommon.middleware import query_stats_middleware
+
+
+def reload_urls():
+    import news.urls
+    import yanews.urls
+
+    importlib.reload(news.urls)
+    importlib.reload(yanews.urls)
+    clear_url_caches()
+
+
+def async_get(async_client, url):
+    async def get():
+        return await async_client.get(url)
+
+    return async_to_sync(get)()
+
+
+@pytest.fixture
+def async_views(settings):
+    settings.ASYNC_VIEWS = True
+    reload_urls()
+    yield
+    settings.ASYNC_VIEWS = False
+    reload_urls()
+
+
+@pytest.fixture
+def small_pool(monkeypatch, settings):
+    settings.ASYNC_VIEW_THREADS = 2
+    monkeypatch.setattr(concurrency, '_executor', None)
+    yield
+    concurrency.get_executor().shutdown()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('name', ('home', 'detail'))
+def test_async_views_match_sync(
+        async_views, client, async_client, home_url, detail_url, name,
+):
+    """Тест: под ASGI страница та же, а запросы к базе учтены."""
+    url = home_url if name == 'home' else detail_url
+    assert asyncio.iscoroutinefunction(resolve(url).func)
+    expected = client.get(url)
+    response = async_get(async_client, url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == expected.content
+    assert response.query_stats.url_name == f'news:{name}'
+    assert response.query_stats.count == expected.query_stats.count > 0
+
+
+def test_middleware_stays_async():
+    """Тест: учёт запросов не переводит запрос в отдельный поток."""
+    async def get_response(request):
+        return None
+
+    assert asyncio.iscoroutinefunction(query_stats_middleware(get_response))
+    assert not asyncio.iscoroutinefunction(query_stats_middleware(print))
+
+
+def test_pool_is_bounded(small_pool):
+    """Тест: одновременно работают не больше ASYNC_VIEW_THREADS вызовов."""
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def work():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.pop()
+        return threading.current_thread().name
+
+    async def main():
+        return await asyncio.gather(
+            *(concurrency.run_sync(work) for _ in range(6))
+        )
+
+    names = async_to_sync(main)()
+    assert max(peak) == 2
+    assert all(name.startswith('async-view') for name in names)
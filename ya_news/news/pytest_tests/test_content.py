@@ -1,10 +1,17 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from http import HTTPStatus
 
 import pytest
 from django.conf import settings
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
 
-from news.models import News
+from news.models import Comment, News
 from news.forms import CommentForm
+from news.fragments import comment_key, teaser_key
+from yacommon.pagination import encode_cursor
 
 
 def test_home_pages_for_paginate_and_sorted(author_client, home_url):
@@ -30,6 +37,19 @@ def test_home_pages_for_paginate_and_sorted(author_client, home_url):
     assert all_dates == sorted_dates
 
 
+def test_home_page_does_not_query_comments(
+        client, home_url, comments, django_assert_num_queries,
+):
+    """Тест главной страницы: число комментариев берётся из новости."""
+    # Версии новостей для ETag и сам список новостей.
+    with django_assert_num_queries(2) as queries:
+        response = client.get(home_url)
+    assert response.context['object_list'][0].comment_count == 2
+    assert 'Комментариев: 2' in response.content.decode()
+    # Полный текст новостей главной не нужен: анонс хранится отдельно.
+    assert all('"text"' not in query['sql'] for query in queries)
+
+
 def test_comments_order(author_client, detail_url, comments):
     """Тест детальной страницы на сортировку комментарий."""
     response = author_client.get(detail_url)
@@ -51,3 +71,195 @@ def test_authorized_client_has_form(author_client, detail_url):
     response = author_client.get(detail_url)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+def test_comments_keyset_pagination(
+        client, settings, author, new, detail_url,
+):
+    """Тест постраничного вывода комментариев по курсору."""
+    settings.COMMENTS_COUNT_ON_PAGE = 2
+    now = timezone.now()
+    comments = Comment.objects.bulk_create(
+        Comment(news=new, author=author, text=f'Комментарий {i}')
+        for i in range(5)
+    )
+    # Одинаковое время у двух комментариев: порядок определяет id.
+    for i, comment in enumerate(comments):
+        Comment.objects.filter(text=comment.text).update(
+            created=now + timedelta(minutes=min(i, 3))
+        )
+    response = client.get(detail_url)
+    page = response.context['comments']
+    texts = [comment.text for comment in page]
+    assert page.has_next
+    url = reverse('news:comments', args=(new.pk,))
+    while page.has_next:
+        response = client.get(url, {'after': page.next_cursor})
+        assert 'news' not in response.context
+        page = response.context['comments']
+        texts += [comment.text for comment in page]
+    assert texts == [f'Комментарий {i}' for i in range(5)]
+
+
+@pytest.mark.django_db
+def test_comments_fragment_rejects_broken_cursor(client, new):
+    """Тест фрагмента комментариев с неверным курсором."""
+    url = reverse('news:comments', args=(new.pk,))
+    response = client.get(url, {'after': 'сломанный'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('values', ([5, 1], [None, 1]))
+@pytest.mark.parametrize('name', ('news:archive', 'news:comments'))
+def test_cursor_with_wrong_values(client, new, name, values):
+    """Тест: курсор со значениями не тех типов даёт 404, а не 500."""
+    args = (new.pk,) if name == 'news:comments' else None
+    response = client.get(
+        reverse(name, args=args), {'after': encode_cursor(values)}
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_comments_fragment_of_missing_news(client, new):
+    """Тест фрагмента комментариев несуществующей новости."""
+    url = reverse('news:comments', args=(new.pk + 1,))
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_archive_keyset_pagination(client, settings):
+    """Тест архива: все новости доступны постранично по убыванию даты."""
+    settings.NEWS_COUNT_ON_ARCHIVE_PAGE = 3
+    today = datetime.today().date()
+    News.objects.bulk_create(
+        News(title=f'Новость {i}', text='Текст',
+             date=today - timedelta(i // 2))
+        for i in range(8)
+    )
+    url = reverse('news:archive')
+    response = client.get(url)
+    page = response.context['page']
+    received = list(page)
+    while page.has_next:
+        page = client.get(url, {'after': page.next_cursor}).context['page']
+        received += list(page)
+    expected = list(News.objects.order_by('-date', '-id'))
+    assert received == expected
+
+
+@pytest.mark.django_db
+def test_archive_month(client):
+    """Тест архива за месяц и счётчиков месяцев."""
+    News.objects.create(title='Октябрь', text='Текст', date='2022-10-31')
+    news = News.objects.create(title='Ноябрь', text='Текст', date='2022-11-01')
+    url = reverse('news:archive_month', args=(2022, 10))
+    response = client.get(url)
+    assert [news.title for news in response.context['page']] == ['Октябрь']
+    months = {
+        (item.year, item.month): item.count
+        for item in response.context['months']
+    }
+    assert months == {(2022, 10): 1, (2022, 11): 1}
+    news.date = date(2022, 10, 1)
+    news.save()
+    months = {
+        (item.year, item.month): item.count
+        for item in client.get(url).context['months']
+    }
+    assert months == {(2022, 10): 2}
+
+
+@pytest.mark.django_db
+def test_archive_unknown_month(client):
+    """Тест архива за несуществующий месяц."""
+    url = reverse('news:archive_month', args=(2022, 13))
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.parametrize(
+    'user',
+    (pytest.lazy_fixture('client'), pytest.lazy_fixture('author_client')),
+)
+@pytest.mark.parametrize(
+    'url',
+    (pytest.lazy_fixture('home_url'), pytest.lazy_fixture('detail_url')),
+)
+@pytest.mark.django_db
+def test_not_modified_until_comment_changes(user, url, author, new):
+    """Тест ответа 304 до появления нового комментария."""
+    # Первый запрос выставляет CSRF-cookie, от которой зависит ETag.
+    user.get(url)
+    response = user.get(url)
+    etag = response['ETag']
+    response = user.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    Comment.objects.create(news=new, author=author, text='Новый')
+    response = user.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_etag_depends_on_user(reader_client, detail_url):
+    """Тест: анониму и пользователю нельзя отдать версии друг друга."""
+    anonymous_response = Client().get(detail_url)
+    assert anonymous_response.has_header('Last-Modified')
+    response = reader_client.get(
+        detail_url, HTTP_IF_NONE_MATCH=anonymous_response['ETag']
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert not response.has_header('Last-Modified')
+    assert 'private' in response['Cache-Control']
+
+
+def test_comment_fragment_cached_until_saved(
+        author_client, detail_url, comment,
+):
+    """Тест кеша комментария: до сохранения отдаётся сохранённый HTML."""
+    author_client.get(detail_url)
+    # update() не меняет версию комментария, поэтому кеш не сбросится.
+    Comment.objects.filter(pk=comment.pk).update(text='Обход кеша')
+    response = author_client.get(detail_url)
+    assert comment.text in response.content.decode()
+    comment.text = 'Правка'
+    comment.save()
+    content = author_client.get(detail_url).content.decode()
+    assert 'Правка' in content
+    assert 'Обход кеша' not in content
+
+
+def test_comment_links_rendered_per_user(
+        author_client, detail_url, comment, edit_url,
+):
+    """Тест: ссылки автора не попадают в кеш для других пользователей."""
+    assert edit_url in author_client.get(detail_url).content.decode()
+    response = Client().get(detail_url)
+    assert comment.text in response.content.decode()
+    assert edit_url not in response.content.decode()
+
+
+def test_deleted_comment_removed_from_cache(
+        author_client, detail_url, comment,
+):
+    """Тест удаления фрагмента комментария из кеша вместе с ним."""
+    author_client.get(detail_url)
+    key = comment_key(comment)
+    assert cache.get(key) is not None
+    comment.delete()
+    assert cache.get(key) is None
+
+
+@pytest.mark.django_db
+def test_news_teaser_cached_until_saved(client, home_url, new):
+    """Тест кеша анонса новости на главной."""
+    client.get(home_url)
+    News.objects.filter(pk=new.pk).update(text='Обход кеша')
+    assert new.text in client.get(home_url).content.decode()
+    new.text = 'Новый текст'
+    new.save()
+    assert 'Новый текст' in client.get(home_url).content.decode()
+    key = teaser_key(new)
+    assert cache.get(key) is not None
+    new.delete()
+    assert cache.get(key) is None
@@ -0,0 +1,116 @@
+import sqlite3
+
+import pytest
+from django.db import connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from news.models import News
+from yacommon.db import read_only_request_middleware, ReadReplicaRouter
+
+PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 1024 * 1024,
+    'cache_size': -1024,
+}
+
+
+@pytest.fixture
+def production(settings):
+    settings.SQLITE_PRAGMAS = PRAGMAS
+    settings.DATABASE_READ_ALIAS = 'replica'
+
+
+@pytest.fixture
+def unblocked(django_db_blocker):
+    # Отдельные файлы SQLite, а не тестовая база.
+    with django_db_blocker.unblock():
+        yield
+
+
+def open_connection(path, alias):
+    settings_dict = {**connections.databases['default'], 'NAME': str(path)}
+    wrapper = DatabaseWrapper(settings_dict, alias)
+    wrapper.ensure_connection()
+    return wrapper
+
+
+def pragma(wrapper, name):
+    return wrapper.connection.execute(f'PRAGMA {name}').fetchone()[0]
+
+
+def test_pragmas_applied(production, unblocked, tmp_path):
+    """Тест: основное подключение переводит файл в WAL."""
+    wrapper = open_connection(tmp_path / 'db.sqlite3', 'default')
+    try:
+        assert pragma(wrapper, 'journal_mode') == 'wal'
+        assert pragma(wrapper, 'synchronous') == 1
+        assert pragma(wrapper, 'cache_size') == -1024
+        assert pragma(wrapper, 'query_only') == 0
+    finally:
+        wrapper.close()
+
+
+def test_read_connection_is_query_only(production, unblocked, tmp_path):
+    """Тест: в подключение для чтения нельзя записать."""
+    path = tmp_path / 'db.sqlite3'
+    writer = open_connection(path, 'default')
+    reader = open_connection(path, 'replica')
+    try:
+        writer.connection.execute('CREATE TABLE item (id INTEGER)')
+        with pytest.raises(sqlite3.OperationalError):
+            reader.connection.execute('INSERT INTO item VALUES (1)')
+        assert reader.connection.execute(
+            'SELECT COUNT(*) FROM item'
+        ).fetchone() == (0,)
+    finally:
+        reader.close()
+        writer.close()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize(
+    'method, expected', (('get', 'replica'), ('head', 'replica'),
+                         ('post', None)),
+)
+def test_router_sends_reads_of_get_requests(production, method, expected):
+    """Тест: чтение GET-запроса уходит в подключение для чтения."""
+    router = ReadReplicaRouter()
+    routes = []
+
+    def view(request):
+        routes.append(router.db_for_read(News))
+        with transaction.atomic():
+            routes.append(router.db_for_read(News))
+        routes.append(router.db_for_write(News))
+        return HttpResponse()
+
+    request = getattr(RequestFactory(), method)('/')
+    read_only_request_middleware(view)(request)
+    assert routes == [expected, None, 'default']
+    assert router.db_for_read(News) is None
+
+
+@pytest.mark.parametrize(
+    'method, expected', (('get', 'replica'), ('post', None)),
+)
+def test_router_sends_reads_of_streamed_response(production, method, expected):
+    """Тест: генератор потокового ответа читает через тот же маршрут."""
+    router = ReadReplicaRouter()
+
+    def view(request):
+        return StreamingHttpResponse(
+            str(router.db_for_read(News)) for _ in range(2)
+        )
+
+    request = getattr(RequestFactory(), method)('/')
+    response = read_only_request_middleware(view)(request)
+    assert router.db_for_read(News) is None
+    assert b''.join(response.streaming_content) == str(expected).encode() * 2
+
+
+def test_router_off_without_read_alias():
+    assert ReadReplicaRouter().db_for_read(News) is None
+    assert ReadReplicaRouter().allow_migrate('default', 'news')
@@ -0,0 +1,98 @@
+import io
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from news.loading import FixtureError, iter_json_array
+from news.models import Comment, News, NewsMonth
+
+
+@pytest.fixture
+def records(author):
+    return [
+        {
+            'model': 'news.news',
+            'pk': 10,
+            'fields': {
+                'title': 'Архивная новость',
+                'text': 'Текст [с] {скобками}, "кавычками" и запятыми',
+                'date': '2020-01-15',
+                'comment_count': 100,
+            },
+        },
+        *(
+            {
+                'model': 'news.comment',
+                'fields': {
+                    'news': 10,
+                    'author': author.pk,
+                    'text': f'Комментарий {i}',
+                    'created': f'2020-01-1{i}T12:00:00+03:00',
+                },
+            }
+            for i in range(3)
+        ),
+    ]
+
+
+def test_iter_json_array_reads_across_chunks(records):
+    """Объекты собираются правильно при любом разбиении файла."""
+    data = json.dumps(records, ensure_ascii=False, indent=1)
+    for chunk_size in (1, 7, 64):
+        file = io.StringIO(data)
+        assert list(iter_json_array(file, chunk_size)) == records
+
+
+@pytest.mark.parametrize('suffix', ('json', 'jsonl'))
+def test_load_news_stream(tmp_path, records, suffix):
+    """Загрузка сохраняет время комментариев и пересчитывает счётчики."""
+    path = tmp_path / f'fixture.{suffix}'
+    if suffix == 'json':
+        path.write_text(json.dumps(records), encoding='utf-8')
+    else:
+        path.write_text(
+            '\n'.join(json.dumps(record) for record in records),
+            encoding='utf-8',
+        )
+    call_command('load_news_stream', str(path), batch_size=2)
+    news = News.objects.get(pk=10)
+    assert news.comment_count == 3
+    assert news.excerpt == news.text
+    assert NewsMonth.objects.get(year=2020, month=1).count == 1
+    created = Comment.objects.values_list('created', flat=True)
+    assert sorted(day.isoformat() for day in created) == [
+        f'2020-01-1{i}T09:00:00+00:00' for i in range(3)
+    ]
+
+
+@pytest.mark.django_db
+def test_load_news_stream_rejects_broken_file(tmp_path):
+    """Оборванный файл приводит к понятной ошибке команды."""
+    path = tmp_path / 'broken.json'
+    path.write_text('[{"model": "news.news", "fields": {', encoding='utf-8')
+    with pytest.raises(CommandError):
+        call_command('load_news_stream', str(path))
+
+
+def test_iter_json_array_stops_at_broken_record():
+    """Ошибка в записи обнаруживается без чтения файла до конца."""
+    valid = json.dumps({'model': 'news.news', 'fields': {'title': 'Т'}})
+    file = io.StringIO(
+        '[{"model": "news.news", "fields": {"title": тест}}, '
+        + ', '.join([valid] * 1000) + ']'
+    )
+    with pytest.raises(FixtureError):
+        list(iter_json_array(file, chunk_size=64))
+    assert file.tell() < len(file.getvalue()) // 10
+
+
+@pytest.mark.django_db
+def test_load_news_stream_rejects_taken_pk(tmp_path, records, new):
+    """Запись с занятым pk приводит к ошибке команды, а не к трейсбеку."""
+    records[0]['pk'] = new.pk
+    path = tmp_path / 'taken.json'
+    path.write_text(json.dumps(records[:1]), encoding='utf-8')
+    with pytest.raises(CommandError):
+        call_command('load_news_stream', str(path))
+    assert News.objects.get().title == new.title
@@ -1,10 +1,18 @@
+from concurrent.futures import Future
+from datetime import date
+from io import StringIO
 from http import HTTPStatus
 
 import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.template.defaultfilters import truncatewords
 from pytest_django.asserts import assertRedirects, assertFormError
 
-from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.forms import BAD_WORDS, WARNING, bad_words
+from news.ingest import CommentWriter
+from news.models import BadWord, Comment, News, NewsMonth
 from news.pytest_tests.conftest import TEXT_COMMENT
 
 
@@ -70,6 +78,43 @@ def test_author_cant_use_bad_words(author_client, detail_url):
     assert comments_count == 0
 
 
+@pytest.mark.parametrize(
+    'text',
+    (
+        'Ты РЕДИСКА!',
+        'pедиска',
+        'р.е.д.и.с.к.а',
+        'редииииска',
+        'нeгoдяй',
+        'НЕГОДЯЙ и ещё раз не-го-дяй',
+    ),
+)
+def test_author_cant_use_obfuscated_bad_words(author_client, detail_url, text):
+    """Тестируем распознавание замаскированных стоп-слов."""
+    response = author_client.post(detail_url, data={'text': text})
+    assertFormError(response, form='form', field='text', errors=WARNING)
+    assert Comment.objects.count() == 0
+
+
+def test_bad_words_from_file_and_table(settings, tmp_path, author_client,
+                                       detail_url):
+    """Тестируем загрузку стоп-слов из файла и таблицы BadWord."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# Стоп-слова\nпростофиля\n', encoding='utf-8')
+    settings.NEWS_BAD_WORDS_FILE = str(words_file)
+    BadWord.objects.create(word='бездельник')
+    try:
+        for text in ('Простофиля!', 'Бездельник!'):
+            response = author_client.post(detail_url, data={'text': text})
+            assertFormError(
+                response, form='form', field='text', errors=WARNING
+            )
+        response = author_client.post(detail_url, data={'text': 'Привет'})
+        assertRedirects(response, f'{detail_url}#comments')
+    finally:
+        bad_words.invalidate()
+
+
 def test_reader_cant_delete_comment_of_author(
         reader_client, delete_url, author, comment,
 ):
@@ -92,3 +137,135 @@ def test_reader_cant_edite_comment(
     assert response.status_code == HTTPStatus.NOT_FOUND
     comment.refresh_from_db()
     assert comment.text == TEXT_COMMENT
+
+
+def test_comment_count_follows_comments(
+        author_client, form_data, detail_url, delete_url, new,
+):
+    """Тестируем обновление счётчика при создании и удалении комментария."""
+    new.refresh_from_db()
+    assert new.comment_count == 1
+    author_client.post(detail_url, data=form_data)
+    new.refresh_from_db()
+    assert new.comment_count == 2
+    author_client.delete(delete_url)
+    new.refresh_from_db()
+    assert new.comment_count == 1
+
+
+def test_rebuild_comment_counts(comments, new):
+    """Тестируем пересчёт счётчиков командой rebuild_comment_counts."""
+    News.objects.update(comment_count=0)
+    call_command('rebuild_comment_counts')
+    new.refresh_from_db()
+    assert new.comment_count == Comment.objects.filter(news=new).count()
+
+
+@pytest.mark.django_db
+def test_news_excerpt_follows_text(new):
+    """Тестируем пересчёт анонса при сохранении новости."""
+    text = ' '.join(f'слово{index}' for index in range(20))
+    new.text = text
+    new.save(update_fields=['text'])
+    new.refresh_from_db()
+    assert new.excerpt == truncatewords(text, 15)
+    modified = new.modified
+    News.objects.update(excerpt='')
+    call_command('rebuild_news_excerpts', batch_size=1, stdout=StringIO())
+    new.refresh_from_db()
+    assert new.excerpt == truncatewords(text, 15)
+    # Ключ кеша анонса на главной меняется вместе с анонсом.
+    assert new.modified > modified
+
+
+@pytest.mark.django_db
+def test_load_news_fixture():
+    """Тестируем загрузку фикстуры новостей через loaddata."""
+    call_command('loaddata', 'news', stdout=StringIO())
+    assert News.objects.count() == 19
+    assert not News.objects.filter(modified__isnull=True).exists()
+    for news in News.objects.all():
+        assert news.excerpt == truncatewords(news.text, 15)
+
+
+@pytest.mark.django_db
+def test_rebuild_news_archive(new):
+    """Тестируем пересчёт месяцев архива командой rebuild_news_archive."""
+    NewsMonth.objects.all().delete()
+    call_command('rebuild_news_archive')
+    month = NewsMonth.objects.get()
+    assert (month.year, month.month) == (new.date.year, new.date.month)
+    assert month.count == 1
+
+
+def test_author_create_comment_through_queue(
+        settings, transactional_db, author_client, form_data, detail_url,
+        new,
+):
+    """Тестируем создание комментария через очередь записи."""
+    settings.NEWS_COMMENT_INGESTION = {'ENABLED': True}
+    response = author_client.post(detail_url, data=form_data)
+    # Комментарий виден сразу после редиректа.
+    assertRedirects(response, f'{detail_url}#comments')
+    comment = Comment.objects.get()
+    assert comment.text == form_data['text']
+    new.refresh_from_db()
+    assert new.comment_count == 1
+
+
+def test_comment_writer_isolates_broken_comment(author, new):
+    """Тестируем, что ошибка одного комментария не теряет остальные."""
+    writer = CommentWriter(batch_size=10, flush_interval=0)
+    good = Comment(news=new, author=author, text=TEXT_COMMENT)
+    broken = Comment(news=new, author=author, text=None)
+    batch = [(good, Future()), (broken, Future())]
+    writer.flush(batch)
+    assert batch[0][1].result() is good
+    assert isinstance(batch[1][1].exception(), IntegrityError)
+    assert Comment.objects.get().text == TEXT_COMMENT
+    new.refresh_from_db()
+    assert new.comment_count == 1
+
+
+def test_comment_writer_survives_unexpected_error(
+        transactional_db, author, new, monkeypatch,
+):
+    """Тестируем, что поток записи переживает ошибку не из базы."""
+    writer = CommentWriter(batch_size=10, flush_interval=0)
+    insert = writer._insert
+
+    def broken_insert(comments):
+        raise RuntimeError('Сбой получателя сигнала.')
+
+    monkeypatch.setattr(writer, '_insert', broken_insert)
+    future = writer.submit(Comment(news=new, author=author, text='Первый'))
+    assert isinstance(future.exception(timeout=10), RuntimeError)
+    thread = writer._thread
+    monkeypatch.setattr(writer, '_insert', insert)
+    future = writer.submit(Comment(news=new, author=author, text='Второй'))
+    assert future.result(timeout=10).text == 'Второй'
+    assert writer._thread is thread and thread.is_alive()
+    assert Comment.objects.get().text == 'Второй'
+
+
+@pytest.mark.django_db
+def test_generate_news_data():
+    """Тестируем генерацию данных: счётчики и воспроизводимость."""
+    options = dict(
+        users=5, news=20, comments=200, seed=1, end_date=date(2024, 1, 1),
+        batch_size=7, verbosity=0,
+    )
+    call_command('generate_news_data', **options)
+    assert News.objects.count() == 20
+    assert sum(
+        News.objects.values_list('comment_count', flat=True)
+    ) == Comment.objects.count() == 200
+    assert sum(NewsMonth.objects.values_list('count', flat=True)) == 20
+    first = list(Comment.objects.values_list('news_id', 'text', 'created'))
+    Comment.objects.all().delete()
+    News.objects.all().delete()
+    get_user_model().objects.all().delete()
+    call_command('generate_news_data', **options)
+    assert first == list(
+        Comment.objects.values_list('news_id', 'text', 'created')
+    )
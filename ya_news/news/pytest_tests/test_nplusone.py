@@ -0,0 +1,55 @@
+from http import HTTPStatus
+
+import pytest
+
+from news import views
+from news.models import Comment
+from yacommon.nplusone import NPlusOneError, normalize
+from yacommon.pagination import paginate_keyset
+
+
+def test_normalize_groups_near_identical_queries():
+    """Тестируем, что запросы с разными литералами сводятся к одному."""
+    first = normalize(
+        "SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'a' LIMIT 21"
+    )
+    second = normalize(
+        "SELECT * FROM t WHERE id IN (%s, %s) AND name = 'b''c' LIMIT 5"
+    )
+    assert first == second
+
+
+@pytest.fixture
+def lazy_authors(monkeypatch):
+    """Страница комментариев без select_related('author')."""
+    def get_comments_page(news_id, cursor=None):
+        return paginate_keyset(
+            Comment.objects.filter(news_id=news_id),
+            views.COMMENTS_ORDERING,
+        )
+
+    monkeypatch.setattr(views, 'get_comments_page', get_comments_page)
+
+
+@pytest.mark.django_db
+def test_lazy_comment_authors_are_reported(
+        lazy_authors, client, detail_url, comments,
+):
+    """Тестируем, что ленивая загрузка авторов в шаблоне находится."""
+    with pytest.raises(NPlusOneError) as error:
+        client.get(detail_url)
+    report = str(error.value)
+    assert '2 × SELECT' in report
+    assert '"auth_user"' in report
+    assert 'news/includes/comments.html:5' in report
+
+
+@pytest.mark.django_db
+def test_log_mode_does_not_raise(
+        settings, lazy_authors, client, detail_url, comments, caplog,
+):
+    """Тестируем, что в режиме log страница отдаётся с предупреждением."""
+    settings.NPLUSONE_MODE = 'log'
+    response = client.get(detail_url)
+    assert response.status_code == HTTPStatus.OK
+    assert 'news/includes/comments.html:5' in caplog.text
@@ -0,0 +1,167 @@
+import gzip
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.utils import timezone
+
+from news import pagecache
+from news.models import Comment, News
+
+
+@pytest.fixture
+def page_cache(settings, tmp_path):
+    settings.CACHES = {
+        **settings.CACHES,
+        'pages': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': tmp_path,
+        },
+    }
+    settings.NEWS_PAGE_CACHE = {'ENABLED': True, 'WAIT': 0, 'CACHE': 'pages'}
+    return caches['pages']
+
+
+@pytest.fixture
+def commit(django_capture_on_commit_callbacks):
+    """Выполняем отложенные до COMMIT сбросы кеша сразу."""
+    return lambda: django_capture_on_commit_callbacks(execute=True)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('page', ('home', 'detail'))
+def test_cached_page_served_without_queries(
+        page_cache, client, home_url, detail_url, page,
+        django_assert_num_queries,
+):
+    """Тест: повторный запрос анонима не обращается к базе."""
+    url = home_url if page == 'home' else detail_url
+    first = client.get(url)
+    with django_assert_num_queries(0):
+        second = client.get(url)
+    assert second.status_code == HTTPStatus.OK
+    assert second.content == first.content
+    assert second['ETag'] == first['ETag']
+
+
+@pytest.mark.django_db
+def test_cached_page_is_gzipped(page_cache, client, detail_url, new):
+    """Тест: тело хранится сжатым и отдаётся сжатым, если можно."""
+    plain = client.get(detail_url).content
+    response = client.get(detail_url, HTTP_ACCEPT_ENCODING='gzip, br')
+    assert response['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.content) == plain
+    assert 'Accept-Encoding' in response['Vary']
+
+
+@pytest.mark.django_db
+def test_cached_page_answers_not_modified(page_cache, client, detail_url):
+    """Тест ответа 304 по ETag из кеша."""
+    etag = client.get(detail_url)['ETag']
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_comment_invalidates_its_pages(
+        page_cache, commit, client, author, new, home_url, detail_url,
+):
+    """Тест: новый комментарий сразу виден на страницах новости."""
+    client.get(home_url)
+    client.get(detail_url)
+    with commit():
+        Comment.objects.create(news=new, author=author, text='Свежий')
+    assert 'Свежий' in client.get(detail_url).content.decode()
+    assert 'Комментариев: 1' in client.get(home_url).content.decode()
+
+
+@pytest.mark.django_db
+def test_comment_outside_home_keeps_home_cached(
+        page_cache, commit, client, author, home_url,
+):
+    """Тест: комментарий к новости не с главной не сбрасывает главную."""
+    today = timezone.now().date()
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст',
+             date=today - timedelta(days=index))
+        for index in range(settings.NEWS_COUNT_ON_HOME_PAGE + 1)
+    )
+    oldest = News.objects.order_by('date').first()
+    client.get(home_url)
+    generation = pagecache.current_generation(page_cache, pagecache.HOME)
+    with commit():
+        Comment.objects.create(news=oldest, author=author, text='Текст')
+    assert pagecache.current_generation(
+        page_cache, pagecache.HOME
+    ) == generation
+    assert pagecache.current_generation(
+        page_cache, pagecache.page_name(oldest.pk)
+    ) != generation
+
+
+@pytest.mark.django_db
+def test_stale_page_served_while_other_request_renders(
+        page_cache, client, detail_url, new, django_assert_num_queries,
+):
+    """Тест: пока страницу перерисовывает другой запрос, отдаётся копия."""
+    stale = client.get(detail_url).content
+    name = pagecache.page_name(new.pk)
+    pagecache.bump_generation(page_cache, name)
+    options = pagecache.get_page_cache_settings()
+    assert pagecache._acquire_lock(page_cache, name, options)
+    with django_assert_num_queries(0):
+        assert client.get(detail_url).content == stale
+    pagecache._release_lock(page_cache, name, options)
+    with django_assert_num_queries(3):
+        client.get(detail_url)
+
+
+def test_file_cache_lock_is_exclusive(page_cache, settings):
+    """Тест: блокировку в файловом кеше получает только один запрос."""
+    options = pagecache.get_page_cache_settings()
+    assert pagecache._acquire_lock(page_cache, 'home', options)
+    assert not pagecache._acquire_lock(page_cache, 'home', options)
+    # Блокировку упавшего процесса забирают после LOCK_TIMEOUT.
+    settings.NEWS_PAGE_CACHE = {**settings.NEWS_PAGE_CACHE, 'LOCK_TIMEOUT': 0}
+    options = pagecache.get_page_cache_settings()
+    assert pagecache._acquire_lock(page_cache, 'home', options)
+    pagecache._release_lock(page_cache, 'home', options)
+    assert pagecache._acquire_lock(page_cache, 'home', options)
+
+
+def test_logged_in_user_bypasses_cache(
+        page_cache, author_client, detail_url, new,
+):
+    """Тест: страница пользователя в общий кеш не попадает."""
+    author_client.get(detail_url)
+    name = pagecache.page_name(new.pk)
+    assert page_cache.get(pagecache._entry_key(name)) is None
+
+
+@pytest.mark.django_db
+def test_local_memory_cache_is_not_used(
+        settings, client, detail_url, django_assert_num_queries,
+):
+    """Тест: кеш в памяти процесса не годится для кеша страниц."""
+    settings.NEWS_PAGE_CACHE = {'ENABLED': True, 'CACHE': 'default'}
+    assert [
+        warning.id for warning in pagecache.check_page_cache(None)
+    ] == ['news.W001']
+    client.get(detail_url)
+    with django_assert_num_queries(3):
+        client.get(detail_url)
+
+
+def test_conditional_headers_restored_after_error(page_cache, rf):
+    """Тест: условные заголовки возвращаются в запрос и при ошибке."""
+    def broken_view(request, pk):
+        raise RuntimeError('Ошибка отрисовки.')
+
+    request = rf.get('/news/1/', HTTP_IF_NONE_MATCH='"etag"')
+    request.user = AnonymousUser()
+    with pytest.raises(RuntimeError):
+        pagecache.cache_anonymous_page(broken_view)(request, pk=1)
+    assert request.META['HTTP_IF_NONE_MATCH'] == '"etag"'
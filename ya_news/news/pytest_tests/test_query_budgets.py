@@ -0,0 +1,110 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from pytest_lazyfixture import lazy_fixture
+
+# Бюджет SQL-запросов на один HTTP-запрос к представлению. Бюджет не
+# должен зависеть от объёма данных, поэтому перед замером база
+# заполняется новостями и комментариями.
+QUERY_BUDGETS = {
+    ('news:home', 'anonymous'): 2,
+    ('news:home', 'user'): 4,
+    ('news:detail', 'anonymous'): 3,
+    ('news:detail', 'user'): 5,
+    ('news:comment', 'user'): 11,
+    ('news:comments', 'anonymous'): 2,
+    ('news:archive', 'anonymous'): 2,
+    ('news:search', 'anonymous'): 1,
+    ('news:discussed', 'anonymous'): 1,
+    ('news:api_list', 'anonymous'): 1,
+    ('news:api_detail', 'anonymous'): 1,
+    ('news:api_comments', 'anonymous'): 1,
+    ('news:edit', 'user'): 7,
+    ('news:delete', 'user'): 8,
+}
+
+
+@pytest.fixture
+def many_news(db):
+    call_command(
+        'generate_news_data', users=3, news=30, comments=300,
+        stdout=StringIO(),
+    )
+
+
+@pytest.fixture
+def anonymous_client(many_news, comment, client):
+    return client
+
+
+@pytest.fixture
+def user_client(many_news, comment, author_client):
+    return author_client
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'budget_key, url, method, data',
+    (
+        (('news:home', 'anonymous'), lazy_fixture('home_url'), 'get', None),
+        (('news:home', 'user'), lazy_fixture('home_url'), 'get', None),
+        (
+            ('news:detail', 'anonymous'), lazy_fixture('detail_url'),
+            'get', None,
+        ),
+        (('news:detail', 'user'), lazy_fixture('detail_url'), 'get', None),
+        (
+            ('news:comment', 'user'), lazy_fixture('detail_url'),
+            'post', lazy_fixture('form_data'),
+        ),
+        (('news:comments', 'anonymous'), 'comments', 'get', None),
+        (('news:archive', 'anonymous'), reverse('news:archive'), 'get', None),
+        (
+            ('news:search', 'anonymous'),
+            reverse('news:search') + '?q=новость', 'get', None,
+        ),
+        (
+            ('news:discussed', 'anonymous'), reverse('news:discussed'),
+            'get', None,
+        ),
+        (
+            ('news:api_list', 'anonymous'), reverse('news:api_list'),
+            'get', None,
+        ),
+        (('news:api_detail', 'anonymous'), 'api_detail', 'get', None),
+        (('news:api_comments', 'anonymous'), 'api_comments', 'get', None),
+        (
+            ('news:edit', 'user'), lazy_fixture('edit_url'),
+            'post', lazy_fixture('form_data'),
+        ),
+        (('news:delete', 'user'), lazy_fixture('delete_url'), 'post', None),
+    ),
+)
+def test_query_budget(
+        request, budget_key, url, method, data, new,
+):
+    """Тестируем, что представление укладывается в бюджет запросов."""
+    name, user = budget_key
+    client = request.getfixturevalue(f'{user}_client')
+    if url in ('comments', 'api_detail', 'api_comments'):
+        url = reverse(f'news:{url}', args=(new.pk,))
+    response = getattr(client, method)(url, data=data or {})
+    stats = response.query_stats
+    assert stats.count <= QUERY_BUDGETS[budget_key], (
+        f'{stats.url_name}: {stats.count} запросов при бюджете '
+        f'{QUERY_BUDGETS[budget_key]}'
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('debug', (True, False))
+def test_query_stats_headers(settings, client, home_url, debug):
+    """Тестируем, что заголовки со статистикой есть только в DEBUG."""
+    settings.DEBUG = debug
+    response = client.get(home_url)
+    assert response.query_stats.url_name == 'news:home'
+    assert ('X-Query-Count' in response) is debug
+    if debug:
+        assert response['X-Query-Count'] == str(response.query_stats.count)
@@ -0,0 +1,87 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from yacommon.pagination import encode_cursor
+
+# Полный просмотр таблицы без индекса, например «SCAN news_comment».
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+( AS \w+)?$')
+TEMP_SORT = 'USE TEMP B-TREE'
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE')
+
+
+def bad_plan_steps(sql):
+    """Шаги плана запроса с полным просмотром таблицы или сортировкой."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        details = [row[-1] for row in cursor.fetchall()]
+    return [
+        detail for detail in details
+        if FULL_SCAN.match(detail) or TEMP_SORT in detail
+    ]
+
+
+def assert_query_plans(request):
+    """Выполняем запрос к странице и проверяем планы всех SQL-запросов."""
+    with CaptureQueriesContext(connection) as context:
+        request()
+    problems = {}
+    for query in context.captured_queries:
+        sql = query['sql']
+        if sql.startswith(EXPLAINED):
+            steps = bad_plan_steps(sql)
+            if steps:
+                problems[sql] = steps
+    assert not problems, problems
+
+
+@pytest.mark.parametrize(
+    'name',
+    ('news:home', 'news:archive'),
+)
+@pytest.mark.django_db
+def test_list_query_plans(client, name, new, comment):
+    """Планы запросов списков новостей."""
+    assert_query_plans(lambda: client.get(reverse(name)))
+
+
+@pytest.mark.django_db
+def test_archive_month_query_plans(client, new):
+    """Планы запросов архива за месяц и следующей страницы архива."""
+    url = reverse('news:archive_month', args=(new.date.year, new.date.month))
+    cursor = encode_cursor([new.date, new.pk])
+    assert_query_plans(lambda: client.get(url))
+    assert_query_plans(lambda: client.get(url, {'after': cursor}))
+
+
+@pytest.mark.parametrize(
+    'user',
+    (pytest.lazy_fixture('client'), pytest.lazy_fixture('author_client')),
+)
+@pytest.mark.django_db
+def test_detail_query_plans(user, detail_url, comment):
+    """Планы запросов страницы новости и фрагмента комментариев."""
+    url = reverse('news:comments', args=(comment.news_id,))
+    cursor = encode_cursor([comment.created, comment.pk])
+    assert_query_plans(lambda: user.get(detail_url))
+    assert_query_plans(lambda: user.get(url, {'after': cursor}))
+
+
+def test_comment_create_query_plans(author_client, detail_url, form_data):
+    """Планы запросов при создании комментария."""
+    assert_query_plans(lambda: author_client.post(detail_url, form_data))
+
+
+def test_comment_update_query_plans(author_client, edit_url, form_data):
+    """Планы запросов при редактировании комментария."""
+    assert_query_plans(lambda: author_client.get(edit_url))
+    assert_query_plans(lambda: author_client.post(edit_url, form_data))
+
+
+def test_comment_delete_query_plans(author_client, delete_url):
+    """Планы запросов при удалении комментария."""
+    assert_query_plans(lambda: author_client.get(delete_url))
+    assert_query_plans(lambda: author_client.post(delete_url))
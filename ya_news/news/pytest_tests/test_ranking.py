@@ -0,0 +1,131 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from news import ranking
+from news.models import Comment, NewsCommentBucket, NewsDiscussion
+
+
+def counts():
+    return {
+        (item.news_id, item.window): item.count
+        for item in NewsDiscussion.objects.all()
+    }
+
+
+def buckets():
+    # Перенос даты в начале часа оставляет в часе создания пустой
+    # счётчик, которого пересчёт не строит.
+    return set(NewsCommentBucket.objects.filter(count__gt=0).values_list(
+        'news_id', 'hour', 'count', 'expired'
+    ))
+
+
+def add_comment(new, author, created):
+    comment = Comment.objects.create(news=new, author=author, text='Текст')
+    # Дата сдвигается так же, как при загрузке старых комментариев.
+    Comment.objects.filter(pk=comment.pk).update(created=created)
+    ranking.record_comments({(new.pk, comment.created): -1})
+    ranking.record_comments({(new.pk, created): 1})
+    comment.created = created
+    return comment
+
+
+@pytest.mark.django_db
+def test_comments_update_ranking(comment, author, new):
+    """Тест: создание и удаление комментария меняют суммы окон."""
+    assert counts() == {(new.pk, 'day'): 1, (new.pk, 'week'): 1}
+    add_comment(new, author, timezone.now() - timedelta(days=3))
+    assert counts() == {(new.pk, 'day'): 1, (new.pk, 'week'): 2}
+    comment.delete()
+    assert counts() == {(new.pk, 'day'): 0, (new.pk, 'week'): 1}
+
+
+@pytest.mark.django_db
+def test_old_comments_skipped(author, new):
+    """Тест: комментарий старше недели в рейтинг не попадает."""
+    old = timezone.now() - timedelta(days=8)
+    add_comment(new, author, old)
+    assert not NewsCommentBucket.objects.filter(
+        hour__lt=old + timedelta(hours=1)
+    ).exists()
+    assert set(counts().values()) == {0}
+
+
+@pytest.mark.django_db
+def test_expired_hours_leave_windows(comment, new):
+    """Тест: час выпадает сначала из суток, затем из недели."""
+    ranking.expire_buckets(now=timezone.now() + timedelta(days=2))
+    assert counts() == {(new.pk, 'week'): 1}
+    assert NewsCommentBucket.objects.get().expired == 1
+    ranking.expire_buckets(now=timezone.now() + timedelta(days=8))
+    assert counts() == {}
+    assert not NewsCommentBucket.objects.exists()
+
+
+@pytest.mark.django_db
+def test_expired_hour_leaves_all_windows_at_once(comment, new):
+    """Тест: долго не вычитавшийся час выпадает из обоих окон сразу."""
+    ranking.expire_buckets(now=timezone.now() + timedelta(days=8))
+    assert counts() == {}
+    assert not NewsCommentBucket.objects.exists()
+
+
+@pytest.fixture
+def stale_hour(new):
+    """Час двухдневной давности, ещё не вычтенный из суток."""
+    hour = ranking.truncate_hour(timezone.now() - timedelta(days=2))
+    NewsCommentBucket.objects.create(news=new, hour=hour, count=1)
+    NewsDiscussion.objects.bulk_create(
+        NewsDiscussion(news=new, window=window, count=1)
+        for window in ranking.WINDOW_NAMES
+    )
+
+
+@pytest.mark.django_db
+def test_comment_commit_expires_hours(
+        stale_hour, client, author, new, monkeypatch,
+        django_capture_on_commit_callbacks,
+):
+    """Тест: выпавшие часы вычитает запись комментария, а не чтение."""
+    monkeypatch.setattr(ranking, '_last_expiry', None)
+    client.get(reverse('news:discussed'))
+    assert counts() == {(new.pk, 'day'): 1, (new.pk, 'week'): 1}
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=new, author=author, text='Текст')
+    assert counts() == {(new.pk, 'day'): 1, (new.pk, 'week'): 2}
+
+
+@pytest.mark.django_db
+def test_expire_command(stale_hour, new):
+    """Тест: команда вычитает выпавшие часы без новых комментариев."""
+    call_command('expire_discussion_ranking', stdout=StringIO())
+    assert counts() == {(new.pk, 'week'): 1}
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_incremental(author, new):
+    """Тест: команда пересчёта даёт то же, что и сигналы."""
+    now = timezone.now()
+    for days in (0, 2, 5, 10):
+        add_comment(new, author, now - timedelta(days=days, minutes=1))
+    expected = counts()
+    expected_buckets = buckets()
+    call_command('rebuild_discussion_ranking')
+    assert counts() == expected == {(new.pk, 'day'): 1, (new.pk, 'week'): 3}
+    assert buckets() == expected_buckets
+
+
+@pytest.mark.django_db
+def test_discussed_fragment(client, comment, new):
+    """Тест: фрагмент показывает обсуждаемые новости с числом комментариев."""
+    response = client.get(reverse('news:discussed'))
+    assert response.status_code == HTTPStatus.OK
+    assert [item.news for item in response.context['day']] == [new]
+    assert response.context['week'][0].count == 1
+    assert new.title in response.content.decode()
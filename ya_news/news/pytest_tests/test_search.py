@@ -0,0 +1,62 @@
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from news.models import News
+from news.search import FTS_TABLE
+
+
+@pytest.fixture
+def search_news():
+    News.objects.bulk_create((
+        News(title='Погода', text='Завтра в Москве ожидаются новости '
+                                  'о снегопадах <script>.'),
+        News(title='Новости спорта', text='Команда выиграла матч.'),
+        News(title='Кулинария', text='Рецепт пирога.'),
+    ))
+
+
+@pytest.mark.django_db
+def test_search_ranks_and_highlights(client, search_news):
+    """Поиск по префиксу, заголовок весит больше текста, HTML экранирован."""
+    response = client.get(reverse('news:search'), {'q': 'новост'})
+    results = response.context['results']
+    assert [news.title for news in results] == ['Новости спорта', 'Погода']
+    snippet = results[1].highlighted
+    assert '<mark>новости</mark>' in snippet
+    assert '&lt;script&gt;' in snippet
+
+
+@pytest.mark.django_db
+def test_search_index_follows_changes(client, search_news):
+    """Индекс обновляется при изменении и удалении новостей."""
+    url = reverse('news:search_json')
+    news = News.objects.get(title='Кулинария')
+    news.text = 'Рецепт торта.'
+    news.save()
+    assert client.get(url, {'q': 'пирог'}).json()['results'] == []
+    results = client.get(url, {'q': 'торт'}).json()['results']
+    assert [result['id'] for result in results] == [news.pk]
+    news.delete()
+    assert client.get(url, {'q': 'торт'}).json()['results'] == []
+
+
+@pytest.mark.django_db
+def test_search_ignores_query_syntax(client, search_news):
+    """Спецсимволы FTS5 в запросе не приводят к ошибке."""
+    response = client.get(reverse('news:search_json'), {'q': 'матч" (*'})
+    assert len(response.json()['results']) == 1
+
+
+@pytest.mark.django_db
+def test_search_triggers_survive_migrations():
+    """Тест: миграции, пересоздающие news_news, возвращают триггеры."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            "AND tbl_name = 'news_news'"
+        )
+        triggers = {name for name, in cursor.fetchall()}
+    assert triggers == {
+        f'{FTS_TABLE}_insert', f'{FTS_TABLE}_delete', f'{FTS_TABLE}_update'
+    }
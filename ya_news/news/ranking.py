@@ -0,0 +1,269 @@
+"""
+Рейтинг самых обсуждаемых новостей за сутки и за неделю.
+
+Комментарии считаются по часам в NewsCommentBucket, а NewsDiscussion
+хранит сумму часов, ещё входящих в окно. Создание и удаление
+комментария меняет счётчик своего часа и суммы окон, в которые час
+входит. Часы, выпавшие из окна, вычитаются из его сумм функцией
+expire_buckets: её вызывает запись комментариев после COMMIT, не чаще
+раза в NEWS_DISCUSSION_EXPIRE_INTERVAL секунд в процессе, и команда
+expire_discussion_ranking — по расписанию, чтобы рейтинг устаревал и
+без новых комментариев. Чтение топа ничего не пишет: это N строк
+каждого окна по индексу (window, -count), сколько бы ни было
+комментариев.
+
+Расхождения после сбоев исправляет rebuild_ranking (команда
+rebuild_discussion_ranking), которая строит всё заново по news_comment.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import Comment, News, NewsCommentBucket, NewsDiscussion
+
+# Окна от самого короткого к самому длинному: час выпадает из них
+# по порядку, поэтому NewsCommentBucket.expired — номер первого окна,
+# в котором час ещё учтён.
+WINDOWS = (
+    (NewsDiscussion.DAY, timedelta(days=1)),
+    (NewsDiscussion.WEEK, timedelta(days=7)),
+)
+WINDOW_NAMES = tuple(name for name, _ in WINDOWS)
+# Сколько id передавать в одном IN (...).
+CHUNK_SIZE = 500
+
+# Топ каждого окна читается по индексу (window, -count, news).
+TOP_SQL = """
+    SELECT * FROM (
+        SELECT discussion."window", discussion.count, news.id, news.title
+        FROM news_newsdiscussion AS discussion
+        JOIN news_news AS news ON news.id = discussion.news_id
+        WHERE discussion."window" = %s AND discussion.count > 0
+        ORDER BY discussion.count DESC, discussion.news_id
+        LIMIT %s
+    )
+"""
+
+logger = logging.getLogger('news.ranking')
+
+_last_expiry = None
+_expiry_lock = threading.Lock()
+
+
+def truncate_hour(moment):
+    return moment.astimezone(timezone.utc).replace(
+        minute=0, second=0, microsecond=0
+    )
+
+
+def cutoffs(now=None):
+    """Самый ранний час, ещё входящий в каждое окно."""
+    hour = truncate_hour(now or timezone.now())
+    return [hour - length + timedelta(hours=1) for _, length in WINDOWS]
+
+
+def expired_windows(hour, now=None):
+    return sum(hour < cutoff for cutoff in cutoffs(now))
+
+
+def _shift_discussions(news_ids, windows, delta):
+    """Прибавляем delta к суммам окон windows у новостей news_ids."""
+    news_ids = list(news_ids)
+    for start in range(0, len(news_ids), CHUNK_SIZE):
+        NewsDiscussion.objects.filter(
+            news_id__in=news_ids[start:start + CHUNK_SIZE],
+            window__in=windows,
+        ).update(count=F('count') + delta)
+
+
+def _add(news_id, hour, delta, now):
+    bucket = NewsCommentBucket.objects.filter(
+        news_id=news_id, hour=hour
+    ).only('pk', 'expired').first()
+    if bucket is None:
+        # Часа нет: рейтинг ещё не построен или час уже выпал из окон.
+        if delta < 0:
+            return
+        expired = expired_windows(hour, now)
+        NewsCommentBucket.objects.create(
+            news_id=news_id, hour=hour, count=delta, expired=expired
+        )
+        windows = WINDOW_NAMES[expired:]
+        existing = set(NewsDiscussion.objects.filter(
+            news_id=news_id, window__in=windows
+        ).values_list('window', flat=True))
+        NewsDiscussion.objects.bulk_create(
+            NewsDiscussion(news_id=news_id, window=window)
+            for window in windows if window not in existing
+        )
+    else:
+        NewsCommentBucket.objects.filter(pk=bucket.pk).update(
+            count=F('count') + delta
+        )
+        windows = WINDOW_NAMES[bucket.expired:]
+    _shift_discussions([news_id], windows, delta)
+
+
+def record_comments(changes):
+    """
+    Учитываем изменения числа комментариев.
+
+    changes — Counter {(news_id, created): изменение}; комментарии
+    старше самого длинного окна пропускаются.
+    """
+    now = timezone.now()
+    oldest = cutoffs(now)[-1]
+    by_hour = Counter()
+    for (news_id, created), delta in changes.items():
+        hour = truncate_hour(created)
+        # Час старше всех окон не учтён в суммах, даже если его счётчик
+        # ещё не удалён: expire_buckets вычтет его целиком.
+        if hour >= oldest:
+            by_hour[news_id, hour] += delta
+    # Обычно вызывается из сигнала внутри транзакции сохранения
+    # комментария, точка сохранения там не нужна.
+    with transaction.atomic(savepoint=False):
+        for (news_id, hour), delta in by_hour.items():
+            if delta:
+                _add(news_id, hour, delta, now)
+    transaction.on_commit(maybe_expire_buckets)
+
+
+def _subtract_leaving(rows, limits):
+    for index, window in enumerate(WINDOW_NAMES):
+        # Час, долго не попадавший сюда, мог выпасть сразу из
+        # нескольких окон.
+        totals = Counter()
+        for _, news_id, count, hour, expired in rows:
+            if expired <= index and hour < limits[index]:
+                totals[news_id] += count
+        by_total = defaultdict(list)
+        for news_id, total in totals.items():
+            by_total[total].append(news_id)
+        for total, news_ids in by_total.items():
+            _shift_discussions(news_ids, [window], -total)
+
+
+def _mark_expired(rows, limits):
+    by_expired = defaultdict(list)
+    for pk, _, _, hour, _ in rows:
+        by_expired[sum(hour < cutoff for cutoff in limits)].append(pk)
+    for expired, pks in by_expired.items():
+        for start in range(0, len(pks), CHUNK_SIZE):
+            buckets = NewsCommentBucket.objects.filter(
+                pk__in=pks[start:start + CHUNK_SIZE]
+            )
+            if expired == len(WINDOWS):
+                buckets.delete()
+            else:
+                buckets.update(expired=expired)
+
+
+def expire_buckets(now=None):
+    """Вычитаем из сумм окон часы, которые из них выпали."""
+    limits = cutoffs(now)
+    expiring = Q()
+    for index, cutoff in enumerate(limits):
+        expiring |= Q(expired=index, hour__lt=cutoff)
+    with transaction.atomic():
+        # Строки блокируются, чтобы два процесса не вычли один час
+        # дважды; SQLite вместо этого не даст второму записать.
+        rows = list(NewsCommentBucket.objects.select_for_update().filter(
+            expiring
+        ).values_list('pk', 'news_id', 'count', 'hour', 'expired'))
+        if not rows:
+            return
+        _subtract_leaving(rows, limits)
+        _mark_expired(rows, limits)
+        NewsDiscussion.objects.filter(count__lte=0).delete()
+
+
+def maybe_expire_buckets():
+    """
+    Вычитаем выпавшие часы, если в этом процессе давно этого не делали.
+
+    Вызывается после COMMIT записи комментария: ошибка здесь не должна
+    превращать уже сохранённый комментарий в ответ 500, а часы вычтет
+    следующий вызов.
+    """
+    global _last_expiry
+    interval = settings.NEWS_DISCUSSION_EXPIRE_INTERVAL
+    with _expiry_lock:
+        now = time.monotonic()
+        if _last_expiry is not None and now - _last_expiry < interval:
+            return
+        _last_expiry = now
+    try:
+        expire_buckets()
+    except DatabaseError:
+        logger.exception('Не удалось вычесть устаревшие часы рейтинга.')
+
+
+def top_discussed(limit=None):
+    """
+    Самые обсуждаемые новости каждого окна одним запросом.
+
+    Возвращает {окно: [NewsDiscussion, ...]}; у новостей загружены
+    только id и заголовок.
+    """
+    limit = limit or settings.NEWS_DISCUSSED_COUNT
+    sql = ' UNION ALL '.join([TOP_SQL] * len(WINDOW_NAMES))
+    params = [value for window in WINDOW_NAMES for value in (window, limit)]
+    ranking = {window: [] for window in WINDOW_NAMES}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for window, count, news_id, title in cursor.fetchall():
+            news = News.from_db(
+                connection.alias, ['id', 'title'], [news_id, title]
+            )
+            ranking[window].append(
+                NewsDiscussion(news=news, window=window, count=count)
+            )
+    return ranking
+
+
+def rebuild_ranking(now=None):
+    """Строим часы и суммы окон заново по таблице комментариев."""
+    now = now or timezone.now()
+    limits = cutoffs(now)
+    rows = Comment.objects.filter(created__gte=limits[-1]).annotate(
+        bucket=TruncHour('created', tzinfo=timezone.utc)
+    ).order_by().values('news_id', 'bucket').annotate(total=Count('pk'))
+    with transaction.atomic():
+        NewsCommentBucket.objects.all().delete()
+        NewsDiscussion.objects.all().delete()
+        NewsCommentBucket.objects.bulk_create(
+            (
+                NewsCommentBucket(
+                    news_id=row['news_id'],
+                    hour=row['bucket'],
+                    count=row['total'],
+                    expired=sum(row['bucket'] < cutoff for cutoff in limits),
+                )
+                for row in rows.iterator()
+            ),
+            batch_size=CHUNK_SIZE,
+        )
+        for index, window in enumerate(WINDOW_NAMES):
+            NewsDiscussion.objects.bulk_create(
+                (
+                    NewsDiscussion(
+                        news_id=row['news_id'], window=window,
+                        count=row['total'],
+                    )
+                    for row in NewsCommentBucket.objects.filter(
+                        expired__lte=index
+                    ).order_by().values('news_id').annotate(
+                        total=Sum('count')
+                    ).iterator()
+                ),
+                batch_size=CHUNK_SIZE,
+            )
@@ -0,0 +1,90 @@
+"""
+Полнотекстовый поиск по новостям на индексе SQLite FTS5.
+
+Таблица news_news_fts хранит только индекс (content='news_news'),
+а триггеры на news_news поддерживают его в актуальном состоянии при
+любой записи, включая bulk_create и правки через SQL.
+"""
+from django.conf import settings
+from django.db import connection
+
+from yacommon.search import (
+    MARK_END, MARK_START, highlight, match_terms, query_words,
+)
+
+from .models import News
+
+FTS_TABLE = 'news_news_fts'
+
+CREATE_INDEX_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, text,
+        content='news_news', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+)
+CREATE_TRIGGERS_SQL = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert
+    AFTER INSERT ON news_news BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete
+    AFTER DELETE ON news_news BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF title, text ON news_news BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+)
+REBUILD_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+SEARCH_SQL = f"""
+    SELECT news_news.*,
+           snippet({FTS_TABLE}, -1, %s, %s, '…', 16) AS snippet,
+           bm25({FTS_TABLE}, 10.0, 1.0) AS rank
+    FROM {FTS_TABLE}
+    JOIN news_news ON news_news.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s
+    ORDER BY rank
+    LIMIT %s
+"""
+
+
+def rebuild_search_index():
+    """Перестраиваем индекс по текущему содержимому news_news."""
+    with connection.cursor() as cursor:
+        for sql in CREATE_INDEX_SQL + CREATE_TRIGGERS_SQL:
+            cursor.execute(sql)
+        cursor.execute(REBUILD_SQL)
+
+
+def build_match(query):
+    """Превращаем пользовательский запрос в выражение MATCH."""
+    return match_terms(query_words(query, settings.NEWS_SEARCH_MAX_WORDS))
+
+
+def search_news(query, limit=None):
+    """Новости по запросу в порядке bm25 с подсвеченным фрагментом."""
+    match = build_match(query)
+    if not match:
+        return []
+    limit = limit or settings.NEWS_SEARCH_RESULTS
+    results = list(News.objects.raw(
+        SEARCH_SQL, (MARK_START, MARK_END, match, limit)
+    ))
+    for news in results:
+        news.highlighted = highlight(news.snippet)
+    return results
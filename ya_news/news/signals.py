@@ -0,0 +1,170 @@
+from collections import Counter, defaultdict
+from datetime import date
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .forms import bad_words
+from .fragments import forget_comment, forget_teaser
+from .pagecache import invalidate_news
+from .ranking import record_comments
+from .models import BadWord, Comment, News, NewsMonth, make_excerpt
+
+# Отправляются после массовой вставки, для которой post_save
+# не вызывается. Аргументы: news или comments — список объектов.
+news_bulk_created = Signal()
+comments_bulk_created = Signal()
+
+# Сколько id передавать в одном IN (...): SQLite ограничивает
+# число параметров запроса.
+UPDATE_CHUNK_SIZE = 500
+
+
+def shift_news_month(day, delta):
+    """Изменяем количество новостей за месяц даты day на delta."""
+    day = News._meta.get_field('date').to_python(day)
+    month, _ = NewsMonth.objects.get_or_create(
+        year=day.year, month=day.month
+    )
+    NewsMonth.objects.filter(pk=month.pk).update(count=F('count') + delta)
+
+
+@receiver(pre_save, sender=News)
+def fill_news_excerpt(sender, instance, **kwargs):
+    """Пересчитываем анонс при любом сохранении, в том числе из loaddata."""
+    instance.excerpt = make_excerpt(instance.text)
+
+
+@receiver(pre_save, sender=News)
+def remember_news_date(sender, instance, raw=False, **kwargs):
+    """Запоминаем прежнюю дату новости, чтобы перенести её в архиве."""
+    if raw and instance.modified is None:
+        # loaddata сохраняет без pre_save полей, auto_now не срабатывает.
+        instance.modified = timezone.now()
+    instance._previous_date = None
+    if instance.pk is not None:
+        instance._previous_date = News.objects.filter(
+            pk=instance.pk
+        ).values_list('date', flat=True).first()
+
+
+@receiver(post_save, sender=News)
+def news_saved(sender, instance, **kwargs):
+    """Обновляем счётчики месяцев архива."""
+    previous = instance._previous_date
+    if (
+        previous is not None
+        and (previous.year, previous.month)
+        == (instance.date.year, instance.date.month)
+    ):
+        return
+    if previous is not None:
+        shift_news_month(previous, -1)
+    shift_news_month(instance.date, 1)
+
+
+@receiver(news_bulk_created, sender=News)
+def news_created(sender, news, **kwargs):
+    """Обновляем счётчики месяцев архива после массовой вставки."""
+    months = Counter(
+        (item.date.year, item.date.month) for item in news
+    )
+    for (year, month), count in months.items():
+        shift_news_month(date(year, month, 1), count)
+
+
+@receiver(post_delete, sender=News)
+def news_deleted(sender, instance, **kwargs):
+    shift_news_month(instance.date, -1)
+    forget_teaser(instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw, **kwargs):
+    """Увеличиваем счётчик комментариев и отмечаем изменение новости."""
+    if raw:
+        return
+    changes = {'modified': timezone.now()}
+    if created:
+        changes['comment_count'] = F('comment_count') + 1
+    News.objects.filter(pk=instance.news_id).update(**changes)
+
+
+@receiver(comments_bulk_created, sender=Comment)
+def comments_created(sender, comments, **kwargs):
+    """
+    Увеличиваем счётчики комментариев новостей после bulk_create.
+
+    Новости с одинаковым приростом обновляются одним запросом,
+    поэтому запросов столько, сколько разных приростов в пачке.
+    """
+    counts = Counter(comment.news_id for comment in comments)
+    by_increment = defaultdict(list)
+    for news_id, count in counts.items():
+        by_increment[count].append(news_id)
+    now = timezone.now()
+    for count, news_ids in by_increment.items():
+        for start in range(0, len(news_ids), UPDATE_CHUNK_SIZE):
+            News.objects.filter(
+                pk__in=news_ids[start:start + UPDATE_CHUNK_SIZE]
+            ).update(comment_count=F('comment_count') + count, modified=now)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Уменьшаем счётчик комментариев новости и убираем его из кеша."""
+    News.objects.filter(pk=instance.news_id).update(
+        comment_count=F('comment_count') - 1, modified=timezone.now()
+    )
+    forget_comment(instance)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def news_page_changed(sender, instance, **kwargs):
+    """Новость могла войти на главную, уйти с неё или измениться."""
+    invalidate_news([instance.pk], home_changed=True)
+
+
+@receiver(news_bulk_created, sender=News)
+def news_pages_created(sender, news, **kwargs):
+    invalidate_news((item.pk for item in news), home_changed=True)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_page_changed(sender, instance, **kwargs):
+    invalidate_news([instance.news_id])
+
+
+@receiver(comments_bulk_created, sender=Comment)
+def comment_pages_changed(sender, comments, **kwargs):
+    invalidate_news(comment.news_id for comment in comments)
+
+
+@receiver(post_save, sender=Comment)
+def comment_ranked(sender, instance, created, raw, **kwargs):
+    """Учитываем новый комментарий в рейтинге обсуждаемых."""
+    if created and not raw:
+        record_comments(Counter({(instance.news_id, instance.created): 1}))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_unranked(sender, instance, **kwargs):
+    record_comments(Counter({(instance.news_id, instance.created): -1}))
+
+
+@receiver(comments_bulk_created, sender=Comment)
+def comments_ranked(sender, comments, **kwargs):
+    record_comments(Counter(
+        (comment.news_id, comment.created) for comment in comments
+    ))
+
+
+@receiver(post_save, sender=BadWord)
+@receiver(post_delete, sender=BadWord)
+def bad_words_changed(sender, **kwargs):
+    """Пересобираем автомат запрещённых слов в этом процессе."""
+    bad_words.invalidate()
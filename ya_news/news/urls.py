@@ -1,12 +1,52 @@
+from django.conf import settings
 from django.urls import path
 
 from news import views
 
 app_name = 'news'
 
+# Под ASGI страницы чтения выполняются в пуле потоков,
+# см. yacommon/concurrency.py.
+if settings.ASYNC_VIEWS:
+    news_list = views.NewsListAsync.as_view()
+    news_detail = views.NewsDetailViewAsync.as_view()
+else:
+    news_list = views.NewsList.as_view()
+    news_detail = views.NewsDetailView.as_view()
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', news_list, name='home'),
+    path('archive/', views.NewsArchive.as_view(), name='archive'),
+    path(
+        'archive/<int:year>/<int:month>/',
+        views.NewsArchive.as_view(),
+        name='archive_month'
+    ),
+    path('discussed/', views.NewsDiscussed.as_view(), name='discussed'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('search/json/', views.NewsSearchJson.as_view(), name='search_json'),
+    path('news/<int:pk>/', news_detail, name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsCommentsFragment.as_view(),
+        name='comments'
+    ),
+    path('api/news/', views.NewsApiList.as_view(), name='api_list'),
+    path(
+        'api/news/<int:pk>/',
+        views.NewsApiDetail.as_view(),
+        name='api_detail'
+    ),
+    path(
+        'api/news/<int:pk>/comments/',
+        views.NewsApiComments.as_view(),
+        name='api_comments'
+    ),
+    path(
+        'api/export/<slug:name>.ndjson',
+        views.NewsApiExport.as_view(),
+        name='api_export'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
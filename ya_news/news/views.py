@@ -1,13 +1,44 @@
+from datetime import date
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
 
+from yacommon.concurrency import AsyncViewMixin
+from yacommon.pagination import paginate_keyset
+
+from . import api, conditions, pagecache
 from .forms import CommentForm
-from .models import Comment, News
+from .ingest import get_comment_writer, get_ingestion_settings
+from .models import Comment, News, NewsDiscussion, NewsMonth
+from .ranking import top_discussed
+from .search import search_news
+
+COMMENTS_ORDERING = ('created', 'id')
+NEWS_ORDERING = (*News._meta.ordering, '-id')
+
+
+def get_comments_page(news_id, cursor=None):
+    """Страница комментариев новости по курсору (created, id)."""
+    return paginate_keyset(
+        Comment.objects.filter(news_id=news_id).select_related('author'),
+        COMMENTS_ORDERING,
+        cursor=cursor,
+        per_page=settings.COMMENTS_COUNT_ON_PAGE,
+    )
 
 
+@method_decorator(pagecache.cache_anonymous_page, name='get')
+@method_decorator(
+    conditions.conditional_page(
+        conditions.home_etag, conditions.home_last_modified
+    ),
+    name='get'
+)
 class NewsList(generic.ListView):
     """Список новостей."""
     model = News
@@ -18,10 +49,132 @@ class NewsList(generic.ListView):
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
+        Число комментариев берётся из поля comment_count, а анонс — из
+        поля excerpt, поэтому ни таблица комментариев, ни полный текст
+        новостей не читаются.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.defer('text')[
+            :settings.NEWS_COUNT_ON_HOME_PAGE
+        ]
+
+
+class NewsArchive(generic.TemplateView):
+    """
+    Архив новостей с постраничным выводом по курсору (date, id).
+
+    Количество новостей по месяцам берётся из NewsMonth,
+    поэтому любая страница архива стоит столько же, сколько первая.
+    """
+    template_name = 'news/archive.html'
+
+    def get_month_range(self):
+        """Границы выбранного месяца или None для всего архива."""
+        if 'year' not in self.kwargs:
+            return None
+        year, month = self.kwargs['year'], self.kwargs['month']
+        try:
+            start = date(year, month, 1)
+            end = date(year + month // 12, month % 12 + 1, 1)
+        except ValueError:
+            raise Http404('Такого месяца не существует.')
+        return start, end
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        queryset = News.objects.all()
+        month_range = self.get_month_range()
+        if month_range is not None:
+            start, end = month_range
+            queryset = queryset.filter(date__gte=start, date__lt=end)
+            context['month'] = start
+        context['months'] = NewsMonth.objects.filter(count__gt=0)
+        context['page'] = paginate_keyset(
+            queryset,
+            NEWS_ORDERING,
+            cursor=self.request.GET.get('after'),
+            per_page=settings.NEWS_COUNT_ON_ARCHIVE_PAGE,
+        )
+        return context
+
+
+class NewsSearch(generic.TemplateView):
+    """Поиск по заголовкам и текстам новостей."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        context['results'] = search_news(context['query'])
+        return context
+
+
+class NewsSearchJson(generic.View):
+    """Поиск по новостям в формате JSON."""
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get('q', '')
+        results = [
+            {
+                'id': news.pk,
+                'title': news.title,
+                'date': news.date,
+                'url': reverse('news:detail', args=(news.pk,)),
+                'snippet': news.highlighted,
+            }
+            for news in search_news(query)
+        ]
+        return JsonResponse({'query': query, 'results': results})
+
+
+class NewsApiList(generic.View):
+    """Список новостей в JSON, страницы по курсору (date, id)."""
+
+    def get(self, request, *args, **kwargs):
+        page = paginate_keyset(
+            News.objects.only(*api.NEWS_LIST_FIELDS),
+            NEWS_ORDERING,
+            cursor=request.GET.get('after'),
+            per_page=settings.NEWS_API_PAGE_SIZE,
+        )
+        results = [api.news_to_dict(news) for news in page]
+        return JsonResponse(api.page_to_dict(page, results, request.path))
+
+
+class NewsApiDetail(generic.View):
+    """Новость с полным текстом в JSON."""
+
+    def get(self, request, *args, **kwargs):
+        news = get_object_or_404(News, pk=kwargs['pk'])
+        return JsonResponse(api.news_to_dict(news, api.NEWS_FIELDS))
+
+
+class NewsApiComments(generic.View):
+    """Комментарии новости в JSON, страницы по курсору (created, id)."""
+
+    def get(self, request, *args, **kwargs):
+        page = get_comments_page(kwargs['pk'], request.GET.get('after'))
+        # Новость проверяется, только если комментариев не нашлось.
+        if not page and not News.objects.filter(pk=kwargs['pk']).exists():
+            raise Http404('Новость не найдена.')
+        results = [api.comment_to_dict(comment) for comment in page]
+        return JsonResponse(api.page_to_dict(page, results, request.path))
+
+
+class NewsApiExport(generic.View):
+    """Выгрузка всех новостей или комментариев потоком NDJSON."""
+
+    def get(self, request, *args, **kwargs):
+        name = kwargs['name']
+        if name not in api.EXPORTS:
+            raise Http404('Такой выгрузки нет.')
+        response = StreamingHttpResponse(
+            api.export_lines(name),
+            content_type='application/x-ndjson; charset=utf-8',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{name}.ndjson"'
+        )
+        return response
 
 
 class NewsDetail(generic.DetailView):
@@ -29,14 +182,16 @@ class NewsDetail(generic.DetailView):
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
+        """
+        Выводим только первую страницу комментариев.
+
+        Следующие страницы отдаёт NewsCommentsFragment.
+        """
         context = super().get_context_data(**kwargs)
+        context['comments'] = get_comments_page(self.object.pk)
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
@@ -55,20 +210,42 @@ class NewsComment(
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments'] = get_comments_page(self.object.pk)
+        return context
+
     def form_valid(self, form):
+        """
+        Сохраняем комментарий сразу или через очередь записи.
+
+        В режиме очереди ждём, пока пачка с комментарием будет
+        зафиксирована, поэтому после редиректа автор его увидит.
+        """
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        ingestion = get_ingestion_settings()
+        if ingestion['ENABLED']:
+            get_comment_writer().submit(comment).result(
+                timeout=ingestion['TIMEOUT']
+            )
+        else:
+            comment.save()
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
 
+    @method_decorator(pagecache.cache_anonymous_page)
+    @method_decorator(conditions.conditional_page(
+        conditions.detail_etag, conditions.detail_last_modified
+    ))
     def get(self, request, *args, **kwargs):
         view = NewsDetail.as_view()
         return view(request, *args, **kwargs)
@@ -78,14 +255,52 @@ class NewsDetailView(generic.View):
         return view(request, *args, **kwargs)
 
 
+class NewsListAsync(AsyncViewMixin, NewsList):
+    """Список новостей для запуска под ASGI."""
+
+
+class NewsDetailViewAsync(AsyncViewMixin, NewsDetailView):
+    """Новость с комментариями для запуска под ASGI."""
+
+
+class NewsCommentsFragment(generic.TemplateView):
+    """Следующая страница комментариев без повторной отрисовки новости."""
+    template_name = 'news/includes/comments.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        news = get_object_or_404(News.objects.only('id'), pk=self.kwargs['pk'])
+        context['news_id'] = news.pk
+        context['comments'] = get_comments_page(
+            news.pk, self.request.GET.get('after')
+        )
+        return context
+
+
+class NewsDiscussed(generic.TemplateView):
+    """
+    Самые обсуждаемые новости за сутки и за неделю.
+
+    Главная загружает этот фрагмент отдельно, поэтому новый
+    комментарий не сбрасывает кеш самой главной.
+    """
+    template_name = 'news/includes/discussed.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        ranking = top_discussed()
+        context['day'] = ranking[NewsDiscussion.DAY]
+        context['week'] = ranking[NewsDiscussion.WEEK]
+        return context
+
+
 class CommentBase(LoginRequiredMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
@@ -1,9 +1,16 @@
+import os
+import sys
+import tempfile
 from pathlib import Path
 
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий код проектов, пакет yacommon, лежит в корне репозитория.
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.append(str(BASE_DIR.parent))
+
 SECRET_KEY = 'django-insecure-7)dgs++2!#==aye4rd=5)c)bw0eokiyqx0hts6#t80!$c&$s+('
 
 DEBUG = True
@@ -22,6 +29,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'yacommon.middleware.query_stats_middleware',
+    'yacommon.nplusone.nplusone_middleware',
+    'yacommon.db.read_only_request_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -58,6 +68,48 @@ DATABASES = {
     }
 }
 
+# Боевой режим SQLite, см. yacommon/db.py: WAL и PRAGMA для каждого
+# подключения, постоянные подключения и отдельное подключение для чтения.
+SQLITE_PRODUCTION = os.environ.get('DJANGO_SQLITE_PRODUCTION') == '1'
+
+SQLITE_PRAGMAS = {}
+
+DATABASE_READ_ALIAS = None
+
+if SQLITE_PRODUCTION:
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_READ_ALIAS = 'replica'
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+    }
+
+DATABASE_ROUTERS = ['yacommon.db.ReadReplicaRouter']
+
+# default — отрисованные анонсы новостей и комментарии, см. news/fragments.py.
+# pages — кеш целых страниц: его сбросы должны видеть все процессы сервера,
+# поэтому он не в памяти процесса. С Memcached или Redis укажите их здесь.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'NEWS_PAGE_CACHE_DIR',
+            Path(tempfile.gettempdir()) / 'yanews-page-cache',
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -79,4 +131,52 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
+# Асинхронные страницы чтения включает yanews/asgi.py.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+
+# Потоки для работы с базой асинхронных представлений.
+ASYNC_VIEW_THREADS = 8
+
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+NEWS_COUNT_ON_ARCHIVE_PAGE = 20
+
+COMMENTS_COUNT_ON_PAGE = 50
+
+NEWS_SEARCH_RESULTS = 20
+
+NEWS_API_PAGE_SIZE = 20
+
+# Рейтинг обсуждаемых: размер топа и как часто запись комментариев вычитает
+# старые часы; без комментариев их вычитает expire_discussion_ranking.
+NEWS_DISCUSSED_COUNT = 5
+
+NEWS_DISCUSSION_EXPIRE_INTERVAL = 60
+
+NEWS_SEARCH_MAX_WORDS = 10
+
+# Запись комментариев через очередь: один поток сохраняет их пачками.
+NEWS_COMMENT_INGESTION = {
+    'ENABLED': False,
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 0.05,
+    'TIMEOUT': 10,
+}
+
+# Кеш целых страниц для анонимных читателей, см. news/pagecache.py.
+NEWS_PAGE_CACHE = {
+    'ENABLED': True,
+    'CACHE': 'pages',
+    'TIMEOUT': 60 * 60,
+    'LOCK_TIMEOUT': 10,
+    'WAIT': 2,
+}
+
+# Файл с дополнительными запрещёнными словами, по слову в строке.
+NEWS_BAD_WORDS_FILE = None
+
+NEWS_BAD_WORDS_RELOAD_INTERVAL = 60
+
+# Поиск N+1: None, 'log' или 'raise'; порог — число одинаковых SELECT.
+NPLUSONE_MODE = 'log' if DEBUG else None
+NPLUSONE_THRESHOLD = 3
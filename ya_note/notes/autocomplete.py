@@ -0,0 +1,193 @@
+"""
+Подсказки заголовков заметок по первым буквам.
+
+Для каждого пользователя в памяти процесса хранится отсортированный
+список ключей его заголовков (нижний регистр, «ё» как «е»), и
+подсказки — это двоичный поиск начала префикса и несколько следующих
+элементов, без запросов к базе. Список строится при первом обращении
+одним запросом по индексу (author, id) и дальше меняется сигналами
+после фиксации транзакции.
+
+Изменения из других процессов сигналы не видят, поэтому список
+перестраивается не реже раза в NOTES_AUTOCOMPLETE_MAX_AGE секунд.
+Списки давно не обращавшихся пользователей вытесняются, когда общий
+размер превышает NOTES_AUTOCOMPLETE_MEMORY байт; список, к которому
+только что обратились, остаётся, даже если он один больше лимита.
+Размер оценивается по sys.getsizeof строк и кортежей.
+"""
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Note
+
+YO = str.maketrans('ёЁ', 'еЕ')
+# Указатель в списке и сам кортеж: (ключ, id, заголовок, адрес).
+ENTRY_OVERHEAD = 8 + sys.getsizeof((None,) * 4)
+
+
+def normalize(title):
+    """Ключ сравнения: без регистра, «ё» как «е», пробелы схлопнуты."""
+    return ' '.join(title.translate(YO).casefold().split())
+
+
+def entry_size(entry):
+    key, pk, title, slug = entry
+    return (
+        ENTRY_OVERHEAD + sys.getsizeof(key) + sys.getsizeof(pk)
+        + sys.getsizeof(title) + sys.getsizeof(slug)
+    )
+
+
+class TitleIndex:
+    """Отсортированные заголовки одного пользователя."""
+
+    def __init__(self, rows):
+        self.entries = sorted(
+            (normalize(title), pk, title, slug) for pk, title, slug in rows
+        )
+        self.keys = {entry[1]: entry for entry in self.entries}
+        self.size = sum(map(entry_size, self.entries))
+        self.built_at = time.monotonic()
+
+    def complete(self, prefix, limit):
+        """Первые limit заголовков, начинающихся с prefix."""
+        prefix = normalize(prefix)
+        start = bisect_left(self.entries, (prefix,))
+        results = []
+        for entry in self.entries[start:start + limit]:
+            if not entry[0].startswith(prefix):
+                break
+            results.append(entry)
+        return results
+
+    def remove(self, pk):
+        entry = self.keys.pop(pk, None)
+        if entry is not None:
+            del self.entries[bisect_left(self.entries, entry)]
+            self.size -= entry_size(entry)
+
+    def add(self, pk, title, slug):
+        """Добавляем заголовок или заменяем прежний заголовок заметки."""
+        self.remove(pk)
+        entry = (normalize(title), pk, title, slug)
+        insort(self.entries, entry)
+        self.keys[pk] = entry
+        self.size += entry_size(entry)
+
+
+class TitleIndexes:
+    """Списки заголовков пользователей с вытеснением давно не нужных."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = OrderedDict()
+        # Номер последнего изменения: по нему видно, что заметки
+        # менялись, пока список строился.
+        self._version = 0
+        self.size = 0
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+            self.size = 0
+
+    def _is_stale(self, index):
+        max_age = settings.NOTES_AUTOCOMPLETE_MAX_AGE
+        return time.monotonic() - index.built_at > max_age
+
+    def _build(self, author_id):
+        rows = Note.objects.filter(author_id=author_id).values_list(
+            'id', 'title', 'slug'
+        )
+        return TitleIndex(rows.iterator())
+
+    def _evict(self, keep):
+        limit = settings.NOTES_AUTOCOMPLETE_MEMORY
+        while self.size > limit and len(self._indexes) > 1:
+            author_id = next(iter(self._indexes))
+            if author_id == keep:
+                self._indexes.move_to_end(author_id)
+                continue
+            self.size -= self._indexes.pop(author_id).size
+
+    def index(self, author_id):
+        with self._lock:
+            index = self._indexes.get(author_id)
+            if index is not None and not self._is_stale(index):
+                self._indexes.move_to_end(author_id)
+                return index
+            version = self._version
+        # Строим без блокировки: запрос к базе не должен задерживать
+        # подсказки других пользователей.
+        index = self._build(author_id)
+        with self._lock:
+            if version != self._version:
+                # Изменение могло не попасть ни в прочитанные строки, ни
+                # в список: пересоберём его при следующем обращении.
+                index.built_at = float('-inf')
+            previous = self._indexes.pop(author_id, None)
+            if previous is not None:
+                self.size -= previous.size
+            self._indexes[author_id] = index
+            self.size += index.size
+            self._evict(keep=author_id)
+        return index
+
+    def complete(self, author_id, prefix, limit=None):
+        limit = limit or settings.NOTES_AUTOCOMPLETE_RESULTS
+        if not normalize(prefix):
+            return []
+        return [
+            {'title': title, 'slug': slug}
+            for _, _, title, slug in self.index(author_id).complete(
+                prefix, limit
+            )
+        ]
+
+    def _change(self, index, change):
+        self.size -= index.size
+        change(index)
+        self.size += index.size
+
+    def note_saved(self, author_id, pk, title, slug):
+        """Меняем загруженные списки; незагруженный построится сам."""
+        with self._lock:
+            self._version += 1
+            # У заметки мог смениться автор: убираем её из чужих списков.
+            for other_id, index in self._indexes.items():
+                if other_id != author_id and pk in index.keys:
+                    self._change(index, lambda index: index.remove(pk))
+            index = self._indexes.get(author_id)
+            if index is not None:
+                self._change(index, lambda index: index.add(pk, title, slug))
+
+    def note_deleted(self, author_id, pk):
+        with self._lock:
+            self._version += 1
+            index = self._indexes.get(author_id)
+            if index is not None:
+                self._change(index, lambda index: index.remove(pk))
+
+
+title_indexes = TitleIndexes()
+
+
+@receiver(post_save, sender=Note)
+def note_saved(sender, instance, **kwargs):
+    """Меняем подсказки, только если транзакция зафиксирована."""
+    values = (instance.author_id, instance.pk, instance.title, instance.slug)
+    transaction.on_commit(lambda: title_indexes.note_saved(*values))
+
+
+@receiver(post_delete, sender=Note)
+def note_deleted(sender, instance, **kwargs):
+    values = (instance.author_id, instance.pk)
+    transaction.on_commit(lambda: title_indexes.note_deleted(*values))
@@ -0,0 +1,110 @@
+"""
+Текстовое поле, которое сжимает большие значения.
+
+Текст от NOTES_TEXT_COMPRESSION_THRESHOLD байт в UTF-8 сохраняется
+как BLOB со сжатием zlib, меньший — обычной строкой в том же столбце
+TEXT: SQLite хранит в столбце значение любого типа. Поэтому включение
+сжатия не требует переписывать таблицу, а старые строки продолжают
+читаться как есть; сжать их можно командой compress_note_texts.
+
+Из базы сжатое значение приходит как CompressedText и распаковывается
+при первом обращении к атрибуту модели, так что страницы, которым
+текст не нужен, не тратят на это время. Поиск по столбцу в SQL
+(icontains и т. п.) видит сжатые значения как BLOB; сжатые тексты в
+полнотекстовый индекс добавляет приложение, см. search.py.
+"""
+import zlib
+
+from django.conf import settings
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+COMPRESSION_LEVEL = 6
+
+
+class CompressedText(bytes):
+    """Сжатый текст из базы, ещё не распакованный."""
+
+
+def compress(text, threshold):
+    """
+    Значение для базы: строка как есть или сжатые байты.
+
+    Сжимаем, только если текст не меньше threshold байт и сжатие
+    действительно уменьшает его.
+    """
+    # В UTF-8 символ занимает не больше четырёх байт.
+    if threshold is None or len(text) * 4 < threshold:
+        return text
+    encoded = text.encode()
+    if len(encoded) < threshold:
+        return text
+    compressed = zlib.compress(encoded, COMPRESSION_LEVEL)
+    if len(compressed) >= len(encoded):
+        return text
+    return compressed
+
+
+def may_be_compressed(value, threshold):
+    """Могло ли значение сохраниться сжатым: проверка по размеру, без zlib."""
+    if isinstance(value, CompressedText):
+        return True
+    if threshold is None or len(value) * 4 < threshold:
+        return False
+    return len(value.encode()) >= threshold
+
+
+def decompress(value):
+    """Текст из значения столбца: строки возвращаются как есть."""
+    if isinstance(value, (bytes, memoryview)):
+        return zlib.decompress(value).decode()
+    return value
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """
+    Распаковываем текст при первом обращении и запоминаем его.
+
+    В отличие от DeferredAttribute задаёт и __set__: иначе значение из
+    __dict__ экземпляра читалось бы в обход __get__.
+    """
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedText):
+            value = decompress(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+
+class CompressedTextField(models.TextField):
+    descriptor_class = CompressedTextDescriptor
+
+    def from_db_value(self, value, expression, connection):
+        if isinstance(value, bytes):
+            return CompressedText(value)
+        return value
+
+    def pre_save(self, model_instance, add):
+        # Значение без распаковки: сохранение заметки, текст которой не
+        # читали, не должно его распаковывать и сжимать заново.
+        return model_instance.__dict__[self.attname]
+
+    def to_python(self, value):
+        if isinstance(value, CompressedText):
+            return decompress(value)
+        return super().to_python(value)
+
+    def get_prep_value(self, value):
+        # Нераспакованный текст сохраняется без повторного сжатия.
+        if isinstance(value, CompressedText):
+            return bytes(value)
+        value = super().get_prep_value(value)
+        if value is None:
+            return value
+        return compress(value, settings.NOTES_TEXT_COMPRESSION_THRESHOLD)
@@ -1,5 +1,3 @@
-from pytils.translit import slugify
-
 from django import forms
 from django.core.exceptions import ValidationError
 
@@ -14,16 +12,40 @@ class NoteForm(forms.ModelForm):
     class Meta:
         model = Note
         fields = ('title', 'text', 'slug')
+        widgets = {
+            'title': forms.TextInput(attrs={
+                'list': 'note-titles', 'autocomplete': 'off',
+            }),
+        }
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
+        """
+        Обрабатывает случай, если slug не уникален.
+
+        Пустой slug не проверяется: свободный адрес подберёт модель при
+        сохранении.
+        """
+        slug = self.cleaned_data.get('slug')
+        if slug and Note.objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
             raise ValidationError(slug + WARNING)
         return slug
+
+    def validate_unique(self):
+        """
+        Проверяем уникальность полей формы, кроме slug.
+
+        slug уже проверен в clean_slug, повторная проверка модели
+        выполнила бы тот же запрос ещё раз. Поля не из формы и поля с
+        ошибками не проверяются, как и в ModelForm.
+        """
+        exclude = [
+            field.name for field in Note._meta.get_fields()
+            if field.name not in self.fields
+        ]
+        exclude += ['slug', *self.errors]
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as error:
+            self.add_error(None, error)
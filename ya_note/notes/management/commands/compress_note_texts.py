@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from notes import search
+from notes.fields import decompress
+from notes.models import Note
+
+# Строки, которые нужно сжать: несжатый текст от порога в байтах.
+UNCOMPRESSED_SQL = """
+    SELECT id FROM notes_note
+    WHERE id > %s AND typeof(text) = 'text'
+      AND length(CAST(text AS BLOB)) >= %s
+    ORDER BY id
+    LIMIT %s
+"""
+COMPRESSED_SQL = """
+    SELECT id FROM notes_note
+    WHERE id > %s AND typeof(text) = 'blob'
+    ORDER BY id
+    LIMIT %s
+"""
+TEXTS_SQL = 'SELECT id, text FROM notes_note WHERE id IN ({})'
+DECOMPRESS_SQL = 'UPDATE notes_note SET text = %s WHERE id = %s'
+SIZE_SQL = (
+    'SELECT coalesce(sum(length(CAST(text AS BLOB))), 0) FROM notes_note'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сжимает тексты заметок от NOTES_TEXT_COMPRESSION_THRESHOLD байт, '
+        'сохранённые до включения сжатия, или распаковывает все тексты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--decompress', action='store_true',
+            help='Сохранить все тексты несжатыми, например перед '
+                 'отключением сжатия.',
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        before = self.text_size()
+        if options['decompress']:
+            count = self.decompress()
+        else:
+            threshold = settings.NOTES_TEXT_COMPRESSION_THRESHOLD
+            if threshold is None:
+                raise CommandError(
+                    'Сжатие отключено: NOTES_TEXT_COMPRESSION_THRESHOLD = None'
+                )
+            count = self.compress(threshold)
+        self.stdout.write(
+            f'Заметок: {count}, размер текстов: {before} -> '
+            f'{self.text_size()} байт'
+        )
+        self.stdout.write(self.style.SUCCESS('Готово'))
+
+    def text_size(self):
+        with connection.cursor() as cursor:
+            cursor.execute(SIZE_SQL)
+            return cursor.fetchone()[0]
+
+    def batches(self, sql, *params):
+        """Пачки id по возрастанию, пока запрос sql что-то находит."""
+        last = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, (last, *params, self.batch_size))
+                ids = [pk for pk, in cursor.fetchall()]
+            if not ids:
+                return
+            yield ids
+            last = ids[-1]
+
+    def compress(self, threshold):
+        """
+        Пересохраняем тексты: сжимает их само поле модели.
+
+        Триггеры индекса поиска сжатые тексты пропускают, поэтому
+        в индекс они добавляются здесь же.
+        """
+        count = 0
+        for ids in self.batches(UNCOMPRESSED_SQL, threshold):
+            notes = list(Note.objects.filter(pk__in=ids).only('id', 'text'))
+            with transaction.atomic():
+                Note.objects.bulk_update(notes, ['text'])
+                search.index_compressed_notes(ids)
+            count += len(notes)
+        return count
+
+    def decompress(self):
+        """
+        Распаковываем тексты в Python и сохраняем их строками.
+
+        Строки индекса сжатых текстов удаляются заранее, а несжатые
+        тексты в индекс добавляют триггеры.
+        """
+        count = 0
+        for ids in self.batches(COMPRESSED_SQL):
+            placeholders = ', '.join(['%s'] * len(ids))
+            with transaction.atomic(), connection.cursor() as cursor:
+                search.remove_entries(search.note_entries(ids))
+                cursor.execute(TEXTS_SQL.format(placeholders), ids)
+                cursor.executemany(DECOMPRESS_SQL, [
+                    (decompress(text), pk) for pk, text in cursor.fetchall()
+                ])
+            count += len(ids)
+        return count
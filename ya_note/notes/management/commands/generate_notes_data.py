@@ -0,0 +1,61 @@
+from django.db import transaction
+
+from notes import search
+from notes.models import Note
+from yacommon.generators import GenerateDataCommand, next_pk, zipf_cum_weights
+
+WORDS = (
+    'заметка', 'план', 'список', 'покупки', 'встреча', 'проект', 'идея',
+    'книга', 'фильм', 'рецепт', 'задача', 'отчёт', 'звонок', 'отпуск',
+    'работа', 'дом', 'учёба', 'курс', 'лекция', 'код', 'ошибка', 'релиз',
+    'вчера', 'сегодня', 'завтра', 'срочно', 'важно', 'потом', 'новый',
+)
+
+
+class Command(GenerateDataCommand):
+    help = (
+        'Создаёт воспроизводимый набор данных: пользователей и их заметки '
+        'с распределением Ципфа по авторам.'
+    )
+    vocabulary = WORDS
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--notes', type=int, default=100000)
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель распределения заметок по авторам.',
+        )
+
+    def generate(self, user_ids, **options):
+        self.create_notes(options['notes'], options['zipf'], user_ids)
+
+    def create_notes(self, total, exponent, user_ids):
+        """
+        Заметки по авторам распределены по закону Ципфа.
+
+        Slug строится из id, поэтому он уникален без проверок.
+        """
+        if not total or not user_ids:
+            return
+        self.rng.shuffle(user_ids)
+        weights = zipf_cum_weights(len(user_ids), exponent)
+        first = next_pk(Note)
+        for start, size in self.batches(total):
+            authors = self.rng.choices(user_ids, cum_weights=weights, k=size)
+            notes = [
+                Note(
+                    pk=pk,
+                    author_id=author_id,
+                    title=self.words(3).capitalize(),
+                    text=self.words(self.rng.randint(5, 200)),
+                    slug=f'note-{pk}',
+                )
+                for pk, author_id in zip(
+                    range(first + start, first + start + size), authors
+                )
+            ]
+            with transaction.atomic():
+                Note.objects.bulk_create(notes)
+                search.index_compressed_notes([note.pk for note in notes])
+            self.stdout.write(f'Заметок: {start + size} из {total}')
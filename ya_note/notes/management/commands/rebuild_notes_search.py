@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from notes.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс заметок.'
+
+    def handle(self, *args, **options):
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS('Индекс поиска перестроен'))
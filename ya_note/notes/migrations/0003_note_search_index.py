@@ -0,0 +1,99 @@
+from django.db import migrations
+
+# SQL заморожен на момент миграции: notes.search может меняться дальше.
+# «ё» заменяется на «е», как и в запросах поиска.
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS notes_note_fts USING fts5(
+        title, text, author_id,
+        content='notes_note', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_insert
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        VALUES (
+            new.id,
+            replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е'),
+            new.author_id
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_delete
+    AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, title, text, author_id
+        )
+        VALUES (
+            'delete', old.id,
+            replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е'),
+            old.author_id
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_update
+    AFTER UPDATE OF title, text, author_id ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, title, text, author_id
+        )
+        VALUES (
+            'delete', old.id,
+            replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е'),
+            old.author_id
+        );
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        VALUES (
+            new.id,
+            replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е'),
+            new.author_id
+        );
+    END
+    """,
+    """
+    INSERT INTO notes_note_fts(rowid, title, text, author_id)
+    SELECT id,
+           replace(replace(title, 'ё', 'е'), 'Ё', 'Е'),
+           replace(replace(text, 'ё', 'е'), 'Ё', 'Е'),
+           author_id
+    FROM notes_note
+    """,
+)
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS notes_note_fts_insert',
+    'DROP TRIGGER IF EXISTS notes_note_fts_delete',
+    'DROP TRIGGER IF EXISTS notes_note_fts_update',
+    'DROP TABLE IF EXISTS notes_note_fts',
+)
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,226 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:08
+
+import zlib
+
+from django.db import migrations
+import notes.fields
+
+BATCH_SIZE = 1000
+# SQL заморожен на момент миграции: notes.search может меняться дальше.
+# Индекс без хранимого содержимого, триггеры пропускают сжатые тексты:
+# их индексирует приложение.
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS notes_note_fts_insert',
+    'DROP TRIGGER IF EXISTS notes_note_fts_delete',
+    'DROP TRIGGER IF EXISTS notes_note_fts_update',
+    'DROP TABLE IF EXISTS notes_note_fts',
+)
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS notes_note_fts USING fts5(
+        title, text, author_id,
+        content='',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_insert
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        SELECT new.id,
+               replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'),
+               replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е'),
+               new.author_id
+        WHERE typeof(new.text) != 'blob';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_delete
+    AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, title, text, author_id
+        )
+        SELECT 'delete', old.id,
+               replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'),
+               replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е'),
+               old.author_id
+        WHERE typeof(old.text) != 'blob';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_update
+    AFTER UPDATE OF title, text, author_id ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, title, text, author_id
+        )
+        SELECT 'delete', old.id,
+               replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'),
+               replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е'),
+               old.author_id
+        WHERE typeof(old.text) != 'blob';
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        SELECT new.id,
+               replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'),
+               replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е'),
+               new.author_id
+        WHERE typeof(new.text) != 'blob';
+    END
+    """,
+    """
+    INSERT INTO notes_note_fts(rowid, title, text, author_id)
+    SELECT id,
+           replace(replace(title, 'ё', 'е'), 'Ё', 'Е'),
+           replace(replace(text, 'ё', 'е'), 'Ё', 'Е'),
+           author_id
+    FROM notes_note
+    WHERE typeof(text) != 'blob'
+    """,
+)
+# Индекс миграции 0003: читает текст прямо из notes_note.
+PREVIOUS_CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS notes_note_fts USING fts5(
+        title, text, author_id,
+        content='notes_note', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_insert
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        VALUES (
+            new.id,
+            replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е'),
+            new.author_id
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_delete
+    AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, title, text, author_id
+        )
+        VALUES (
+            'delete', old.id,
+            replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е'),
+            old.author_id
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_update
+    AFTER UPDATE OF title, text, author_id ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, title, text, author_id
+        )
+        VALUES (
+            'delete', old.id,
+            replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е'),
+            old.author_id
+        );
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        VALUES (
+            new.id,
+            replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е'),
+            new.author_id
+        );
+    END
+    """,
+    """
+    INSERT INTO notes_note_fts(rowid, title, text, author_id)
+    SELECT id,
+           replace(replace(title, 'ё', 'е'), 'Ё', 'Е'),
+           replace(replace(text, 'ё', 'е'), 'Ё', 'Е'),
+           author_id
+    FROM notes_note
+    """,
+)
+COMPRESSED_SQL = """
+    SELECT id, title, text, author_id FROM notes_note
+    WHERE typeof(text) = 'blob' AND id > %s
+    ORDER BY id
+    LIMIT %s
+"""
+
+
+def fold(value):
+    return value.translate(str.maketrans('ёЁ', 'еЕ'))
+
+
+def compressed_rows(cursor):
+    """Пачки сжатых строк (id, title, text, author_id) с распакованным text."""
+    last = 0
+    while True:
+        cursor.execute(COMPRESSED_SQL, (last, BATCH_SIZE))
+        rows = [
+            (pk, title, zlib.decompress(text).decode(), author_id)
+            for pk, title, text, author_id in cursor.fetchall()
+        ]
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL + CREATE_SQL:
+        schema_editor.execute(sql)
+    with schema_editor.connection.cursor() as cursor:
+        for rows in compressed_rows(cursor):
+            cursor.executemany(
+                'INSERT INTO notes_note_fts(rowid, title, text, author_id) '
+                'VALUES (%s, %s, %s, %s)',
+                [
+                    (pk, fold(title), fold(text), author_id)
+                    for pk, title, text, author_id in rows
+                ],
+            )
+
+
+def restore_index(apps, schema_editor):
+    """Распаковываем тексты и возвращаем индекс миграции 0003."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+    with schema_editor.connection.cursor() as cursor:
+        for rows in compressed_rows(cursor):
+            cursor.executemany(
+                'UPDATE notes_note SET text = %s WHERE id = %s',
+                [(text, pk) for pk, _, text, _ in rows],
+            )
+    for sql in PREVIOUS_CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_search_index'),
+    ]
+
+    operations = [
+        # Столбец остаётся TEXT: сжатые значения SQLite хранит в нём же
+        # как BLOB, переписывать таблицу не нужно.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='note',
+                    name='text',
+                    field=notes.fields.CompressedTextField(
+                        help_text='Добавьте подробностей',
+                        verbose_name='Текст',
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(create_index, restore_index),
+    ]
@@ -1,7 +1,10 @@
+from functools import partial
+
 from django.conf import settings
 from django.db import models
 
-from pytils.translit import slugify
+from .fields import CompressedTextField
+from .slugs import save_with_unique_slug
 
 
 class Note(models.Model):
@@ -11,7 +14,7 @@ class Note(models.Model):
         default='Название заметки',
         help_text='Дайте короткое название заметке'
     )
-    text = models.TextField(
+    text = CompressedTextField(
         'Текст',
         help_text='Добавьте подробностей'
     )
@@ -28,11 +31,18 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """Без адреса подбираем свободный по заголовку, см. slugs.py."""
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            save = partial(super().save, *args, **kwargs)
+            save_with_unique_slug(self, save)
@@ -0,0 +1,342 @@
+"""
+Полнотекстовый поиск по заметкам пользователя на индексе SQLite FTS5.
+
+Таблица notes_note_fts хранит только индекс (content=''), а триггеры
+на notes_note поддерживают его в актуальном состоянии при любой
+записи, включая bulk_create и правки через SQL, в том числе из
+обычного клиента sqlite3: в триггерах только встроенные функции
+SQLite. Большие тексты заметок хранятся сжатыми (см. fields.py), а
+распаковать их SQL не может, поэтому такие строки триггеры
+пропускают, и их индексирует приложение: обработчики сигналов
+сохранения и удаления заметки и команды, которые пишут тексты пачкой.
+Правка сжатой заметки в обход приложения оставляет индекс
+устаревшим до команды rebuild_notes_search.
+
+Кроме заголовка и текста в индекс попадает author_id: условие на
+автора входит в само выражение MATCH, и FTS5 пересекает списки
+документов автора и искомых слов, не читая заметки других
+пользователей. Время запроса растёт с числом совпадений: bm25 считает
+по индексу, в скольких заметках встречается каждое слово, поэтому
+частые слова ищутся дольше редких. Фрагменты с подсветкой строятся в
+Python по тексту найденных заметок.
+"""
+import re
+import sqlite3
+from collections import deque
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from yacommon import search
+from yacommon.search import MARK_END, MARK_START, highlight, match_terms
+
+from .fields import CompressedText, decompress, may_be_compressed
+from .models import Note
+
+FTS_TABLE = 'notes_note_fts'
+# Слов во фрагменте и слов перед первым найденным.
+SNIPPET_WORDS = 16
+SNIPPET_LEAD = 3
+# Слова так, как их выделяет токенизатор unicode61.
+TOKEN = re.compile(r'[^\W_]+')
+
+# unicode61 приводит кириллицу к нижнему регистру, но не считает «ё»
+# буквой «е» с диакритикой: заменяем её при индексации и в запросе.
+YO = str.maketrans('ёЁ', 'еЕ')
+
+
+def fold(column):
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def indexed(row):
+    """Значения столбцов индекса для строки row триггера."""
+    return (
+        f'{row}.id, {fold(f"{row}.title")}, {fold(f"{row}.text")}, '
+        f'{row}.author_id'
+    )
+
+
+def plain(row):
+    """Условие на строку с несжатым текстом, которую ведут триггеры."""
+    return f"typeof({row}.text) != 'blob'"
+
+
+CREATE_INDEX_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, text, author_id,
+        content='',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+)
+CREATE_TRIGGERS_SQL = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, text, author_id)
+        SELECT {indexed('new')} WHERE {plain('new')};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete
+    AFTER DELETE ON notes_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text, author_id)
+        SELECT 'delete', {indexed('old')} WHERE {plain('old')};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF title, text, author_id ON notes_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text, author_id)
+        SELECT 'delete', {indexed('old')} WHERE {plain('old')};
+        INSERT INTO {FTS_TABLE}(rowid, title, text, author_id)
+        SELECT {indexed('new')} WHERE {plain('new')};
+    END
+    """,
+)
+# Без хранимого содержимого команды 'rebuild' нет: индекс очищается и
+# заполняется тем же выражением, что в триггерах, а затем сжатыми
+# текстами из index_compressed_notes.
+REBUILD_SQL = (
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')",
+    f"""
+    INSERT INTO {FTS_TABLE}(rowid, title, text, author_id)
+    SELECT {indexed('notes_note')} FROM notes_note
+    WHERE {plain('notes_note')}
+    """,
+)
+COMPRESSED_SQL = """
+    SELECT id, title, text, author_id FROM notes_note
+    WHERE typeof(text) = 'blob' AND {}
+"""
+ADD_ENTRY_SQL = (
+    f'INSERT INTO {FTS_TABLE}(rowid, title, text, author_id) '
+    'VALUES (%s, %s, %s, %s)'
+)
+REMOVE_ENTRY_SQL = (
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text, author_id) '
+    "VALUES ('delete', %s, %s, %s, %s)"
+)
+# Ранжируются только NOTES_SEARCH_WINDOW самых новых совпадений: их
+# FTS5 находит, идя по индексу с конца, а условие на rowid ограничивает
+# основной запрос.
+SEARCH_SQL = f"""
+    SELECT notes_note.id, notes_note.title, notes_note.text,
+           notes_note.slug, notes_note.author_id,
+           bm25({FTS_TABLE}, 10.0, 1.0, 0.0) AS rank
+    FROM {FTS_TABLE}
+    JOIN notes_note ON notes_note.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid >= coalesce((
+        SELECT rowid FROM {FTS_TABLE}
+        WHERE {FTS_TABLE} MATCH %s
+        ORDER BY rowid DESC
+        LIMIT 1 OFFSET %s
+    ), 0)
+    ORDER BY rank
+    LIMIT %s
+"""
+
+
+def rebuild_search_index():
+    """Перестраиваем индекс по текущему содержимому notes_note."""
+    with connection.cursor() as cursor:
+        for sql in CREATE_INDEX_SQL + CREATE_TRIGGERS_SQL:
+            cursor.execute(sql)
+        for sql in REBUILD_SQL:
+            cursor.execute(sql)
+    index_compressed_notes()
+
+
+def compressed_entries(condition, params):
+    """Строки индекса для сжатых текстов заметок, подходящих под condition."""
+    if connection.vendor != 'sqlite':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(COMPRESSED_SQL.format(condition), params)
+        return [
+            (pk, title.translate(YO), decompress(text).translate(YO), author)
+            for pk, title, text, author in cursor.fetchall()
+        ]
+
+
+def note_entries(ids):
+    """Строки индекса для сжатых текстов заметок ids."""
+    if not ids:
+        return []
+    placeholders = ', '.join(['%s'] * len(ids))
+    return compressed_entries(f'id IN ({placeholders})', list(ids))
+
+
+def add_entries(entries):
+    if entries:
+        with connection.cursor() as cursor:
+            cursor.executemany(ADD_ENTRY_SQL, entries)
+
+
+def remove_entries(entries):
+    if entries:
+        with connection.cursor() as cursor:
+            cursor.executemany(REMOVE_ENTRY_SQL, entries)
+
+
+def index_compressed_notes(ids=None, batch_size=1000):
+    """
+    Добавляем в индекс сжатые тексты заметок ids или всех заметок.
+
+    Для строк, записанных пачкой в обход сигналов (bulk_create,
+    bulk_update): триггеры сжатые тексты пропускают.
+    """
+    if ids is not None:
+        add_entries(note_entries(ids))
+        return
+    last = 0
+    while True:
+        entries = compressed_entries(
+            'id > %s ORDER BY id LIMIT %s', (last, batch_size)
+        )
+        if not entries:
+            return
+        add_entries(entries)
+        last = entries[-1][0]
+
+
+@receiver(pre_save, sender=Note)
+def unindex_compressed_entry(sender, instance, **kwargs):
+    """
+    Удаляем строку индекса сжатого текста до сохранения.
+
+    После сохранения было бы поздно: если текст стал несжатым, триггер
+    уже добавил бы его под тем же rowid. Формы сохраняют заметку в
+    atomic(), поэтому при ошибке удаление откатывается вместе с ней.
+    """
+    if instance.pk is not None:
+        remove_entries(note_entries([instance.pk]))
+
+
+@receiver(post_save, sender=Note)
+def index_compressed_entry(sender, instance, **kwargs):
+    text = instance.__dict__.get('text', CompressedText())
+    if may_be_compressed(text, settings.NOTES_TEXT_COMPRESSION_THRESHOLD):
+        add_entries(note_entries([instance.pk]))
+
+
+@receiver(pre_delete, sender=Note)
+def remove_compressed_entry(sender, instance, **kwargs):
+    # Вызывается внутри транзакции удаления.
+    remove_entries(note_entries([instance.pk]))
+
+
+@receiver(connection_created)
+def connect_search_index(sender, connection, **kwargs):
+    """
+    Подключаем индекс к новому подключению заранее, вне транзакции.
+
+    Иначе FTS5 читает свои настройки при подготовке первого INSERT в
+    notes_note, уже внутри BEGIN. Такая транзакция держит блокировку
+    чтения, и если в это время пишет другое подключение, переход к
+    записи сразу завершается «database is locked», без ожидания.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    try:
+        connection.connection.execute(
+            f'SELECT 1 FROM {FTS_TABLE} WHERE rowid = 0'
+        )
+    except sqlite3.OperationalError:
+        # Индекса ещё нет: база до миграции 0003.
+        pass
+
+
+def query_words(query):
+    return search.query_words(
+        query.translate(YO), settings.NOTES_SEARCH_MAX_WORDS
+    )
+
+
+def build_match(query, author_id):
+    """
+    Превращаем пользовательский запрос в выражение MATCH.
+
+    Слова ищутся только в заголовке и тексте, автор — только в
+    столбце author_id.
+    """
+    words = query_words(query)
+    if not words:
+        return ''
+    terms = match_terms(words)
+    return f'author_id : "{int(author_id)}" AND {{title text}} : ({terms})'
+
+
+def normalize(word):
+    return word.translate(YO).lower()
+
+
+def mark(text, words, prefixes):
+    """Текст от первого до последнего из words с маркерами подсветки."""
+    if not words:
+        return ''
+    position = words[0].start()
+    parts = ['…'] if TOKEN.search(text, 0, position) else []
+    for word in words:
+        parts.append(text[position:word.start()])
+        if normalize(word.group()).startswith(prefixes):
+            parts += [MARK_START, word.group(), MARK_END]
+        else:
+            parts.append(word.group())
+        position = word.end()
+    parts.append('…' if TOKEN.search(text, position) else text[position:])
+    return ''.join(parts)
+
+
+def fragment(text, prefixes):
+    """
+    Фрагмент text вокруг первого найденного слова или None.
+
+    Текст читается только до конца фрагмента: тексты заметок бывают
+    большими.
+    """
+    tokens = TOKEN.finditer(text)
+    lead = deque(maxlen=SNIPPET_LEAD)
+    for token in tokens:
+        if normalize(token.group()).startswith(prefixes):
+            break
+        lead.append(token)
+    else:
+        return None
+    words = [*lead, token, *islice(tokens, SNIPPET_WORDS - len(lead) - 1)]
+    return mark(text, words, prefixes)
+
+
+def snippet(note, words):
+    """Фрагмент заголовка или текста note с найденными словами."""
+    prefixes = tuple(normalize(word) for word in words)
+    return (
+        fragment(note.title, prefixes)
+        or fragment(note.text, prefixes)
+        or mark(
+            note.text, list(islice(TOKEN.finditer(note.text), SNIPPET_WORDS)),
+            prefixes,
+        )
+    )
+
+
+def search_notes(author, query, limit=None):
+    """Заметки автора по запросу в порядке bm25 с подсвеченным фрагментом."""
+    match = build_match(query, author.pk)
+    if not match:
+        return []
+    limit = limit or settings.NOTES_SEARCH_RESULTS
+    window = settings.NOTES_SEARCH_WINDOW
+    results = list(Note.objects.raw(
+        SEARCH_SQL, (match, match, window - 1, limit)
+    ))
+    words = query_words(query)
+    for note in results:
+        note.highlighted = highlight(snippet(note, words))
+    return results
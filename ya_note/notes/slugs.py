@@ -0,0 +1,101 @@
+"""
+Подбор уникального адреса (slug) заметки по заголовку.
+
+Адрес — транслитерация заголовка, а если он занят — с наименьшим
+свободным числовым суффиксом: «zametka», «zametka-2», «zametka-3».
+Занятые варианты читаются одним запросом по диапазону уникального
+индекса slug: в адресах из slugify нет символов меньше «-», поэтому
+диапазон [основа-, основа.) содержит все варианты основы с суффиксом.
+В него попадают и адреса других заголовков, которые начинаются с
+основы: «Заметка 2024» — это «zametka-2024». Такой номер просто занят
+и нумерацию вариантов основы не сдвигает.
+
+Два запроса с одинаковым заголовком могут одновременно выбрать один
+адрес. Тогда второй INSERT нарушит уникальность, и адрес подбирается
+заново — до MAX_ATTEMPTS раз, со случайным суффиксом из растущего
+диапазона, чтобы конфликтующие запросы разошлись. Транслитерация
+повторяющихся заголовков кешируется.
+"""
+import random
+import re
+from functools import lru_cache
+from itertools import count, islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from pytils.translit import slugify
+
+SEPARATOR = '-'
+# Символ сразу после SEPARATOR: верхняя граница диапазона вариантов.
+RANGE_END = chr(ord(SEPARATOR) + 1)
+# Место под суффикс у длинной основы: «-» и до семи цифр.
+SUFFIX_LENGTH = 8
+MAX_ATTEMPTS = 20
+# Насколько шире с каждой попыткой диапазон случайного суффикса.
+SPREAD_STEP = 4
+DEFAULT_SLUG = 'note'
+
+
+@lru_cache(maxsize=4096)
+def slugify_title(title):
+    return slugify(title) or DEFAULT_SLUG
+
+
+def _max_length(model):
+    return model._meta.get_field('slug').max_length
+
+
+def allocate_slug(model, title, exclude_pk=None, spread=0):
+    """
+    Свободный адрес для заголовка title, одним запросом к базе.
+
+    spread > 0 — суффикс выбирается случайно среди spread свободных
+    номеров, начиная с наименьшего: так повторные попытки параллельных
+    запросов реже выбирают один и тот же номер.
+    """
+    max_length = _max_length(model)
+    base = slugify_title(title)[:max_length]
+    stem = base[:max_length - SUFFIX_LENGTH]
+    candidates = model.objects.filter(
+        Q(slug=base)
+        | Q(slug__gte=stem + SEPARATOR, slug__lt=stem + RANGE_END)
+    )
+    if exclude_pk is not None:
+        candidates = candidates.exclude(pk=exclude_pk)
+    taken = set(candidates.values_list('slug', flat=True))
+    if base not in taken:
+        return base
+    suffix = re.compile(rf'{re.escape(stem + SEPARATOR)}(\d+)')
+    numbers = {
+        int(match.group(1))
+        for match in map(suffix.fullmatch, taken) if match
+    }
+    free = (number for number in count(2) if number not in numbers)
+    skip = random.randrange(spread) if spread else 0
+    number = next(islice(free, skip, None))
+    return f'{stem}{SEPARATOR}{number}'
+
+
+def save_with_unique_slug(instance, save):
+    """
+    Сохраняем instance вызовом save с подобранным адресом.
+
+    Если адрес успели занять, подбираем новый. Другие нарушения
+    целостности пробрасываются сразу.
+    """
+    model = type(instance)
+    for attempt in range(MAX_ATTEMPTS):
+        instance.slug = allocate_slug(
+            model, instance.title, instance.pk, spread=attempt * SPREAD_STEP
+        )
+        try:
+            with transaction.atomic():
+                save()
+            return
+        except IntegrityError:
+            taken = model.objects.filter(
+                slug=instance.slug
+            ).exclude(pk=instance.pk).exists()
+            if not taken or attempt == MAX_ATTEMPTS - 1:
+                instance.slug = ''
+                raise
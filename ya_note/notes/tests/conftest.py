@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+# Повторяющиеся SELECT в тестах считаем ошибкой.
+def raise_on_nplusone(settings):
+    settings.NPLUSONE_MODE = 'raise'
+    settings.NPLUSONE_THRESHOLD = 2
+
+
+@pytest.fixture(autouse=True)
+# Списки заголовков живут в памяти процесса, а база между тестами
+# откатывается.
+def clear_title_indexes():
+    from notes.autocomplete import title_indexes
+
+    title_indexes.clear()
+    yield
+    title_indexes.clear()
@@ -0,0 +1,71 @@
+import asyncio
+import importlib
+from http import HTTPStatus
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.urls import clear_url_caches, resolve, reverse
+
+from notes.models import Note
+
+User = get_user_model()
+
+
+def reload_urls():
+    import notes.urls
+    import yanote.urls
+
+    importlib.reload(notes.urls)
+    importlib.reload(yanote.urls)
+    clear_url_caches()
+
+
+class TestAsyncViews(TransactionTestCase):
+    """Страницы чтения под ASGI: запросы к базе идут в пуле потоков."""
+
+    def setUp(self):
+        settings = override_settings(ASYNC_VIEWS=True)
+        settings.enable()
+        self.addCleanup(reload_urls)
+        self.addCleanup(settings.disable)
+        reload_urls()
+        self.author = User.objects.create(username='Автор')
+        self.note = Note.objects.create(
+            title='Заголовок', text='Текст', slug='note', author=self.author
+        )
+        self.client.force_login(self.author)
+        self.async_client = AsyncClient()
+        self.async_client.cookies = self.client.cookies
+
+    def async_get(self, url):
+        async def get():
+            return await self.async_client.get(url)
+
+        return async_to_sync(get)()
+
+    def test_pages_match_sync(self):
+        for name, args in (
+            ('notes:list', None),
+            ('notes:detail', (self.note.slug,)),
+        ):
+            with self.subTest(name=name):
+                url = reverse(name, args=args)
+                self.assertTrue(
+                    asyncio.iscoroutinefunction(resolve(url).func)
+                )
+                expected = self.client.get(url)
+                response = self.async_get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(response, self.note.title)
+                self.assertEqual(
+                    response.query_stats.count, expected.query_stats.count
+                )
+
+    def test_other_author_gets_not_found(self):
+        reader = User.objects.create(username='Читатель')
+        self.client.force_login(reader)
+        self.async_client.cookies = self.client.cookies
+        url = reverse('notes:detail', args=(self.note.slug,))
+        response = self.async_get(url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
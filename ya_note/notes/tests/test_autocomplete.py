@@ -0,0 +1,139 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from notes.autocomplete import TitleIndexes, title_indexes
+from notes.models import Note
+
+User = get_user_model()
+
+
+class TestAutocomplete(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.reader = User.objects.create(username='Читатель')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        Note.objects.bulk_create(
+            Note(author=author, title=title, text='', slug=slug)
+            for author, title, slug in (
+                (cls.author, 'Ёлка на Новый год', 'elka'),
+                (cls.author, 'Еда на неделю', 'eda'),
+                (cls.author, 'План работы', 'plan'),
+                (cls.author, 'Планы  на лето', 'plany'),
+                (cls.reader, 'Планёрка', 'planerka'),
+            )
+        )
+        cls.url = reverse('notes:autocomplete')
+
+    def complete(self, query):
+        response = self.author_client.get(self.url, {'q': query})
+        return [result['title'] for result in response.json()['results']]
+
+    def test_prefix_matches_own_titles(self):
+        """Подсказки по началу заголовка, только свои заметки."""
+        self.assertEqual(
+            self.complete('пла'), ['План работы', 'Планы  на лето']
+        )
+        self.assertEqual(self.complete('ПЛАНЫ НА'), ['Планы  на лето'])
+        self.assertEqual(
+            self.complete('е'), ['Еда на неделю', 'Ёлка на Новый год']
+        )
+        self.assertEqual(self.complete(' '), [])
+        self.assertEqual(self.complete('работы'), [])
+
+    def test_result_urls(self):
+        response = self.author_client.get(self.url, {'q': 'еда'})
+        self.assertEqual(response.json()['results'], [{
+            'title': 'Еда на неделю',
+            'slug': 'eda',
+            'url': reverse('notes:detail', args=('eda',)),
+        }])
+
+    def test_index_built_once(self):
+        """Список строится одним запросом, дальше подсказки без базы."""
+        with self.assertNumQueries(1):
+            title_indexes.complete(self.author.pk, 'п')
+        with self.assertNumQueries(0):
+            title_indexes.complete(self.author.pk, 'пл')
+
+    def test_index_follows_changes(self):
+        """Список меняется при создании, изменении и удалении заметок."""
+        self.assertEqual(self.complete('отпуск'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            note = Note.objects.create(
+                author=self.author, title='Отпуск', text=''
+            )
+        self.assertEqual(self.complete('отп'), ['Отпуск'])
+        note.title = 'Поездка'
+        with self.captureOnCommitCallbacks(execute=True):
+            note.save()
+        self.assertEqual(self.complete('отп'), [])
+        self.assertEqual(self.complete('поезд'), ['Поездка'])
+        note.author = self.reader
+        with self.captureOnCommitCallbacks(execute=True):
+            note.save()
+        self.assertEqual(self.complete('поезд'), [])
+        note.author = self.author
+        with self.captureOnCommitCallbacks(execute=True):
+            note.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            note.delete()
+        self.assertEqual(self.complete('поезд'), [])
+
+    def test_rolled_back_changes_ignored(self):
+        """Изменения из откаченной транзакции в подсказки не попадают."""
+        self.complete('п')
+        with self.captureOnCommitCallbacks(execute=False):
+            Note.objects.create(author=self.author, title='Пропало', text='')
+        self.assertEqual(self.complete('проп'), [])
+
+    def test_stale_index_rebuilt(self):
+        self.complete('п')
+        Note.objects.create(author=self.author, title='Пропало', text='')
+        with override_settings(NOTES_AUTOCOMPLETE_MAX_AGE=-1):
+            self.assertEqual(self.complete('проп'), ['Пропало'])
+
+    def test_requires_login(self):
+        response = Client().get(self.url)
+        self.assertRedirects(
+            response, f'{reverse("users:login")}?next={self.url}'
+        )
+
+
+class TestTitleIndexesEviction(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [
+            User.objects.create(username=f'user{index}') for index in range(3)
+        ]
+        Note.objects.bulk_create(
+            Note(author=author, title=f'Заметка {index}', text='',
+                 slug=f'note-{author.pk}-{index}')
+            for author in cls.authors for index in range(10)
+        )
+
+    def test_least_recently_used_evicted(self):
+        """Под лимит памяти вытесняются давно не нужные списки."""
+        indexes = TitleIndexes()
+        first, second, third = (author.pk for author in self.authors)
+        size = indexes.index(first).size
+        with override_settings(NOTES_AUTOCOMPLETE_MEMORY=size * 2):
+            indexes.index(second)
+            indexes.index(first)
+            indexes.index(third)
+        self.assertEqual(list(indexes._indexes), [first, third])
+        self.assertEqual(indexes.size, size * 2)
+
+    def test_size_follows_changes(self):
+        indexes = TitleIndexes()
+        author = self.authors[0]
+        index = indexes.index(author.pk)
+        size = index.size
+        indexes.note_saved(author.pk, 1000, 'Очень длинный заголовок', 'x')
+        self.assertGreater(index.size, size)
+        indexes.note_deleted(author.pk, 1000)
+        self.assertEqual((index.size, indexes.size), (size, size))
@@ -0,0 +1,171 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from notes import fields
+from notes.fields import CompressedText
+from notes.models import Note
+from notes.search import FTS_TABLE
+
+User = get_user_model()
+
+# Большой текст, который хорошо сжимается, как журнал программы.
+LOG = ''.join(
+    f'2024-01-01 12:00:{second:02} INFO запрос обработан за {second} мс\n'
+    for second in range(60)
+) * 10
+
+
+@override_settings(NOTES_TEXT_COMPRESSION_THRESHOLD=1024)
+class TestCompressedText(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    def create(self, text, slug='log'):
+        return Note.objects.create(
+            author=self.author, title='Журнал', text=text, slug=slug
+        )
+
+    def stored(self, note):
+        """Тип и размер значения в столбце text."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT typeof(text), length(CAST(text AS BLOB)) '
+                'FROM notes_note WHERE id = %s', (note.pk,)
+            )
+            return cursor.fetchone()
+
+    def test_large_text_stored_compressed(self):
+        """Тестируем сжатие текста от порога и хранение меньшего как есть."""
+        large = self.create(LOG)
+        small = self.create('Короткий текст', slug='short')
+        kind, size = self.stored(large)
+        self.assertEqual(kind, 'blob')
+        self.assertLess(size, len(LOG.encode()) / 5)
+        self.assertEqual(
+            self.stored(small), ('text', len('Короткий текст'.encode()))
+        )
+        self.assertEqual(Note.objects.get(pk=large.pk).text, LOG)
+
+    @override_settings(NOTES_TEXT_COMPRESSION_THRESHOLD=None)
+    def test_compression_disabled(self):
+        self.assertEqual(self.stored(self.create(LOG))[0], 'text')
+
+    def test_text_decompressed_lazily(self):
+        """Текст распаковывается при первом обращении и один раз."""
+        note = self.create(LOG)
+        with mock.patch.object(
+            fields, 'decompress', wraps=fields.decompress
+        ) as decompress:
+            loaded = Note.objects.get(pk=note.pk)
+            self.assertIsInstance(loaded.__dict__['text'], CompressedText)
+            self.assertEqual(decompress.call_count, 0)
+            self.assertEqual((loaded.text, loaded.text), (LOG, LOG))
+            self.assertEqual(decompress.call_count, 1)
+
+    def test_pages_decompress_only_when_needed(self):
+        """Список и удаление текст не распаковывают, страница заметки — да."""
+        note = self.create(LOG)
+        for method, name, expected in (
+            ('get', 'notes:list', 0),
+            ('get', 'notes:detail', 1),
+            ('post', 'notes:delete', 0),
+        ):
+            args = None if name == 'notes:list' else (note.slug,)
+            with self.subTest(name=name), mock.patch.object(
+                fields, 'decompress', wraps=fields.decompress
+            ) as decompress:
+                getattr(self.author_client, method)(reverse(name, args=args))
+                self.assertEqual(decompress.call_count, expected)
+        self.assertFalse(Note.objects.exists())
+
+    def test_untouched_text_not_recompressed(self):
+        note = self.create(LOG)
+        loaded = Note.objects.get(pk=note.pk)
+        loaded.title = 'Новый заголовок'
+        with mock.patch.object(
+            fields, 'compress', wraps=fields.compress
+        ) as compress:
+            loaded.save()
+        compress.assert_not_called()
+        self.assertEqual(Note.objects.get(pk=note.pk).text, LOG)
+
+    def test_edit_form_shows_text(self):
+        note = self.create(LOG)
+        response = self.author_client.get(
+            reverse('notes:edit', args=(note.slug,))
+        )
+        self.assertEqual(response.context['form'].initial['text'], LOG)
+
+    def test_search_reads_compressed_text(self):
+        """Полнотекстовый поиск и фрагменты видят сжатый текст."""
+        self.create(LOG)
+        response = self.author_client.get(
+            reverse('notes:search_json'), {'q': 'обработан'}
+        )
+        results = response.json()['results']
+        self.assertEqual([result['slug'] for result in results], ['log'])
+        self.assertIn('<mark>обработан</mark>', results[0]['snippet'])
+
+    def search(self, query):
+        response = self.author_client.get(
+            reverse('notes:search_json'), {'q': query}
+        )
+        return [result['slug'] for result in response.json()['results']]
+
+    def assertIndexIntact(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) "
+                "VALUES ('integrity-check', 0)"
+            )
+
+    def test_search_index_follows_compressed_text(self):
+        """Индекс сжатого текста обновляется при изменении и удалении."""
+        note = self.create(LOG)
+        note.text = LOG.replace('обработан', 'отклонён')
+        note.save()
+        self.assertEqual(self.stored(note)[0], 'blob')
+        self.assertEqual(self.search('обработан'), [])
+        self.assertEqual(self.search('отклонен'), ['log'])
+        note.text = 'Короткий текст'
+        note.save()
+        self.assertEqual(self.search('отклонен'), [])
+        self.assertEqual(self.search('короткий'), ['log'])
+        note.text = LOG
+        note.save()
+        note.delete()
+        self.assertEqual(self.search('обработан'), [])
+        self.assertIndexIntact()
+
+    def test_rebuild_indexes_compressed_text(self):
+        self.create(LOG)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')"
+            )
+        call_command('rebuild_notes_search', stdout=StringIO())
+        self.assertEqual(self.search('обработан'), ['log'])
+
+    def test_backfill_command(self):
+        """Тестируем сжатие старых текстов командой и обратную распаковку."""
+        with override_settings(NOTES_TEXT_COMPRESSION_THRESHOLD=None):
+            note = self.create(LOG)
+        self.assertEqual(self.stored(note)[0], 'text')
+        call_command('compress_note_texts', stdout=StringIO())
+        self.assertEqual(self.stored(note)[0], 'blob')
+        self.assertEqual(self.search('обработан'), ['log'])
+        call_command('compress_note_texts', decompress=True, stdout=StringIO())
+        self.assertEqual(self.stored(note), ('text', len(LOG.encode())))
+        self.assertEqual(Note.objects.get(pk=note.pk).text, LOG)
+        self.assertEqual(self.search('обработан'), ['log'])
+        self.assertIndexIntact()
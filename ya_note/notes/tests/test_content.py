@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from notes.models import Note
@@ -58,3 +60,34 @@ class TestContent(TestCase):
                 response = self.auth_client.get(url)
                 self.assertIn('form', response.context)
                 self.assertIsInstance(response.context['form'], NoteForm)
+
+    @override_settings(NOTES_COUNT_ON_PAGE=2)
+    def test_list_pages_by_cursor(self):
+        """Тестируем постраничный вывод списка заметок по курсору."""
+        Note.objects.bulk_create(
+            Note(
+                author=self.author,
+                title=f'Заметка {index}',
+                text='Текст',
+                slug=f'note{index}',
+            )
+            for index in range(4)
+        )
+        expected = list(
+            Note.objects.filter(author=self.author).order_by('id')
+        )
+        seen = []
+        url = self.home_url
+        with CaptureQueriesContext(connection) as context:
+            while url:
+                page = self.auth_client.get(url).context['page']
+                self.assertLessEqual(len(page), 2)
+                seen.extend(page)
+                url = page.has_next and f'{self.home_url}?after=' + (
+                    page.next_cursor
+                )
+        self.assertEqual(seen, expected)
+        # Текст заметок списку не нужен и не загружается.
+        for query in context.captured_queries:
+            if 'FROM "notes_note"' in query['sql']:
+                self.assertNotIn('"text"', query['sql'])
@@ -0,0 +1,33 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from notes.models import Note
+from yacommon.db import read_only_request_middleware, ReadReplicaRouter
+
+
+@override_settings(DATABASE_READ_ALIAS='replica')
+class TestReadReplicaRouter(SimpleTestCase):
+    """Чтение из GET-запросов уходит в подключение для чтения."""
+
+    def route(self, method):
+        router = ReadReplicaRouter()
+        routes = []
+
+        def view(request):
+            routes.append(router.db_for_read(Note))
+            routes.append(router.db_for_write(Note))
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/')
+        read_only_request_middleware(view)(request)
+        return routes
+
+    def test_get_reads_from_replica(self):
+        self.assertEqual(self.route('get'), ['replica', 'default'])
+
+    def test_post_reads_from_default(self):
+        self.assertEqual(self.route('post'), [None, 'default'])
+
+    def test_outside_request(self):
+        self.assertIsNone(ReadReplicaRouter().db_for_read(Note))
+        self.assertFalse(ReadReplicaRouter().allow_migrate('replica', 'notes'))
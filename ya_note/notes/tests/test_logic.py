@@ -1,6 +1,8 @@
 from http import HTTPStatus
+from io import StringIO
 
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -151,3 +153,28 @@ class TestCommentCreation(TestCase):
         self.assertIn(self.note.slug, NOTE_SLOGAN)
         self.assertIn(self.note.title, NOTE_TITLE)
         self.assertIn(self.note.text, NOTE_TEXT)
+
+
+class TestGenerateNotesData(TestCase):
+
+    def generate(self):
+        call_command(
+            'generate_notes_data', users=5, notes=50, seed=1, batch_size=7,
+            verbosity=0, stdout=StringIO(),
+        )
+        return list(
+            Note.objects.order_by('pk')
+            .values_list('author__username', 'title')
+        )
+
+    def test_generate_notes_data(self):
+        """Тестируем генерацию заметок и её воспроизводимость."""
+        notes = self.generate()
+        self.assertEqual(len(notes), 50)
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(
+            Note.objects.values('slug').distinct().count(), 50
+        )
+        Note.objects.all().delete()
+        User.objects.all().delete()
+        self.assertEqual(self.generate(), notes)
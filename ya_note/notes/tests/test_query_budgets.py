@@ -0,0 +1,102 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from notes.models import Note
+
+User = get_user_model()
+
+# Бюджет SQL-запросов на один HTTP-запрос к представлению. Бюджет не
+# должен зависеть от объёма данных, поэтому перед замером база
+# заполняется заметками других пользователей.
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:list': 3,
+    'notes:detail': 3,
+    'notes:add': 2,
+    'notes:search': 3,
+    'notes:search_json': 3,
+    # Список заголовков строится одним запросом при первой подсказке.
+    'notes:autocomplete': 3,
+    # Сохранение из формы идёт в atomic(): внутри транзакции теста это
+    # ещё SAVEPOINT и RELEASE SAVEPOINT. Изменение и удаление читают
+    # строку индекса поиска, если текст заметки сжат, см. search.py.
+    'notes:add (post)': 6,
+    'notes:edit (post)': 8,
+    'notes:delete (post)': 5,
+}
+
+
+class TestQueryBudgets(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'generate_notes_data', users=3, notes=100, stdout=StringIO(),
+        )
+        cls.author = User.objects.create(username='Автор')
+        cls.notes = Note.objects.bulk_create(
+            Note(
+                author=cls.author,
+                title=f'Заметка {index}',
+                text='Текст',
+                slug=f'note{index}',
+            )
+            for index in range(10)
+        )
+        cls.form_data = {
+            'title': 'Новый заголовок',
+            'text': 'Новый текст',
+            'slug': 'new_slogan',
+        }
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def assertWithinBudget(self, budget, response):
+        stats = response.query_stats
+        self.assertLessEqual(
+            stats.count, QUERY_BUDGETS[budget],
+            f'{stats.url_name}: {stats.count} запросов при бюджете '
+            f'{QUERY_BUDGETS[budget]}',
+        )
+
+    def test_get_pages(self):
+        """Тестируем бюджет запросов страниц заметок."""
+        slug = self.notes[0].slug
+        for name, args in (
+            ('notes:home', None),
+            ('notes:list', None),
+            ('notes:detail', (slug,)),
+            ('notes:add', None),
+            ('notes:search', None),
+            ('notes:search_json', None),
+            ('notes:autocomplete', None),
+        ):
+            with self.subTest(name=name):
+                response = self.client.get(
+                    reverse(name, args=args), {'q': 'заметка'}
+                )
+                self.assertWithinBudget(name, response)
+
+    def test_post_forms(self):
+        """Тестируем бюджет запросов при отправке форм."""
+        slug = self.notes[0].slug
+        for name, url, data in (
+            ('notes:add (post)', reverse('notes:add'), self.form_data),
+            (
+                'notes:edit (post)', reverse('notes:edit', args=(slug,)),
+                {**self.form_data, 'slug': slug},
+            ),
+            (
+                'notes:delete (post)', reverse('notes:delete', args=(slug,)),
+                None,
+            ),
+        ):
+            with self.subTest(name=name):
+                response = self.client.post(url, data=data or {})
+                self.assertWithinBudget(name, response)
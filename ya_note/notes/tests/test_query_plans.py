@@ -0,0 +1,83 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note
+from yacommon.pagination import encode_cursor
+
+User = get_user_model()
+
+# Полный просмотр таблицы без индекса, например «SCAN notes_note».
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+( AS \w+)?$')
+TEMP_SORT = 'USE TEMP B-TREE'
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE')
+
+
+class TestQueryPlans(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.note = Note.objects.create(
+            author=cls.author,
+            title='Заголовок',
+            text='Текст',
+            slug='slogan1',
+        )
+        cls.form_data = {
+            'title': 'Новый заголовок',
+            'text': 'Новый текст',
+            'slug': 'new_slogan2',
+        }
+
+    def bad_plan_steps(self, sql):
+        """Шаги плана с полным просмотром таблицы или сортировкой."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            details = [row[-1] for row in cursor.fetchall()]
+        return [
+            detail for detail in details
+            if FULL_SCAN.match(detail) or TEMP_SORT in detail
+        ]
+
+    def assertQueryPlans(self, method, url, data=None):
+        """Выполняем запрос к странице и проверяем планы SQL-запросов."""
+        with CaptureQueriesContext(connection) as context:
+            getattr(self.author_client, method)(url, data)
+        for query in context.captured_queries:
+            sql = query['sql']
+            if sql.startswith(EXPLAINED):
+                with self.subTest(sql=sql):
+                    self.assertEqual(self.bad_plan_steps(sql), [])
+
+    def test_read_views_query_plans(self):
+        """Планы запросов страниц просмотра заметок."""
+        urls = (
+            reverse('notes:list'),
+            reverse('notes:list') + '?after=' + encode_cursor([self.note.pk]),
+            reverse('notes:detail', args=(self.note.slug,)),
+            reverse('notes:edit', args=(self.note.slug,)),
+            reverse('notes:delete', args=(self.note.slug,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertQueryPlans('get', url)
+
+    def test_write_views_query_plans(self):
+        """Планы запросов создания, изменения и удаления заметки."""
+        self.assertQueryPlans('post', reverse('notes:add'), self.form_data)
+        self.form_data['slug'] = 'edited_slogan3'
+        self.assertQueryPlans(
+            'post',
+            reverse('notes:edit', args=(self.note.slug,)),
+            self.form_data,
+        )
+        self.assertQueryPlans(
+            'post', reverse('notes:delete', args=(self.form_data['slug'],))
+        )
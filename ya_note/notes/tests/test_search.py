@@ -0,0 +1,163 @@
+import sqlite3
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from notes.models import Note
+from notes.search import CREATE_INDEX_SQL, CREATE_TRIGGERS_SQL, FTS_TABLE
+
+User = get_user_model()
+
+
+class TestSearch(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.reader = User.objects.create(username='Читатель')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        Note.objects.bulk_create((
+            Note(author=cls.author, title='Покупки', slug='pokupki',
+                 text='Купить заметки о ёлке и молоко <script>.'),
+            Note(author=cls.author, title='Заметки о работе', slug='rabota',
+                 text='Созвон в понедельник.'),
+            Note(author=cls.author, title='Рецепт', slug='recept',
+                 text='Пирог с яблоками.'),
+            Note(author=cls.reader, title='Заметки читателя', slug='chitatel',
+                 text='Чужие заметки.'),
+        ))
+        cls.search_url = reverse('notes:search')
+        cls.json_url = reverse('notes:search_json')
+
+    def search(self, query):
+        response = self.author_client.get(self.json_url, {'q': query})
+        return [result['slug'] for result in response.json()['results']]
+
+    def test_search_ranks_and_highlights(self):
+        """Поиск по префиксу, заголовок весит больше текста."""
+        response = self.author_client.get(self.search_url, {'q': 'заметк'})
+        results = response.context['results']
+        self.assertEqual(
+            [note.slug for note in results], ['rabota', 'pokupki']
+        )
+        snippet = results[1].highlighted
+        self.assertIn('<mark>заметки</mark>', snippet)
+        self.assertIn('&lt;script&gt;', snippet)
+
+    @override_settings(NOTES_SEARCH_WINDOW=1)
+    def test_search_ranks_newest_matches(self):
+        """Ранжируются только самые новые совпадения."""
+        Note.objects.create(
+            author=self.author, title='Разное', text='Заметки.', slug='new'
+        )
+        self.assertEqual(self.search('заметк'), ['new'])
+
+    def test_search_is_scoped_to_user(self):
+        """Чужие заметки не находятся, в том числе по id автора."""
+        self.assertNotIn('chitatel', self.search('читателя'))
+        self.assertEqual(self.search(str(self.author.pk)), [])
+
+    def test_search_folds_case_and_yo(self):
+        """Регистр и «ё» не влияют на поиск по кириллице."""
+        self.assertEqual(self.search('ЕЛКЕ'), ['pokupki'])
+        self.assertEqual(self.search('ПИРОГ'), ['recept'])
+
+    def test_search_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении заметок."""
+        note = Note.objects.get(slug='recept')
+        note.text = 'Торт с вишней.'
+        note.save()
+        self.assertEqual(self.search('пирог'), [])
+        self.assertEqual(self.search('торт'), ['recept'])
+        note.author = self.reader
+        note.save()
+        self.assertEqual(self.search('торт'), [])
+        note.delete()
+        self.assertEqual(self.search('торт'), [])
+
+    def test_search_ignores_query_syntax(self):
+        """Спецсимволы FTS5 в запросе не приводят к ошибке."""
+        self.assertEqual(self.search('пирог" (* OR author_id:'), [])
+        self.assertEqual(self.search('пирог" (*'), ['recept'])
+        self.assertEqual(self.search(''), [])
+
+    def test_search_requires_login(self):
+        for url in (self.search_url, self.json_url):
+            with self.subTest(url=url):
+                response = Client().get(url)
+                self.assertRedirects(
+                    response, f'{reverse("users:login")}?next={url}'
+                )
+
+    def test_rebuild_command(self):
+        """Перестроенный индекс совпадает с тем, что ведут триггеры."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')"
+            )
+        self.assertEqual(self.search('елке'), [])
+        call_command('rebuild_notes_search', stdout=StringIO())
+        self.assertEqual(self.search('елке'), ['pokupki'])
+        # Проверяем сам индекс: в таблице заметок «ё» не заменена.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) "
+                "VALUES ('integrity-check', 0)"
+            )
+
+    def test_search_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = 'notes_note'"
+            )
+            triggers = {name for name, in cursor.fetchall()}
+        self.assertEqual(triggers, {
+            f'{FTS_TABLE}_insert', f'{FTS_TABLE}_delete', f'{FTS_TABLE}_update'
+        })
+
+
+class TestSearchTriggers(SimpleTestCase):
+    """Триггеры индекса в подключении без функций приложения."""
+
+    def setUp(self):
+        self.db = sqlite3.connect(':memory:')
+        self.addCleanup(self.db.close)
+        self.db.execute(
+            'CREATE TABLE notes_note (id INTEGER PRIMARY KEY, '
+            'title TEXT, text TEXT, slug TEXT, author_id INTEGER)'
+        )
+        for sql in CREATE_INDEX_SQL + CREATE_TRIGGERS_SQL:
+            self.db.execute(sql)
+
+    def search(self, word):
+        return [pk for pk, in self.db.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?',
+            (word,),
+        )]
+
+    def test_plain_client_writes_notes(self):
+        """Обычный клиент sqlite3 пишет заметки, сжатые тексты пропускаются."""
+        self.db.execute(
+            "INSERT INTO notes_note VALUES (1, 'Покупки', 'Ёлка', 'a', 1)"
+        )
+        self.db.execute(
+            "INSERT INTO notes_note VALUES (2, 'Сжатая', ?, 'b', 1)",
+            (b'\x78\x9c',),
+        )
+        self.assertEqual(self.search('елка'), [1])
+        self.assertEqual(self.search('сжатая'), [])
+        self.db.execute("UPDATE notes_note SET text = 'Пирог' WHERE id = 1")
+        self.assertEqual(self.search('елка'), [])
+        self.assertEqual(self.search('пирог'), [1])
+        self.db.execute('DELETE FROM notes_note')
+        self.assertEqual(self.search('пирог'), [])
+        self.db.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) "
+            "VALUES ('integrity-check', 0)"
+        )
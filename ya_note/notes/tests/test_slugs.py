@@ -0,0 +1,206 @@
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError, connections
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from notes import slugs
+from notes.forms import WARNING, NoteForm
+from notes.models import Note
+
+User = get_user_model()
+
+TITLE = 'Заметка'
+
+
+class TestSlugAllocation(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+
+    def create(self, title=TITLE):
+        return Note.objects.create(author=self.author, title=title, text='')
+
+    def test_same_titles_get_suffixes(self):
+        """Тестируем суффиксы у заметок с одинаковым заголовком."""
+        self.assertEqual(
+            [self.create().slug for _ in range(3)],
+            ['zametka', 'zametka-2', 'zametka-3'],
+        )
+
+    def test_single_range_query(self):
+        """Тестируем, что занятые адреса читаются одним запросом."""
+        for _ in range(3):
+            self.create()
+        with self.assertNumQueries(1):
+            slug = slugs.allocate_slug(Note, TITLE)
+        self.assertEqual(slug, 'zametka-4')
+
+    def test_other_slugs_are_ignored(self):
+        """Тестируем, что похожие адреса не считаются вариантами основы."""
+        Note.objects.bulk_create(
+            Note(author=self.author, title=TITLE, text='', slug=slug)
+            for slug in ('zametka', 'zametka-list', 'zametka2', 'zametkab-9')
+        )
+        self.assertEqual(slugs.allocate_slug(Note, TITLE), 'zametka-2')
+
+    def test_numbered_titles_do_not_shift_suffixes(self):
+        """Тестируем, что заголовок с числом не сдвигает нумерацию."""
+        self.create()
+        self.assertEqual(self.create('Заметка 2024').slug, 'zametka-2024')
+        self.assertEqual(self.create('Заметка 2').slug, 'zametka-2')
+        self.assertEqual(self.create().slug, 'zametka-3')
+
+    def test_long_title_fits_max_length(self):
+        title = 'Очень длинный заголовок ' * 10
+        first, second = self.create(title), self.create(title)
+        max_length = Note._meta.get_field('slug').max_length
+        self.assertEqual(len(first.slug), max_length)
+        self.assertLessEqual(len(second.slug), max_length)
+        self.assertTrue(second.slug.endswith('-2'))
+
+    def test_retry_when_slug_taken_concurrently(self):
+        """Тестируем повторный подбор, если адрес заняли после подбора."""
+        allocate = slugs.allocate_slug
+        lost = []
+
+        def allocate_and_lose_race(model, title, exclude_pk=None, spread=0):
+            slug = allocate(model, title, exclude_pk, spread)
+            if not lost:
+                # Параллельный запрос успевает сохранить тот же адрес.
+                lost.append(Note.objects.create(
+                    author=self.author, title=title, text='', slug=slug
+                ))
+            return slug
+
+        with mock.patch.object(
+            slugs, 'allocate_slug', side_effect=allocate_and_lose_race
+        ) as patched:
+            note = self.create()
+        self.assertRegex(note.slug, r'^zametka-\d+$')
+        self.assertNotEqual(note.slug, lost[0].slug)
+        self.assertEqual(patched.call_count, 2)
+        self.assertEqual(Note.objects.count(), 2)
+
+    def test_slugify_is_cached(self):
+        slugs.slugify_title.cache_clear()
+        for _ in range(3):
+            slugs.allocate_slug(Note, TITLE)
+        self.assertEqual(slugs.slugify_title.cache_info().hits, 2)
+
+    def test_form_with_taken_slug_after_validation(self):
+        """Тестируем ошибку формы, если адрес заняли после её проверки."""
+        self.create()
+        client = Client()
+        client.force_login(self.author)
+        with mock.patch.object(
+            NoteForm, 'clean_slug', lambda form: form.cleaned_data['slug']
+        ):
+            response = client.post(reverse('notes:add'), {
+                'title': TITLE, 'text': 'Текст', 'slug': 'zametka',
+            })
+        self.assertFormError(response, 'form', 'slug', 'zametka' + WARNING)
+        self.assertEqual(Note.objects.count(), 1)
+
+    def test_form_reraises_other_integrity_errors(self):
+        """Тестируем, что чужая ошибка целостности не выдаётся за адрес."""
+        client = Client()
+        client.force_login(self.author)
+        for slug in ('', 'svobodnyj'):
+            with self.subTest(slug=slug), mock.patch.object(
+                NoteForm, 'clean_slug', lambda form: form.cleaned_data['slug']
+            ), mock.patch.object(
+                Note, 'save', side_effect=IntegrityError
+            ), self.assertRaises(IntegrityError):
+                client.post(reverse('notes:add'), {
+                    'title': TITLE, 'text': 'Текст', 'slug': slug,
+                })
+
+
+@contextmanager
+def file_database(path):
+    """
+    Новые подключения — к файлу path с применёнными миграциями.
+
+    Общая тестовая база в памяти блокирует таблицу целиком на время
+    записи, а файл SQLite даёт потокам ждать друг друга.
+    """
+    settings = connections.settings['default']
+    connections.settings['default'] = {**settings, 'NAME': str(path)}
+    try:
+        run_in_thread(call_command, 'migrate', verbosity=0)
+        yield
+    finally:
+        connections.settings['default'] = settings
+
+
+def run_in_thread(func, *args, **kwargs):
+    """Вызываем func в новом потоке, со своими подключениями к базе."""
+    errors = []
+
+    def target():
+        try:
+            func(*args, **kwargs)
+        except BaseException as error:
+            errors.append(error)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    if errors:
+        raise errors[0]
+
+
+class TestConcurrentSlugs(SimpleTestCase):
+    """Заметки с одинаковым заголовком из параллельных потоков."""
+    databases = {'default'}
+    THREADS = 8
+    NOTES_PER_THREAD = 25
+
+    def test_parallel_same_titles(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with file_database(Path(directory) / 'db.sqlite3'):
+                run_in_thread(self.create_in_parallel)
+
+    def create_in_parallel(self):
+        author = User.objects.create(username='Автор')
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def create_notes():
+            try:
+                barrier.wait()
+                for _ in range(self.NOTES_PER_THREAD):
+                    Note.objects.create(author=author, title=TITLE, text='')
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=create_notes)
+            for _ in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        total = self.THREADS * self.NOTES_PER_THREAD
+        self.assertEqual(errors, [])
+        self.assertEqual(Note.objects.count(), total)
+        # После конфликтов суффиксы случайны, поэтому в нумерации
+        # возможны пропуски; важно, что все адреса различны.
+        slugs_taken = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(set(slugs_taken)), total)
+        self.assertIn('zametka', slugs_taken)
+        for slug in slugs_taken:
+            self.assertRegex(slug, r'^zametka(-\d+)?$')
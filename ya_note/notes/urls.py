@@ -1,15 +1,31 @@
+from django.conf import settings
 from django.urls import path
 
 from notes import views
 
 app_name = 'notes'
 
+# Под ASGI страницы чтения выполняются в пуле потоков,
+# см. yacommon/concurrency.py.
+if settings.ASYNC_VIEWS:
+    notes_list = views.NotesListAsync.as_view()
+    note_detail = views.NoteDetailAsync.as_view()
+else:
+    notes_list = views.NotesList.as_view()
+    note_detail = views.NoteDetail.as_view()
+
 urlpatterns = [
     path('', views.Home.as_view(), name='home'),
     path('add/', views.NoteCreate.as_view(), name='add'),
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
-    path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
+    path('note/<slug:slug>/', note_detail, name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
-    path('notes/', views.NotesList.as_view(), name='list'),
+    path('notes/', notes_list, name='list'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
+    path('search/json/', views.NoteSearchJson.as_view(), name='search_json'),
+    path(
+        'autocomplete/', views.NoteAutocomplete.as_view(),
+        name='autocomplete',
+    ),
     path('done/', views.NoteSuccess.as_view(), name='success'),
 ]
@@ -1,9 +1,20 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.urls import reverse_lazy
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.urls import reverse, reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from yacommon.concurrency import AsyncViewMixin
+from yacommon.pagination import paginate_keyset
+
+from .autocomplete import title_indexes
+from .forms import WARNING, NoteForm
 from .models import Note
+from .search import search_notes
+
+# Вместе с фильтром по автору — диапазон индекса (author, id).
+NOTES_ORDERING = ('id',)
 
 
 class Home(generic.TemplateView):
@@ -26,22 +37,43 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormBase(NoteBase):
+    """Базовый класс для создания и редактирования заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """
+        Сохраняем заметку.
+
+        Указанный адрес мог занять параллельный запрос уже после
+        проверки формы, тогда показываем ту же ошибку, что и форма.
+        Другие нарушения целостности пробрасываются.
+        """
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            slug = form.cleaned_data['slug']
+            taken = slug and Note.objects.filter(
+                slug=slug
+            ).exclude(pk=form.instance.pk).exists()
+            if not taken:
+                raise
+            form.add_error('slug', slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteFormBase, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteFormBase, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -50,10 +82,76 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """Список заметок пользователя с постраничным выводом по курсору."""
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        """Списку нужны только id, адрес и заголовок, без текста."""
+        return super().get_queryset().only('id', 'slug', 'title')
+
+    def get_context_data(self, **kwargs):
+        page = paginate_keyset(
+            self.object_list,
+            NOTES_ORDERING,
+            cursor=self.request.GET.get('after'),
+            per_page=settings.NOTES_COUNT_ON_PAGE,
+        )
+        return super().get_context_data(
+            object_list=page.object_list, page=page, **kwargs
+        )
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class NoteSearch(LoginRequiredMixin, generic.TemplateView):
+    """Поиск по заголовкам и текстам заметок пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        context['results'] = search_notes(
+            self.request.user, context['query']
+        )
+        return context
+
+
+class NoteSearchJson(LoginRequiredMixin, generic.View):
+    """Поиск по заметкам пользователя в формате JSON."""
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get('q', '')
+        results = [
+            {
+                'id': note.pk,
+                'title': note.title,
+                'slug': note.slug,
+                'url': reverse('notes:detail', args=(note.slug,)),
+                'snippet': note.highlighted,
+            }
+            for note in search_notes(request.user, query)
+        ]
+        return JsonResponse({'query': query, 'results': results})
+
+
+class NoteAutocomplete(LoginRequiredMixin, generic.View):
+    """Подсказки заголовков заметок пользователя по первым буквам."""
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get('q', '')
+        results = [
+            {**item, 'url': reverse('notes:detail', args=(item['slug'],))}
+            for item in title_indexes.complete(request.user.pk, query)
+        ]
+        return JsonResponse({'query': query, 'results': results})
+
+
+class NotesListAsync(AsyncViewMixin, NotesList):
+    """Список заметок для запуска под ASGI."""
+
+
+class NoteDetailAsync(AsyncViewMixin, NoteDetail):
+    """Заметка подробно для запуска под ASGI."""
@@ -1,9 +1,15 @@
+import os
+import sys
 from pathlib import Path
 
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий код проектов, пакет yacommon, лежит в корне репозитория.
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.append(str(BASE_DIR.parent))
+
 SECRET_KEY = 'django-insecure-yipnj$#j!ajarq%k55z4kuf3x79)91h0h42o9!1ho(z=!%mt=#'
 
 DEBUG = False
@@ -23,6 +29,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'yacommon.middleware.query_stats_middleware',
+    'yacommon.nplusone.nplusone_middleware',
+    'yacommon.db.read_only_request_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,6 +68,30 @@ DATABASES = {
     }
 }
 
+# Боевой режим SQLite, см. yacommon/db.py: WAL и PRAGMA для каждого
+# подключения, постоянные подключения и отдельное подключение для чтения.
+SQLITE_PRODUCTION = os.environ.get('DJANGO_SQLITE_PRODUCTION') == '1'
+
+SQLITE_PRAGMAS = {}
+
+DATABASE_READ_ALIAS = None
+
+if SQLITE_PRODUCTION:
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_READ_ALIAS = 'replica'
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+    }
+
+DATABASE_ROUTERS = ['yacommon.db.ReadReplicaRouter']
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +120,34 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_PAGE = 50
+
+NOTES_SEARCH_RESULTS = 20
+
+NOTES_SEARCH_MAX_WORDS = 10
+
+# Сколько самых новых совпадений ранжирует поиск по заметкам.
+NOTES_SEARCH_WINDOW = 1000
+
+# Подсказки заголовков: число подсказок, память на списки заголовков
+# всех пользователей процесса и как часто их перестраивать.
+NOTES_AUTOCOMPLETE_RESULTS = 10
+
+NOTES_AUTOCOMPLETE_MEMORY = 64 * 1024 * 1024
+
+NOTES_AUTOCOMPLETE_MAX_AGE = 300
+
+# Текст заметки от этого размера в байтах хранится сжатым, None — не
+# сжимать новые тексты.
+NOTES_TEXT_COMPRESSION_THRESHOLD = 4096
+
+# Асинхронные страницы чтения включает yanote/asgi.py.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+
+# Потоки для работы с базой асинхронных представлений.
+ASYNC_VIEW_THREADS = 8
+
+# Поиск N+1: None, 'log' или 'raise'; порог — число одинаковых SELECT.
+NPLUSONE_MODE = 'log' if DEBUG else None
+NPLUSONE_THRESHOLD = 3
@@ -0,0 +1,6 @@
+"""
+Общий код проектов ya_news и ya_note.
+
+Пакет лежит в корне репозитория; settings.py обоих проектов добавляют
+корень в sys.path, поэтому модули импортируются как yacommon.<модуль>.
+"""
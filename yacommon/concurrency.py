@@ -0,0 +1,87 @@
+"""
+Асинхронные варианты представлений чтения для запуска под ASGI.
+
+Django 3.2 под ASGI выполняет синхронное представление через
+sync_to_async(thread_sensitive=True), то есть все такие представления
+всех запросов идут по очереди в одном общем потоке. Асинхронное
+представление отсюда выполняет ту же синхронную работу — запросы к
+базе и отрисовку шаблона — в пуле из ASYNC_VIEW_THREADS потоков.
+
+Модель конкурентности:
+
+- цикл событий принимает запросы и отдаёт ответы, медленные клиенты
+  занимают только сопрограммы, а не потоки;
+- одновременно с базой работают не больше ASYNC_VIEW_THREADS
+  представлений, остальные ждут свободного потока в очереди пула;
+- у каждого потока пула своё подключение к базе, поэтому подключений
+  не больше, чем потоков; устаревшие закрываются до и после вызова,
+  как это делает обработчик request_finished;
+- контекстные переменные копируются в поток вместе с вызовом, поэтому
+  учёт запросов (middleware.py) видит запросы из пула.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, update_wrapper
+
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_VIEW_THREADS,
+                thread_name_prefix='async-view',
+            )
+    return _executor
+
+
+def _call_with_connections(func, args, kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_sync(func, *args, **kwargs):
+    """Выполняем синхронную func в пуле потоков представлений."""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(),
+        partial(context.run, _call_with_connections, func, args, kwargs),
+    )
+
+
+def _render(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    # Иначе Django отрисует шаблон уже в общем потоке sync_to_async.
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+    return response
+
+
+class AsyncViewMixin:
+    """
+    Представление, которое выполняется в пуле потоков.
+
+    as_view возвращает сопрограммную функцию, поэтому Django вызывает её
+    прямо из цикла событий.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            return await run_sync(_render, view, request, *args, **kwargs)
+
+        update_wrapper(async_view, view)
+        return async_view
@@ -0,0 +1,105 @@
+"""
+Боевой режим SQLite: PRAGMA подключений и отдельное подключение для чтения.
+
+Каждое новое подключение выполняет PRAGMA из SQLITE_PRAGMAS. В боевом
+режиме это журнал WAL, в котором читатели не ждут писателя, а писатель —
+читателей, synchronous=NORMAL (в режиме WAL данные не теряются при
+падении процесса), отображение файла в память и увеличенный кеш страниц.
+
+Запросы на чтение из GET- и HEAD-запросов маршрутизатор отправляет в
+подключение DATABASE_READ_ALIAS: тот же файл, открытый с query_only,
+поэтому случайная запись из такого подключения завершится ошибкой, а
+не пройдёт мимо основного. Чтение внутри транзакции основного
+подключения остаётся в ней, иначе оно не увидело бы её изменений.
+Генератор потокового ответа выполняется после возврата из middleware,
+поэтому каждая его часть получается под той же отметкой запроса.
+"""
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.decorators import sync_and_async_middleware
+
+from .middleware import stream_within
+
+READ_METHODS = ('GET', 'HEAD')
+
+_read_only_request = ContextVar('read_only_request', default=False)
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = dict(settings.SQLITE_PRAGMAS)
+    if connection.alias == settings.DATABASE_READ_ALIAS:
+        # Режим журнала меняет только основное подключение.
+        pragmas.pop('journal_mode', None)
+        pragmas['query_only'] = 'on'
+    # Напрямую через sqlite3: PRAGMA не должны попадать в учёт запросов.
+    for name, value in pragmas.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+class ReadReplicaRouter:
+    """Чтение из GET-запросов — в подключение для чтения."""
+
+    def db_for_read(self, model, **hints):
+        alias = settings.DATABASE_READ_ALIAS
+        if (
+            alias is None or not _read_only_request.get()
+            or connections['default'].in_atomic_block
+        ):
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Оба подключения работают с одним файлом.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db != settings.DATABASE_READ_ALIAS
+
+
+@contextmanager
+def read_only_request(read_only):
+    """Отмечаем для маршрутизатора, что запрос только читает."""
+    token = _read_only_request.set(read_only)
+    try:
+        yield
+    finally:
+        _read_only_request.reset(token)
+
+
+def route_stream(response, read_only):
+    if response.streaming:
+        response.streaming_content = stream_within(
+            response.streaming_content, partial(read_only_request, read_only)
+        )
+    return response
+
+
+@sync_and_async_middleware
+def read_only_request_middleware(get_response):
+    """Отмечаем GET- и HEAD-запросы для маршрутизатора."""
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            read_only = request.method in READ_METHODS
+            with read_only_request(read_only):
+                response = await get_response(request)
+            return route_stream(response, read_only)
+    else:
+        def middleware(request):
+            read_only = request.method in READ_METHODS
+            with read_only_request(read_only):
+                response = get_response(request)
+            return route_stream(response, read_only)
+    return middleware
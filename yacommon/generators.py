@@ -0,0 +1,70 @@
+"""Основа команд, создающих воспроизводимые синтетические данные."""
+import itertools
+import random
+from abc import ABCMeta, abstractmethod
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+
+def zipf_cum_weights(size, exponent):
+    """Накопленные веса распределения Ципфа для рангов 1..size."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)
+    ))
+
+
+def next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+class GenerateDataCommand(BaseCommand, metaclass=ABCMeta):
+    """
+    Команда, создающая пользователей и данные проекта.
+
+    Подклассы задают словарь vocabulary и метод generate(user_ids,
+    **options); случайные значения берутся только из self.rng, поэтому
+    с одним --seed данные совпадают.
+    """
+    vocabulary = ()
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument(
+            '--password', default='password',
+            help='Пароль всех созданных пользователей.',
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        user_ids = self.create_users(options['users'], options['password'])
+        self.generate(user_ids, **options)
+        self.stdout.write(self.style.SUCCESS('Данные созданы'))
+
+    @abstractmethod
+    def generate(self, user_ids, **options):
+        """Создаём данные проекта для пользователей user_ids."""
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(self.batch_size, total - start)
+
+    def words(self, count):
+        return ' '.join(self.rng.choices(self.vocabulary, k=count))
+
+    def create_users(self, total, password):
+        User = get_user_model()
+        first = next_pk(User)
+        password = make_password(password)
+        for start, size in self.batches(total):
+            User.objects.bulk_create(
+                User(pk=pk, username=f'user{pk}', password=password)
+                for pk in range(first + start, first + start + size)
+            )
+        self.stdout.write(f'Пользователей: {total}')
+        return list(range(first, first + total))
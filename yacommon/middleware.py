@@ -0,0 +1,150 @@
+"""
+Учёт SQL-запросов каждого HTTP-запроса.
+
+Middleware считает запросы ко всем базам и их суммарное время и
+кладёт итог в response.query_stats, откуда его читают тесты с
+бюджетом запросов. В режиме DEBUG итог также отдаётся в заголовках
+X-Query-Count и X-Query-Time, а в журнал yacommon.queries пишется строка
+на каждый запрос.
+
+Генератор потокового ответа выполняется уже после возврата из
+middleware. Его запросы учитываются в том же response.query_stats по
+мере чтения потока; заголовков у такого ответа нет, строка журнала
+пишется после последней части.
+
+Под ASGI запросы одного HTTP-запроса выполняются в потоках пула
+(см. concurrency.py), поэтому обработчики запросов не ставятся на
+подключения текущего потока, а передаются через контекстную переменную.
+Каждое подключение вызывает их из одной постоянной обёртки dispatch:
+контекст копируется в поток пула вместе с вызовом.
+"""
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import partial
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger('yacommon.queries')
+
+_collectors = ContextVar('query_collectors', default=())
+_END = object()
+
+
+def dispatch(execute, sql, params, many, context):
+    """Передаём запрос обработчикам текущего HTTP-запроса."""
+    for collector in reversed(_collectors.get()):
+        execute = partial(collector, execute)
+    return execute(sql, params, many, context)
+
+
+def install_dispatch(connection):
+    if dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch)
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    # Подключения потоков пула открываются уже после загрузки middleware.
+    install_dispatch(connection)
+
+
+@contextmanager
+def collect_queries(collector):
+    """Передаём collector все SQL-запросы текущего контекста."""
+    for connection in connections.all():
+        install_dispatch(connection)
+    token = _collectors.set((*_collectors.get(), collector))
+    try:
+        yield collector
+    finally:
+        _collectors.reset(token)
+
+
+def stream_within(content, context):
+    """
+    Части потокового ответа content, каждая получена внутри context().
+
+    Так генератор ответа видит контекстные переменные, которые
+    middleware ставит только на время обработки запроса.
+    """
+    content = iter(content)
+    while True:
+        with context():
+            part = next(content, _END)
+        if part is _END:
+            return
+        yield part
+
+
+@dataclass
+class QueryStats:
+    url_name: str = None
+    count: int = 0
+    duration: float = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+def log_query_stats(request, stats):
+    if settings.DEBUG:
+        logger.debug(
+            '%s %s: %d queries, %.2f ms', request.method,
+            stats.url_name or request.path, stats.count,
+            stats.duration * 1000,
+        )
+
+
+def stream_query_stats(request, content, stats):
+    yield from stream_within(content, partial(collect_queries, stats))
+    log_query_stats(request, stats)
+
+
+def report_query_stats(request, response, stats):
+    if request.resolver_match is not None:
+        stats.url_name = request.resolver_match.view_name
+    response.query_stats = stats
+    if response.streaming:
+        response.streaming_content = stream_query_stats(
+            request, response.streaming_content, stats
+        )
+        return response
+    if settings.DEBUG:
+        response['X-Query-Count'] = str(stats.count)
+        response['X-Query-Time'] = f'{stats.duration * 1000:.2f}ms'
+    log_query_stats(request, stats)
+    return response
+
+
+@sync_and_async_middleware
+def query_stats_middleware(get_response):
+    """
+    Считаем запросы к базе за время обработки HTTP-запроса.
+
+    Под ASGI middleware остаётся асинхронным: иначе Django вызывал бы
+    его через sync_to_async в одном общем для всех запросов потоке.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            with collect_queries(QueryStats()) as stats:
+                response = await get_response(request)
+            return report_query_stats(request, response, stats)
+    else:
+        def middleware(request):
+            with collect_queries(QueryStats()) as stats:
+                response = get_response(request)
+            return report_query_stats(request, response, stats)
+    return middleware
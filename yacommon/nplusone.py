@@ -0,0 +1,139 @@
+"""
+Поиск N+1: одинаковых SELECT-запросов, повторённых за один HTTP-запрос.
+
+Запросы группируются по нормализованному тексту: параметры Django и
+так передаёт отдельно, а числа, строки и списки IN (...) заменяются
+заглушками. Группа из NPLUSONE_THRESHOLD и более запросов считается
+подозрительной. Для каждого запроса группы запоминается строка кода
+проекта и строка шаблона, которые его вызвали.
+
+Режим задаётся настройкой NPLUSONE_MODE: None — детектор выключен,
+'log' — предупреждение в журнал yacommon.nplusone, 'raise' — исключение
+NPlusOneError (так детектор работает в тестах).
+"""
+import asyncio
+import logging
+import re
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.template.base import Node
+from django.utils.decorators import sync_and_async_middleware
+
+from . import middleware
+
+logger = logging.getLogger('yacommon.nplusone')
+
+STRINGS = re.compile(r"'(?:[^']|'')*'")
+NUMBERS = re.compile(r'\b\d+\b')
+IN_LISTS = re.compile(r'\bIN \((?:[^()]*)\)', re.IGNORECASE)
+RENDER_ANNOTATED = Node.render_annotated.__code__
+# Обёртки выполнения запросов — не место, где запрос был вызван.
+WRAPPER_FILES = {__file__, middleware.__file__}
+
+
+class NPlusOneError(Exception):
+    """За один HTTP-запрос повторился один и тот же SELECT."""
+
+
+def normalize(sql):
+    sql = STRINGS.sub('?', sql)
+    sql = IN_LISTS.sub('IN (...)', sql)
+    return NUMBERS.sub('?', sql)
+
+
+def _is_project_file(filename):
+    return (
+        filename.startswith(str(settings.BASE_DIR))
+        and 'site-packages' not in filename
+        and filename not in WRAPPER_FILES
+    )
+
+
+def find_origin(frame):
+    """
+    Строка кода проекта и строка шаблона, вызвавшие запрос.
+
+    Строка шаблона берётся из ближайшего Node.render_annotated:
+    у узла есть шаблон и номер строки его тега.
+    """
+    code_line = template_line = None
+    while frame is not None and (code_line is None or template_line is None):
+        code = frame.f_code
+        if template_line is None and code is RENDER_ANNOTATED:
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                template_line = f'{origin.template_name}:{token.lineno}'
+        if code_line is None and _is_project_file(code.co_filename):
+            filename = Path(code.co_filename).relative_to(settings.BASE_DIR)
+            code_line = f'{filename}:{frame.f_lineno} in {code.co_name}'
+        frame = frame.f_back
+    return code_line, template_line
+
+
+class QueryGroups:
+    """Обёртка выполнения запросов, собирающая SELECT по группам."""
+
+    def __init__(self):
+        self.origins = defaultdict(Counter)
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:6].upper() == 'SELECT':
+            self.origins[normalize(sql)][find_origin(sys._getframe(1))] += 1
+        return execute(sql, params, many, context)
+
+    def duplicates(self, threshold):
+        """Группы из threshold и более запросов, самые частые первыми."""
+        groups = [
+            (sum(origins.values()), sql, origins)
+            for sql, origins in self.origins.items()
+        ]
+        return sorted(
+            (group for group in groups if group[0] >= threshold),
+            key=lambda group: -group[0],
+        )
+
+
+def format_report(path, duplicates):
+    lines = [f'Повторяющиеся запросы при обработке {path}:']
+    for count, sql, origins in duplicates:
+        lines.append(f'{count} × {sql}')
+        for (code_line, template_line), times in origins.most_common():
+            where = ', '.join(filter(None, (template_line, code_line)))
+            lines.append(f'    {times} × {where or "неизвестно"}')
+    return '\n'.join(lines)
+
+
+def report_duplicates(request, response, groups, mode):
+    duplicates = groups.duplicates(settings.NPLUSONE_THRESHOLD)
+    if duplicates:
+        report = format_report(request.path, duplicates)
+        if mode == 'raise':
+            raise NPlusOneError(report)
+        logger.warning(report)
+    return response
+
+
+@sync_and_async_middleware
+def nplusone_middleware(get_response):
+    if asyncio.iscoroutinefunction(get_response):
+        async def handler(request):
+            mode = getattr(settings, 'NPLUSONE_MODE', None)
+            if mode is None:
+                return await get_response(request)
+            with middleware.collect_queries(QueryGroups()) as groups:
+                response = await get_response(request)
+            return report_duplicates(request, response, groups, mode)
+    else:
+        def handler(request):
+            mode = getattr(settings, 'NPLUSONE_MODE', None)
+            if mode is None:
+                return get_response(request)
+            with middleware.collect_queries(QueryGroups()) as groups:
+                response = get_response(request)
+            return report_duplicates(request, response, groups, mode)
+    return handler
@@ -0,0 +1,98 @@
+import base64
+import datetime
+import json
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+@dataclass
+class KeysetPage:
+    """Страница выборки и курсор для перехода к следующей."""
+    object_list: list
+    next_cursor: str = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _json_default(value):
+    # DjangoJSONEncoder обрезает микросекунды, а для курсора
+    # нужна точная граница, поэтому даты сериализуем сами.
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} нельзя упаковать в курсор')
+
+
+def encode_cursor(values):
+    """Упаковываем значения ключа сортировки в строку для URL."""
+    data = json.dumps(values, default=_json_default).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, fields):
+    """Распаковываем курсор и приводим значения к типам полей модели."""
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data)
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError
+        # None прошёл бы to_python, но не годится для сравнения в filter.
+        if None in values:
+            raise ValueError
+        return [
+            model._meta.get_field(field).to_python(value)
+            for field, value in zip(fields, values)
+        ]
+    except (TypeError, ValueError, ValidationError):
+        raise Http404('Неверный курсор страницы.')
+
+
+def keyset_filter(ordering, values):
+    """
+    Условие «строго после курсора» для заданной сортировки.
+
+    Для сортировки (a, b) получаем a > x OR (a = x AND b > y),
+    направление сравнения берётся из знака поля.
+    """
+    condition = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[index]})
+        for previous, value in zip(ordering[:index], values):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+def paginate_keyset(queryset, ordering, cursor=None, per_page=20):
+    """
+    Возвращаем страницу выборки после курсора.
+
+    Выбирается на одну запись больше, чем нужно, чтобы узнать,
+    есть ли следующая страница, без отдельного COUNT.
+    """
+    fields = [field.lstrip('-') for field in ordering]
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, fields)
+        queryset = queryset.filter(keyset_filter(ordering, values))
+    object_list = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(object_list) > per_page:
+        object_list = object_list[:per_page]
+        last = object_list[-1]
+        next_cursor = encode_cursor(
+            [getattr(last, field) for field in fields]
+        )
+    return KeysetPage(object_list, next_cursor)
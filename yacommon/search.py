@@ -0,0 +1,40 @@
+"""
+Общие части полнотекстового поиска на SQLite FTS5.
+
+Запрос пользователя превращается в выражение MATCH из слов, каждое в
+кавычках и с поиском по префиксу. Фрагменты с найденными словами
+приходят с маркерами MARK_START и MARK_END, которые highlight
+заменяет на <mark> после экранирования текста.
+"""
+import re
+
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+# Маркеры подсветки, которые не встречаются в обычном тексте.
+MARK_START, MARK_END = '\x02', '\x03'
+
+
+def query_words(query, limit):
+    """Первые limit слов запроса."""
+    return re.findall(r'\w+', query)[:limit]
+
+
+def match_terms(words):
+    """
+    Слова запроса как термы выражения MATCH.
+
+    Каждое слово берётся в кавычки, чтобы символы синтаксиса FTS5 из
+    запроса не ломали выражение, и ищется по префиксу, чтобы
+    «новост» находило «новости» и «новостей».
+    """
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def highlight(snippet):
+    """Экранируем фрагмент и подсвечиваем найденные слова."""
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )